@@ -6,10 +6,14 @@ import json
 import sys
 import time
 from pathlib import Path
-from typing import List
+from typing import Dict, List
 
 from sim.commands import DEFAULT_COMMANDS, load_command_sequence
-from sim.experiment import run_many_experiments
+from sim.cache import ResultCache, experiment_fingerprint
+from sim.experiment import ENGINES, run_many_experiments
+from sim.runlog import RunLogWriter
+from sim.security import DEFAULT_MAC_CACHE_SIZE
+from sim.stats import RunningStats, load_moments, merge_aggregate, moments_path, save_moments
 from sim.types import AttackMode, Mode, SimulationConfig
 
 
@@ -37,6 +41,26 @@ def parse_args() -> argparse.Namespace:
                         help="Maximum consecutive replay attempts per legitimate frame in inline mode")
     parser.add_argument("--challenge-nonce-bits", type=int, default=32,
                         help="Nonce length (bits) for the challenge-response mode")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes used to run Monte Carlo trials in parallel")
+    parser.add_argument("--engine", choices=list(ENGINES), default="scalar",
+                        help="Simulation engine: per-run 'scalar', all-modes-per-run 'lockstep', "
+                             "NumPy 'batched' (no_def/rolling/window), or 'analytic' (no sampling; exact up to the "
+                             "reported truncated mass, practical for short runs and small windows)")
+    parser.add_argument("--mac-cache-size", type=int, default=DEFAULT_MAC_CACHE_SIZE,
+                        help="Entries kept in the LRU cache of computed MACs (0 disables it)")
+    parser.add_argument("--target-ci", type=float, default=None,
+                        help="Sample batches of --runs until every rate's 95%% CI half-width is at most this")
+    parser.add_argument("--max-runs", type=int, default=None,
+                        help="Run budget per mode for --target-ci (default: 100 x --runs)")
+    parser.add_argument("--extend-to", type=int, default=None,
+                        help="Grow the result in --output-json to this many runs, simulating only the missing ones")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always simulate instead of reusing cached results from results/.cache")
+    parser.add_argument("--runs-jsonl", type=str, default=None,
+                        help="Stream one JSON line per simulated run to this path (gzip-compressed if it ends in .gz)")
+    parser.add_argument("--runs-columns", type=str, default=None,
+                        help="Store per-run counters as memory-mappable .npy columns in this directory")
     parser.add_argument("--quiet", action="store_true",
                         help="Disable visual progress display (quiet mode)")
     return parser.parse_args()
@@ -71,6 +95,39 @@ def validate_parameters(args: argparse.Namespace) -> None:
         errors.append(f"Invalid inline_attack_burst: {args.inline_attack_burst}. Must be positive integer")
     if args.challenge_nonce_bits <= 0:
         errors.append(f"Invalid challenge_nonce_bits: {args.challenge_nonce_bits}. Must be positive integer")
+    if args.jobs <= 0:
+        errors.append(f"Invalid jobs: {args.jobs}. Must be positive integer")
+    if args.mac_cache_size < 0:
+        errors.append(f"Invalid mac_cache_size: {args.mac_cache_size}. Must be non-negative integer")
+    if args.engine in ("batched", "analytic"):
+        if args.jobs > 1:
+            errors.append(f"The {args.engine} engine runs in a single process; drop --jobs")
+        unsupported = [m for m in args.modes if m == Mode.CHALLENGE.value]
+        if unsupported:
+            errors.append(f"The {args.engine} engine does not support the challenge mode; pass --modes no_def rolling window")
+    if args.engine == "analytic" and args.attacker_loss > 0:
+        errors.append("The analytic engine requires --attacker-loss 0")
+    if args.target_ci is not None:
+        if args.target_ci <= 0:
+            errors.append(f"Invalid target_ci: {args.target_ci}. Must be positive")
+        if args.engine == "analytic":
+            errors.append("The analytic engine samples nothing; drop --target-ci")
+        if args.runs < 2:
+            errors.append("--target-ci needs --runs (the batch size) of at least 2")
+    if args.extend_to is not None:
+        if not args.output_json or args.seed is None:
+            errors.append("--extend-to needs --output-json (the result to extend) and --seed")
+        if args.engine not in ("scalar", "lockstep"):
+            errors.append("--extend-to works with the scalar or lockstep engine")
+    if args.runs_jsonl is not None and args.runs_columns is not None:
+        errors.append("Pass either --runs-jsonl or --runs-columns, not both")
+    if (args.runs_jsonl or args.runs_columns) and args.engine == "analytic":
+        errors.append("The analytic engine simulates no runs; drop --runs-jsonl/--runs-columns")
+    if args.max_runs is not None:
+        if args.target_ci is None:
+            errors.append("--max-runs only applies together with --target-ci")
+        elif args.max_runs < args.runs:
+            errors.append(f"Invalid max_runs: {args.max_runs}. Must be >= runs ({args.runs})")
     
     # 验证文件路径
     if args.commands_file and not Path(args.commands_file).exists():
@@ -160,23 +217,67 @@ def main() -> None:
     except Exception as exc:
         raise SystemExit(f"Failed to create simulation configuration: {exc}") from exc
 
+    experiment = experiment_fingerprint(
+        config=base_config, modes=modes, seed=args.seed, engine=args.engine, **_sampling_fields(args)
+    )
+    previous = None
+    if args.extend_to is not None:
+        previous = _load_previous(args, experiment, len(modes))
+
     # Run experiments with progress display (unless quiet mode)
+    run_log = None
     try:
-        stats = run_many_experiments(
-            base_config, 
-            modes=modes, 
-            runs=args.runs, 
-            seed=args.seed,
-            show_progress=not args.quiet
-        )
+        if args.runs_jsonl is not None:
+            run_log = RunLogWriter(args.runs_jsonl)
+        elif args.runs_columns is not None:
+            from sim.runcolumns import RunColumnsWriter  # lazy import: needs NumPy
+
+            run_log = RunColumnsWriter(args.runs_columns)
+        cache = None if args.no_cache else ResultCache()
+
+        def simulate(selected: List[Mode], runs: int, first_run: int = 0, target_ci=None, max_runs=None):
+            return run_many_experiments(
+                base_config, 
+                modes=selected, 
+                runs=runs, 
+                seed=args.seed,
+                show_progress=not args.quiet,
+                jobs=args.jobs,
+                engine=args.engine,
+                mac_cache_size=args.mac_cache_size,
+                target_ci=target_ci,
+                max_runs=max_runs,
+                cache=cache,
+                first_run=first_run,
+                run_log=run_log,
+            )
+
+        if previous is None:
+            stats = simulate(modes, args.runs, target_ci=args.target_ci, max_runs=args.max_runs)
+        else:
+            # Each mode continues from its own stored count (they differ after --target-ci)
+            by_count: Dict[int, List[int]] = {}
+            for index, moments in enumerate(previous):
+                by_count.setdefault(moments["legit"].count, []).append(index)
+            stats = [None] * len(modes)
+            for done, indices in by_count.items():
+                extension = simulate([modes[i] for i in indices], args.extend_to, first_run=done)
+                for index, entry in zip(indices, extension):
+                    stats[index] = merge_aggregate(previous[index], entry)
+                    stats[index].metadata = {**stats[index].metadata, "extended_from": done}
     except Exception as exc:
         print(f"\n❌ Simulation failed: {exc}", file=sys.stderr)
         if not args.quiet:
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        if run_log is not None:
+            run_log.close()
     
     _print_table(stats)
+    if run_log is not None:
+        print(f"\n✓ Streamed {run_log.count} per-run records to {args.runs_jsonl or args.runs_columns}")
 
     if args.output_json:
         try:
@@ -184,12 +285,43 @@ def main() -> None:
             path.parent.mkdir(parents=True, exist_ok=True)  # Create directory if needed
             payload = [entry.as_dict() for entry in stats]
             path.write_text(json.dumps(payload, indent=2), encoding="utf-8")
+            if all(entry.moments for entry in stats):
+                save_moments(moments_path(path), experiment, stats)
             print(f"\n✓ Saved aggregate metrics to {path}")
         except Exception as exc:
             print(f"\n❌ Failed to save JSON output to '{args.output_json}': {exc}", file=sys.stderr)
             sys.exit(1)
 
 
+def _sampling_fields(args: argparse.Namespace) -> Dict[str, object]:
+    """Sequential-sampling settings that shaped a result (none for a fixed run count)."""
+
+    if args.target_ci is None:
+        return {}
+    return {"target_ci": args.target_ci, "max_runs": args.max_runs}
+
+
+def _load_previous(args: argparse.Namespace, experiment: str, num_modes: int) -> List[Dict[str, RunningStats]]:
+    """Read the per-mode moments stored next to --output-json for --extend-to."""
+
+    sidecar = moments_path(args.output_json)
+    try:
+        stored, previous = load_moments(sidecar)
+    except FileNotFoundError as exc:
+        raise SystemExit(f"No stored run statistics at '{sidecar}'; run once with --output-json first") from exc
+    except (OSError, ValueError, KeyError) as exc:
+        raise SystemExit(f"Failed to read run statistics from '{sidecar}': {exc}") from exc
+    if stored != experiment or len(previous) != num_modes:
+        raise SystemExit(f"'{args.output_json}' was produced with different parameters; cannot extend it")
+    counts = [moments["legit"].count for moments in previous]
+    if args.extend_to <= max(counts):
+        raise SystemExit(f"'{args.output_json}' already has {max(counts)} runs (>= --extend-to {args.extend_to})")
+    if not args.quiet:
+        stored_runs = counts[0] if len(set(counts)) == 1 else "/".join(map(str, counts))
+        print(f"\n➕ Extending {stored_runs} stored runs to {args.extend_to}")
+    return previous
+
+
 def _print_table(stats) -> None:
     if not stats:
         print("No stats to display")
@@ -253,13 +385,21 @@ def _print_header(args) -> None:
     print("="*80)
     print("\n📋 SIMULATION PARAMETERS:")
     print(f"   └─ Defense Modes: {', '.join(args.modes)}")
-    print(f"   └─ Monte Carlo Runs: {args.runs}")
+    if args.target_ci is not None:
+        max_runs = args.max_runs if args.max_runs is not None else 100 * args.runs
+        print(f"   └─ Monte Carlo Runs: batches of {args.runs} until CI ±{args.target_ci} (max {max_runs})")
+    else:
+        print(f"   └─ Monte Carlo Runs: {args.runs}")
     print(f"   └─ Legitimate Transmissions: {args.num_legit} per run")
     print(f"   └─ Replay Attempts: {args.num_replay} per run")
     print(f"   └─ Packet Loss Rate: {args.p_loss:.2%}")
     print(f"   └─ Packet Reorder Rate: {args.p_reorder:.2%}")
     print(f"   └─ Window Size: {args.window_size}")
     print(f"   └─ Attack Mode: {args.attack_mode}")
+    if args.jobs > 1:
+        print(f"   └─ Worker Processes: {args.jobs}")
+    if args.engine != "scalar":
+        print(f"   └─ Engine: {args.engine}")
     if args.target_commands:
         print(f"   └─ Target Commands: {', '.join(args.target_commands)}")
     print("\n🔬 INITIALIZING SIMULATION ENVIRONMENT...")
@@ -0,0 +1,75 @@
+"""
+信道队列基准测试
+Channel queue benchmark
+
+用途：
+- 比较堆实现的 Channel 与日历队列实现的 CalendarChannel
+- 验证两者在相同随机种子下交付完全相同的帧序列
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sim.channel import CalendarChannel, Channel
+from sim.types import Frame
+
+CHANNELS = {"heap": Channel, "calendar": CalendarChannel}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compare the heap and calendar-queue channels")
+    parser.add_argument("--frames", type=int, default=200_000, help="Frames sent per measurement")
+    parser.add_argument("--p-loss", type=float, default=0.1, help="Loss probability")
+    parser.add_argument("--p-reorder", type=float, nargs="+", default=[0.0, 0.1, 0.3, 0.7],
+                        help="Reorder probabilities to measure")
+    parser.add_argument("--repeat", type=int, default=3, help="Measurements per setting (best is reported)")
+    parser.add_argument("--seed", type=int, default=42, help="RNG seed of the channel draws")
+    return parser.parse_args()
+
+
+def run_channel(factory, frames, p_loss: float, p_reorder: float, seed: int):
+    channel = factory(p_loss=p_loss, p_reorder=p_reorder, rng=random.Random(seed))
+    send = channel.send
+    arrived = []
+    start = time.perf_counter()
+    for frame in frames:
+        arrived.extend(send(frame))
+    arrived.extend(channel.flush())
+    return time.perf_counter() - start, arrived
+
+
+def run_benchmark(num_frames: int, p_loss: float, reorders, repeat: int, seed: int) -> None:
+    print("\n" + "="*80)
+    print(f"📊 Channel Queue: {num_frames:,} frames, p_loss={p_loss}")
+    print("="*80 + "\n")
+
+    frames = [Frame(command="FWD", counter=i) for i in range(num_frames)]
+    print(f"{'p_reorder':<12} {'Heap (s)':<12} {'Calendar (s)':<14} {'Speedup':<10} {'Identical'}")
+    print("-" * 62)
+
+    for p_reorder in reorders:
+        best = {}
+        deliveries = {}
+        for name, factory in CHANNELS.items():
+            timings = []
+            for _ in range(repeat):
+                elapsed, arrived = run_channel(factory, frames, p_loss, p_reorder, seed)
+                timings.append(elapsed)
+            best[name] = min(timings)
+            deliveries[name] = [frame.counter for frame in arrived]
+        identical = deliveries["heap"] == deliveries["calendar"]
+        print(f"{p_reorder:<12} {best['heap']:<12.3f} {best['calendar']:<14.3f} "
+              f"{best['heap'] / best['calendar']:<10.2f} {'yes' if identical else 'NO'}")
+
+    print("\n✓ Channel benchmark completed")
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    run_benchmark(args.frames, args.p_loss, args.p_reorder, args.repeat, args.seed)
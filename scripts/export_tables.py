@@ -1,9 +1,15 @@
 """Export simulation JSON summaries as Markdown tables."""
 from __future__ import annotations
 
-import json
+import sys
 from pathlib import Path
-from typing import Dict, List
+from typing import List
+
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sim.results_store import DEFAULT_STORE_PATH, ResultsStore
 
 RESULTS_DIR = Path("results")
 OUTPUT = Path("docs/metrics_tables.md")
@@ -16,28 +22,19 @@ MODE_LABELS = {
 }
 
 
-def load(path: Path) -> List[Dict]:
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
-
-
 def pct(value: float) -> str:
     return f"{value * 100:.2f}%"
 
 
-def make_preorder_table() -> str:
+def make_preorder_table(store: ResultsStore) -> str:
     """Generate p_reorder sweep table (Rolling vs Window only)."""
-    try:
-        data = load(RESULTS_DIR / "p_reorder_sweep.json")
-    except FileNotFoundError:
-        return ""
-    
+    source = RESULTS_DIR / "p_reorder_sweep.json"
     header = "| p_reorder | Rolling (%) | Window (W=5) (%) |\n| --- | --- | --- |"
     rows: List[str] = []
     
-    for p in sorted({entry["sweep_value"] for entry in data if entry["sweep_type"] == "p_reorder"}):
-        rolling_entry = next((e for e in data if e["sweep_value"] == p and e["mode"] == "rolling"), None)
-        window_entry = next((e for e in data if e["sweep_value"] == p and e["mode"] == "window"), None)
+    for p in store.distinct("sweep_value", source, sweep_type="p_reorder"):
+        rolling_entry = store.get(source, sweep_value=p, mode="rolling")
+        window_entry = store.get(source, sweep_value=p, mode="window")
         
         if rolling_entry and window_entry:
             rows.append(
@@ -50,20 +47,16 @@ def make_preorder_table() -> str:
     return "## Packet-reorder sweep - legitimate acceptance (p_loss=0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/p_reorder_sweep.json`\n"
 
 
-def make_ploss_tables() -> str:
+def make_ploss_tables(store: ResultsStore) -> str:
     """Generate p_loss sweep tables."""
-    try:
-        data = load(RESULTS_DIR / "p_loss_sweep.json")
-    except FileNotFoundError:
-        return ""
-    
+    source = RESULTS_DIR / "p_loss_sweep.json"
     # Simplified to Rolling vs Window only
     header = "| p_loss | Rolling (%) | Window (W=5) (%) |\n| --- | --- | --- |"
     rows: List[str] = []
     
-    for p in sorted({entry["sweep_value"] for entry in data if entry["sweep_type"] == "p_loss"}):
-        rolling_entry = next((e for e in data if e["sweep_value"] == p and e["mode"] == "rolling"), None)
-        window_entry = next((e for e in data if e["sweep_value"] == p and e["mode"] == "window"), None)
+    for p in store.distinct("sweep_value", source, sweep_type="p_loss"):
+        rolling_entry = store.get(source, sweep_value=p, mode="rolling")
+        window_entry = store.get(source, sweep_value=p, mode="window")
         
         if rolling_entry and window_entry:
             rows.append(
@@ -76,18 +69,12 @@ def make_ploss_tables() -> str:
     return "## Packet-loss sweep - legitimate acceptance (p_reorder=0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/p_loss_sweep.json`\n"
 
 
-def make_window_table() -> str:
+def make_window_table(store: ResultsStore) -> str:
     """Generate window size sweep table."""
-    try:
-        data = load(RESULTS_DIR / "window_sweep.json")
-    except FileNotFoundError:
-        return ""
-    
     rows: List[str] = []
     header = "| Window W | Legitimate (%) | Replay success (%) |\n| --- | --- | --- |"
     
-    subset = [e for e in data if e["mode"] == "window" and e["sweep_type"] == "window"]
-    subset.sort(key=lambda e: e["sweep_value"])
+    subset = store.query(RESULTS_DIR / "window_sweep.json", order_by="sweep_value", mode="window", sweep_type="window")
     
     for entry in subset:
         rows.append(
@@ -104,54 +91,47 @@ def make_window_table() -> str:
     return "## Window sweep (Stress test: p_loss=0.05, p_reorder=0.3)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/window_sweep.json`\n"
 
 
-def make_baseline_tables() -> str:
+def make_baseline_tables(store: ResultsStore) -> str:
     """Generate baseline and trace-driven tables."""
     output = []
     
     # Ideal channel baseline
-    try:
-        data = load(RESULTS_DIR / "ideal_p0.json")
-        header = "| Mode | Legitimate (%) | Replay success (%) |\n| --- | --- | --- |"
-        rows = []
-        for mode in ORDER:
-            entry = next((e for e in data if e["mode"] == mode), None)
-            if entry:
-                rows.append(
-                    f"| {mode} | {pct(entry['avg_legit_rate'])} | {pct(entry['avg_attack_rate'])} |"
-                )
-        if rows:
-            output.append("## Ideal channel baseline (post attack, runs = 500, p_loss = 0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/ideal_p0.json`")
-    except FileNotFoundError:
-        pass
+    header = "| Mode | Legitimate (%) | Replay success (%) |\n| --- | --- | --- |"
+    rows = []
+    for mode in ORDER:
+        entry = store.get(RESULTS_DIR / "ideal_p0.json", mode=mode)
+        if entry:
+            rows.append(
+                f"| {mode} | {pct(entry['avg_legit_rate'])} | {pct(entry['avg_attack_rate'])} |"
+            )
+    if rows:
+        output.append("## Ideal channel baseline (post attack, runs = 500, p_loss = 0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/ideal_p0.json`")
     
     # Trace-driven
-    try:
-        data = load(RESULTS_DIR / "trace_inline.json")
-        header = "| Mode | Legitimate (%) | Replay success (%) |\n| --- | --- | --- |"
-        rows = []
-        for mode in ORDER:
-            entry = next((e for e in data if e["mode"] == mode), None)
-            if entry:
-                rows.append(
-                    f"| {mode} | {pct(entry['avg_legit_rate'])} | {pct(entry['avg_attack_rate'])} |"
-                )
-        if rows:
-            output.append("## Trace-driven inline scenario (real command trace, runs = 300, p_loss = 0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/trace_inline.json`")
-    except FileNotFoundError:
-        pass
+    rows = []
+    for mode in ORDER:
+        entry = store.get(RESULTS_DIR / "trace_inline.json", mode=mode)
+        if entry:
+            rows.append(
+                f"| {mode} | {pct(entry['avg_legit_rate'])} | {pct(entry['avg_attack_rate'])} |"
+            )
+    if rows:
+        output.append("## Trace-driven inline scenario (real command trace, runs = 300, p_loss = 0)\n\n" + "\n".join([header, *rows]) + "\n\n**Source**: `results/trace_inline.json`")
     
     return "\n".join(output)
 
 
 def main() -> None:
-    sections = [
-        "# Aggregated metrics tables",
-        "\nThis document contains the experimental results referenced in the main README.\n",
-        make_preorder_table(),
-        make_ploss_tables(),
-        make_window_table(),
-        make_baseline_tables(),
-    ]
+    with ResultsStore(DEFAULT_STORE_PATH) as store:
+        store.ingest_dir(RESULTS_DIR)
+        sections = [
+            "# Aggregated metrics tables",
+            "\nThis document contains the experimental results referenced in the main README.\n",
+            make_preorder_table(store),
+            make_ploss_tables(store),
+            make_window_table(store),
+            make_baseline_tables(store),
+        ]
     
     # Filter out empty sections
     content = "\n".join(s for s in sections if s.strip())
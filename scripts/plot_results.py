@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 import argparse
-import json
+import sys
 from pathlib import Path
 from typing import Dict, Iterable, List, Sequence
 import math
@@ -10,6 +10,12 @@ import math
 import matplotlib.pyplot as plt
 import matplotlib.ticker as ticker
 
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from sim.results_store import DEFAULT_STORE_PATH, ResultsStore
+
 ORDER = ["no_def", "rolling", "window", "challenge"]
 
 # Enhanced styling to distinguish overlapping lines
@@ -105,11 +111,6 @@ def configure_style(theme: str, use_tex: bool) -> None:
         plt.rcParams["font.family"] = "serif"
 
 
-def load_json(path: Path) -> List[Dict]:
-    with path.open("r", encoding="utf-8") as fh:
-        return json.load(fh)
-
-
 def percent_series(entries: Iterable[Dict], key: str) -> List[float]:
     return [entry[key] * 100 for entry in entries]
 
@@ -159,12 +160,9 @@ def plot_baseline(data: List[Dict], width: float, save_kwargs: dict) -> None:
     save_figure(fig, stem="baseline_attack", **save_kwargs)
 
 
-def plot_ploss_curves(data: List[Dict], width: float, save_kwargs: dict, layout: str = "combined") -> None:
+def plot_ploss_curves(store: ResultsStore, source: Path, width: float, save_kwargs: dict, layout: str = "combined") -> None:
     subset_by_mode = {
-        mode: sorted(
-            [entry for entry in data if entry["mode"] == mode and entry["sweep_type"] == "p_loss"],
-            key=lambda e: e["sweep_value"],
-        )
+        mode: store.query(source, order_by="sweep_value", mode=mode, sweep_type="p_loss")
         for mode in ORDER
     }
     
@@ -251,12 +249,9 @@ def plot_ploss_curves(data: List[Dict], width: float, save_kwargs: dict, layout:
     save_figure(fig, stem="p_loss_attack", **save_kwargs)
 
 
-def plot_preorder_curves(data: List[Dict], width: float, save_kwargs: dict) -> None:
+def plot_preorder_curves(store: ResultsStore, source: Path, width: float, save_kwargs: dict) -> None:
     subset_by_mode = {
-        mode: sorted(
-            [entry for entry in data if entry["mode"] == mode and entry["sweep_type"] == "p_reorder"],
-            key=lambda e: e["sweep_value"],
-        )
+        mode: store.query(source, order_by="sweep_value", mode=mode, sweep_type="p_reorder")
         for mode in ORDER
     }
     
@@ -304,11 +299,8 @@ def plot_preorder_curves(data: List[Dict], width: float, save_kwargs: dict) -> N
     save_figure(fig, stem="p_reorder_legit", **save_kwargs)
 
 
-def plot_window_tradeoff(data: List[Dict], width: float, save_kwargs: dict) -> None:
-    subset = [
-        entry for entry in data if entry["mode"] == "window" and entry.get("sweep_type") == "window"
-    ]
-    subset.sort(key=lambda e: e["sweep_value"])
+def plot_window_tradeoff(store: ResultsStore, source: Path, width: float, save_kwargs: dict) -> None:
+    subset = store.query(source, order_by="sweep_value", mode="window", sweep_type="window")
     if not subset:
         return
     
@@ -378,17 +370,21 @@ def main() -> None:
     save_kwargs = {"fig_dir": fig_dir, "formats": args.formats, "dpi": args.dpi}
     width = args.column_width * args.scale
 
-    if data_paths["baseline"].exists():
-        plot_baseline(load_json(data_paths["baseline"]), width, save_kwargs)
-    
-    if data_paths["p_loss"].exists():
-        plot_ploss_curves(load_json(data_paths["p_loss"]), width, save_kwargs, layout=args.ploss_layout)
-    
-    if data_paths["p_reorder"].exists():
-        plot_preorder_curves(load_json(data_paths["p_reorder"]), width, save_kwargs)
+    with ResultsStore(DEFAULT_STORE_PATH) as store:
+        for path in data_paths.values():
+            store.ingest(path)
+
+        if data_paths["baseline"].exists():
+            plot_baseline(store.query(data_paths["baseline"]), width, save_kwargs)
+
+        if data_paths["p_loss"].exists():
+            plot_ploss_curves(store, data_paths["p_loss"], width, save_kwargs, layout=args.ploss_layout)
+
+        if data_paths["p_reorder"].exists():
+            plot_preorder_curves(store, data_paths["p_reorder"], width, save_kwargs)
 
-    if data_paths["window"].exists():
-        plot_window_tradeoff(load_json(data_paths["window"]), width * 1.2, save_kwargs)
+        if data_paths["window"].exists():
+            plot_window_tradeoff(store, data_paths["window"], width * 1.2, save_kwargs)
 
     emitted = ", ".join({fmt.lower() for fmt in args.formats})
     print(f"Saved figures to {fig_dir.resolve()} ({emitted})")
@@ -0,0 +1,128 @@
+"""Regenerate the published experiment data in a single process.
+
+Each experiment's settings come straight from ``scripts/experiment_config.py``
+(``EXPERIMENT_1_P_LOSS``, ``EXPERIMENT_2_P_REORDER``,
+``EXPERIMENT_3_WINDOW_SIZE``), and only the requested sweeps are computed.
+They are planned together, so an experiment that several sweeps need runs
+once, and share one worker pool, result cache and checkpoint journal;
+``--resume`` picks up an interrupted regeneration.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+for path in (ROOT, ROOT / "scripts"):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+from experiment_config import (
+    DEFAULT_WINDOW_SIZE,
+    EXPERIMENT_1_P_LOSS,
+    EXPERIMENT_2_P_REORDER,
+    EXPERIMENT_3_WINDOW_SIZE,
+)
+from run_sweeps import _collect, _plan_p_loss, _plan_p_reorder, _plan_window, _run_plan, _write_json
+from sim.cache import ResultCache
+from sim.commands import DEFAULT_COMMANDS
+from sim.experiment import make_worker_pool
+from sim.journal import SweepJournal
+from sim.planner import SweepPlanner
+from sim.types import AttackMode, Mode, SimulationConfig
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Regenerate experiment data from scripts/experiment_config.py")
+    parser.add_argument("--experiments", type=int, nargs="+", choices=[1, 2, 3], default=[1, 2, 3],
+                        help="Experiments to regenerate (1: p_loss, 2: p_reorder, 3: window size)")
+    parser.add_argument("--jobs", type=int, default=1, help="Worker processes shared by all experiments")
+    parser.add_argument("--journal", type=str, default="results/pipeline_journal.jsonl",
+                        help="Append-only checkpoint of finished sweep experiments")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the points already recorded in --journal by an interrupted run")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard the checkpoints in --journal and start over")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always simulate instead of reusing cached results from results/.cache")
+    return parser.parse_args()
+
+
+def _base_config(settings: dict) -> SimulationConfig:
+    return SimulationConfig(
+        mode=Mode.NO_DEFENSE,
+        attack_mode=AttackMode(settings["attack_mode"]),
+        num_legit=settings["num_legit"],
+        num_replay=settings["num_replay"],
+        window_size=settings.get("window_size", DEFAULT_WINDOW_SIZE),
+        command_set=DEFAULT_COMMANDS,
+        rng_seed=settings["seed"],
+        shared_key="sim_shared_key",
+        attacker_record_loss=settings["attacker_loss"],
+    )
+
+
+def _modes(settings: dict) -> List[Mode]:
+    return [Mode(token) for token in settings.get("defense_modes", [mode.value for mode in Mode])]
+
+
+def _experiment_1(planner: SweepPlanner, settings: dict) -> list:
+    return _plan_p_loss(planner, _base_config(settings), _modes(settings), settings["p_loss_values"],
+                        settings["runs"], settings["seed"], fixed_p_reorder=settings["p_reorder"])
+
+
+def _experiment_2(planner: SweepPlanner, settings: dict) -> list:
+    return _plan_p_reorder(planner, _base_config(settings), _modes(settings), settings["p_reorder_values"],
+                           settings["runs"], settings["seed"], fixed_p_loss=settings["p_loss"])
+
+
+def _experiment_3(planner: SweepPlanner, settings: dict) -> list:
+    return _plan_window(planner, _base_config(settings), _modes(settings), settings["window_sizes"],
+                        settings["runs"], settings["seed"], stress_p_loss=settings["p_loss"], stress_p_reorder=settings["p_reorder"])
+
+
+EXPERIMENTS: Dict[int, tuple[dict, Callable[[SweepPlanner, dict], list]]] = {
+    1: (EXPERIMENT_1_P_LOSS, _experiment_1),
+    2: (EXPERIMENT_2_P_REORDER, _experiment_2),
+    3: (EXPERIMENT_3_WINDOW_SIZE, _experiment_3),
+}
+
+
+def main() -> None:
+    args = parse_args()
+    if args.jobs < 1:
+        raise SystemExit(f"Invalid jobs: {args.jobs}. Must be positive integer")
+
+    try:
+        journal = SweepJournal(args.journal, resume=args.resume, fresh=args.fresh)
+    except ValueError as exc:
+        raise SystemExit(f"{exc} (pass --resume or --fresh)") from exc
+    if args.resume and journal.entries:
+        print(f"Resuming: {len(journal.entries)} finished experiments in {args.journal}")
+    # Plan every selected experiment first so shared experiments run only once
+    planner = SweepPlanner()
+    requests = [
+        (settings, plan(planner, settings))
+        for settings, plan in (EXPERIMENTS[experiment_id] for experiment_id in dict.fromkeys(args.experiments))
+    ]
+
+    executor = make_worker_pool(args.jobs) if args.jobs > 1 else None
+    try:
+        _run_plan(planner, cache=None if args.no_cache else ResultCache(), journal=journal,
+                  jobs=args.jobs, executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    for settings, planned in requests:
+        records = _collect(planner, planned)
+        _write_json(Path(settings["output_file"]), records)
+        print(f"Saved {len(records)} records ({settings['name']}): {settings['output_file']}")
+
+    journal.remove()
+
+
+if __name__ == "__main__":
+    main()
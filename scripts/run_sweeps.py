@@ -4,16 +4,21 @@ from __future__ import annotations
 import argparse
 import dataclasses
 import json
+from concurrent.futures import Executor
 from pathlib import Path
-from typing import Iterable, List
+from typing import Iterable, List, NamedTuple
 import sys
 
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from sim.cache import ResultCache
 from sim.commands import DEFAULT_COMMANDS, load_command_sequence
-from sim.experiment import run_many_experiments
+from sim.experiment import make_worker_pool
+from sim.grid import GRID_AXES, parse_axis, run_grid, save_grid
+from sim.journal import SweepJournal
+from sim.planner import PlannedExperiment, SweepPlanner
 from sim.types import AttackMode, Mode, SimulationConfig
 
 
@@ -55,6 +60,23 @@ def parse_args() -> argparse.Namespace:
                         help="Where to write the window sweep JSON")
     parser.add_argument("--commands-file", type=str, help="Optional command trace used for all sweeps")
     parser.add_argument("--seed", type=int, help="Global RNG seed for reproducibility")
+    parser.add_argument("--coupled", action="store_true",
+                        help="Evaluate all p_loss (and all p_reorder) values in one pass with common random numbers")
+    parser.add_argument("--grid", action="append", metavar="AXIS=V1,V2,...",
+                        help="Run an N-dimensional grid sweep instead of the three 1-D sweeps; repeat once per axis "
+                             f"({', '.join(GRID_AXES)})")
+    parser.add_argument("--grid-output", type=str, default="results/grid_sweep.npz",
+                        help="Output .npz tensor for --grid")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes shared by all sweep points")
+    parser.add_argument("--journal", type=str, default="results/sweep_journal.jsonl",
+                        help="Append-only checkpoint of finished sweep experiments")
+    parser.add_argument("--resume", action="store_true",
+                        help="Skip the points already recorded in --journal by an interrupted sweep")
+    parser.add_argument("--fresh", action="store_true",
+                        help="Discard the checkpoints in --journal and start over")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Always simulate instead of reusing cached results from results/.cache")
     return parser.parse_args()
 
 
@@ -84,22 +106,71 @@ def main() -> None:
     )
 
     requested_modes = _parse_modes(args.modes)
+    cache = None if args.no_cache else ResultCache()
+    if args.grid:
+        _run_grid_sweep(args, base_config, requested_modes, cache)
+        return
+    try:
+        journal = SweepJournal(args.journal, resume=args.resume, fresh=args.fresh)
+    except ValueError as exc:
+        raise SystemExit(f"{exc} (pass --resume or --fresh)") from exc
+    if args.resume and journal.entries:
+        print(f"Resuming: {len(journal.entries)} finished experiments in {args.journal}")
 
     # Apply fixed parameters for each sweep
     fixed_p_reorder_for_loss = args.fixed_p_reorder if args.fixed_p_reorder is not None else 0.0
     fixed_p_loss_for_reorder = args.fixed_p_loss if args.fixed_p_loss is not None else 0.10
 
-    p_loss_records = _sweep_p_loss(base_config, requested_modes, args.p_loss_values, args.runs, args.seed, fixed_p_reorder_for_loss)
-    p_reorder_records = _sweep_p_reorder(base_config, requested_modes, args.p_reorder_values, args.runs, args.seed, fixed_p_loss_for_reorder)
-    window_records = _sweep_window(base_config, requested_modes, args.window_values, args.runs, args.seed, args.window_p_loss, args.window_p_reorder)
+    # Plan all three sweeps first so shared experiments run only once
+    planner = SweepPlanner()
+    p_loss_requests = _plan_p_loss(planner, base_config, requested_modes, args.p_loss_values, args.runs, args.seed,
+                                   fixed_p_reorder_for_loss, coupled=args.coupled)
+    p_reorder_requests = _plan_p_reorder(planner, base_config, requested_modes, args.p_reorder_values, args.runs, args.seed,
+                                         fixed_p_loss_for_reorder, coupled=args.coupled)
+    window_requests = _plan_window(planner, base_config, requested_modes, args.window_values, args.runs, args.seed,
+                                   args.window_p_loss, args.window_p_reorder)
 
-    _write_json(Path(args.p_loss_output), p_loss_records)
-    _write_json(Path(args.p_reorder_output), p_reorder_records)
-    _write_json(Path(args.window_output), window_records)
+    # One worker pool for every planned experiment instead of one per experiment
+    executor = make_worker_pool(args.jobs) if args.jobs > 1 else None
+    try:
+        _run_plan(planner, cache=cache, journal=journal, jobs=args.jobs, executor=executor)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    _write_json(Path(args.p_loss_output), _collect(planner, p_loss_requests))
+    _write_json(Path(args.p_reorder_output), _collect(planner, p_reorder_requests))
+    _write_json(Path(args.window_output), _collect(planner, window_requests))
 
     print(f"Saved p_loss sweep: {args.p_loss_output}")
     print(f"Saved p_reorder sweep: {args.p_reorder_output}")
     print(f"Saved window sweep: {args.window_output}")
+    journal.remove()
+
+
+def _run_grid_sweep(args: argparse.Namespace, base_config: SimulationConfig, modes: List[Mode],
+                    cache: ResultCache | None) -> None:
+    """
+    Evaluate the Cartesian product of the --grid axes and save it as an .npz tensor.
+
+    Parameters without an axis keep the base configuration (--fixed-p-loss and
+    --fixed-p-reorder set the channel, default 0).
+    """
+    try:
+        axes = dict(parse_axis(spec) for spec in args.grid)
+    except ValueError as exc:
+        raise SystemExit(str(exc)) from exc
+    if len(axes) != len(args.grid):
+        raise SystemExit("Each --grid axis may only be given once")
+
+    config = dataclasses.replace(base_config, p_loss=args.fixed_p_loss or 0.0, p_reorder=args.fixed_p_reorder or 0.0)
+    grid = run_grid(config, modes, axes, args.runs, seed=args.seed, jobs=args.jobs, cache=cache)
+    attrs = {"runs": args.runs, "num_replay": args.num_replay, "attack_mode": args.attack_mode}
+    if args.seed is not None:
+        attrs["seed"] = args.seed
+    save_grid(args.grid_output, grid, **attrs)
+    shape = " x ".join(f"{dim}={len(grid.coords[dim])}" for dim in grid.dims)
+    print(f"Saved grid sweep ({shape}): {args.grid_output}")
 
 
 def _parse_modes(raw_modes: List[str]) -> List[Mode]:
@@ -113,56 +184,97 @@ def _parse_modes(raw_modes: List[str]) -> List[Mode]:
     return modes
 
 
-def _sweep_p_loss(
+class _Request(NamedTuple):
+    """One output record: which planned experiment and record it comes from."""
+
+    key: str
+    match: dict
+    sweep_type: str
+    sweep_value: float
+
+
+def _plan_p_loss(
+    planner: SweepPlanner,
     base_config: SimulationConfig,
     modes: List[Mode],
     p_loss_values: Iterable[float],
     runs: int,
     seed: int | None,
     fixed_p_reorder: float = 0.0,
-) -> List[dict]:
+    coupled: bool = False,
+) -> List[_Request]:
     """
     Sweep packet loss rate while keeping reordering fixed.
     
     Default: p_reorder=0.0 to isolate packet loss effect.
     """
-    records: List[dict] = []
+    if coupled:
+        grid = [(value, fixed_p_reorder) for value in p_loss_values]
+        return _plan_coupled(planner, base_config, modes, grid, runs, seed, "p_loss")
+
+    requests: List[_Request] = []
     for value in p_loss_values:
         config = dataclasses.replace(base_config, p_loss=value, p_reorder=fixed_p_reorder)
-        stats = run_many_experiments(config, modes=modes, runs=runs, seed=seed)
-        for entry in stats:
-            record = entry.as_dict()
-            record.update({"sweep_type": "p_loss", "sweep_value": value})
-            records.append(record)
-    return records
+        for mode in modes:
+            requests.append(_Request(planner.add(mode, config, runs, seed), {}, "p_loss", value))
+    return requests
 
 
-def _sweep_p_reorder(
+def _plan_p_reorder(
+    planner: SweepPlanner,
     base_config: SimulationConfig,
     modes: List[Mode],
     p_reorder_values: Iterable[float],
     runs: int,
     seed: int | None,
     fixed_p_loss: float = 0.10,
-) -> List[dict]:
+    coupled: bool = False,
+) -> List[_Request]:
     """
     Sweep packet reordering rate while keeping loss fixed.
     
     Default: p_loss=0.10 (typical IoT environment) to isolate reordering effect
     following single-variable control principle.
     """
-    records: List[dict] = []
+    if coupled:
+        grid = [(fixed_p_loss, value) for value in p_reorder_values]
+        return _plan_coupled(planner, base_config, modes, grid, runs, seed, "p_reorder")
+
+    requests: List[_Request] = []
     for value in p_reorder_values:
         config = dataclasses.replace(base_config, p_reorder=value, p_loss=fixed_p_loss)
-        stats = run_many_experiments(config, modes=modes, runs=runs, seed=seed)
-        for entry in stats:
-            record = entry.as_dict()
-            record.update({"sweep_type": "p_reorder", "sweep_value": value})
-            records.append(record)
-    return records
+        for mode in modes:
+            requests.append(_Request(planner.add(mode, config, runs, seed), {}, "p_reorder", value))
+    return requests
 
 
-def _sweep_window(
+def _plan_coupled(
+    planner: SweepPlanner,
+    base_config: SimulationConfig,
+    modes: List[Mode],
+    grid: List[tuple],
+    runs: int,
+    seed: int | None,
+    sweep_type: str,
+) -> List[_Request]:
+    """
+    Evaluate every (p_loss, p_reorder) grid point in one coupled pass per run.
+
+    All points share their loss and reorder draws (common random numbers), so
+    the curves are monotone in the swept value rather than independently noisy.
+    Each mode's whole grid is one planned experiment.
+    """
+    keys = {mode: planner.add(mode, base_config, runs, seed, channel_grid=grid) for mode in modes}
+    requests: List[_Request] = []
+    for p_loss, p_reorder in grid:
+        for mode in modes:
+            match = {"p_loss": p_loss, "p_reorder": p_reorder}
+            requests.append(_Request(keys[mode], match, sweep_type, match[sweep_type]))
+    return requests
+
+
+def _plan_window(
+    planner: SweepPlanner,
     base_config: SimulationConfig,
     modes: List[Mode],
     window_values: Iterable[int],
@@ -170,28 +282,66 @@ def _sweep_window(
     seed: int | None,
     stress_p_loss: float = 0.15,
     stress_p_reorder: float = 0.15,
-) -> List[dict]:
+) -> List[_Request]:
     """
     Sweep window size under moderate network stress.
     
     Default: p_loss=0.15, p_reorder=0.15 creates realistic challenging conditions
     where the tradeoff between security and usability is most observable.
+
+    All window sizes are evaluated from one simulated arrival stream per run
+    (window fan-out), and modes that ignore the window run once; the records
+    are identical to simulating every window value separately.
     """
-    records: List[dict] = []
-    
+    window_values = list(window_values)
+    config = dataclasses.replace(base_config, p_loss=stress_p_loss, p_reorder=stress_p_reorder)
+    keys = {
+        mode: (planner.add(mode, config, runs, seed, window_sizes=window_values) if mode is Mode.WINDOW
+               else planner.add(mode, config, runs, seed))
+        for mode in modes
+    }
+    requests: List[_Request] = []
     for value in window_values:
-        config = dataclasses.replace(
-            base_config, 
-            window_size=value,
-            p_loss=stress_p_loss,
-            p_reorder=stress_p_reorder
-        )
-        stats = run_many_experiments(config, modes=modes, runs=runs, seed=seed)
-        for entry in stats:
-            record = entry.as_dict()
-            record.update({"sweep_type": "window", "sweep_value": value})
-            records.append(record)
-    return records
+        for mode in modes:
+            # Records carry window_size 0 for modes that ignore the window
+            match = {"window_size": value} if mode is Mode.WINDOW else {}
+            requests.append(_Request(keys[mode], match, "window", value))
+    return requests
+
+
+def _run_plan(
+    planner: SweepPlanner,
+    cache: ResultCache | None = None,
+    journal: SweepJournal | None = None,
+    jobs: int = 1,
+    executor: Executor | None = None,
+) -> None:
+    """
+    Run every distinct planned experiment once, checkpointing each to the journal.
+
+    Modes draw their scenario seeds independently, so running them one at a
+    time gives the same numbers as running them together.
+    """
+    print(f"Planned {planner.requests} sweep experiments; {len(planner.experiments)} distinct ones to run")
+
+    def execute(planned: PlannedExperiment) -> List[dict]:
+        if journal is not None:
+            done = journal.get(planned.key)
+            if done is not None:
+                return done
+        records = planned.execute(cache=cache, jobs=jobs, executor=executor)
+        if journal is not None:
+            journal.record(planned.key, records)
+        return records
+
+    planner.run(execute)
+
+
+def _collect(planner: SweepPlanner, requests: List[_Request]) -> List[dict]:
+    return [
+        dict(planner.select(request.key, **request.match), sweep_type=request.sweep_type, sweep_value=request.sweep_value)
+        for request in requests
+    ]
 
 
 def _write_json(path: Path, payload: List[dict]) -> None:
@@ -0,0 +1,507 @@
+"""Expected rates for counter-based receivers, computed without sampling.
+
+For ``no_def``, ``rolling`` and ``window`` receivers a run of
+:func:`sim.experiment.simulate_one_run` is a finite-state process: i.i.d. loss,
+a reorder delay of 1 to 3 ticks, a receiver that only remembers its last
+counter (and, for the window, which counters inside the window it has seen),
+and an attacker that replays a uniformly chosen recorded frame. This module
+propagates the exact distribution over those states frame by frame and reads
+off the mean and variance of the per-run ``legit_accept_rate`` and
+``attack_success_rate``.
+
+Instead of tracking the accepted counts themselves, every state carries its
+probability plus the first two moments of the legitimate and attack accept
+counts accumulated on the way there. Frames that the receiver can no longer
+accept (counters at or below a rolling receiver's last counter, or already
+seen or behind a window) are dropped from the channel state as soon as they
+are dead, which keeps the number of states small. The post-run replays form
+a time-homogeneous chain and are propagated over a sparse state graph with
+NumPy.
+
+States whose probability falls below ``tolerance`` are discarded, so the
+results are exact up to the reported ``truncated_mass``; :func:`analyze`
+raises ``ValueError`` when that mass exceeds ``max_truncated_mass``. The
+number of states grows with ``num_legit``, ``num_replay`` and
+``2**window_size``: short runs (around ten legitimate frames and a few dozen
+replays, windows up to about 5) solve in seconds, while the defaults of
+``main.py`` (20 frames, 100 replays) already take minutes at window size 1
+and a window of 20 exceeds ``max_states``.
+
+The attacker must record every frame (``attacker_record_loss == 0``), and
+selective replay is only supported with a fixed ``command_sequence``;
+otherwise the set of replayable frames is itself random and the solver raises
+``ValueError``.
+"""
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from .types import AggregateStats, AttackMode, Mode, SimulationConfig
+
+SUPPORTED_MODES = (Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW)
+
+# Mirrors Channel.send: a reordered frame is delayed by 1 to 3 ticks
+_DELAYS = (1, 2, 3)
+
+DEFAULT_MAX_STATES = 200_000
+DEFAULT_TOLERANCE = 1e-9
+DEFAULT_MAX_TRUNCATED_MASS = 1e-4
+
+# Pending frames are (remaining ticks, counter, is_attack) in delivery order
+_Pending = Tuple[Tuple[int, int, bool], ...]
+# Per-state accumulator: [probability, E[LA], E[LA^2], E[AS], E[AS^2]] (unnormalized)
+_Moments = List[float]
+
+
+@dataclass
+class AnalyticResult:
+    """Per-run rate moments for one configuration, exact up to ``metadata["truncated_mass"]``."""
+
+    mode: Mode
+    avg_legit_rate: float
+    var_legit_rate: float
+    avg_attack_rate: float
+    var_attack_rate: float
+    metadata: Dict[str, float | int] = field(default_factory=dict)
+
+    @property
+    def std_legit_rate(self) -> float:
+        return math.sqrt(self.var_legit_rate)
+
+    @property
+    def std_attack_rate(self) -> float:
+        return math.sqrt(self.var_attack_rate)
+
+    def aggregate(self, config: SimulationConfig) -> AggregateStats:
+        # No runs are sampled; std is the per-run standard deviation and the
+        # solver's peak_states/truncated_mass travel along in the metadata
+        return AggregateStats(
+            mode=self.mode,
+            runs=0,
+            avg_legit_rate=self.avg_legit_rate,
+            std_legit_rate=self.std_legit_rate,
+            avg_attack_rate=self.avg_attack_rate,
+            std_attack_rate=self.std_attack_rate,
+            p_loss=config.p_loss,
+            p_reorder=config.p_reorder,
+            window_size=config.window_size if self.mode is Mode.WINDOW else 0,
+            num_legit=config.num_legit,
+            num_replay=config.num_replay,
+            attack_mode=config.attack_mode,
+            metadata=dict(self.metadata),
+        )
+
+
+class _ReceiverModel:
+    """Receiver state transitions on hashable states.
+
+    rolling: the last accepted counter. window: ``(last, mask)`` where bit k of
+    ``mask`` marks counter ``last - k`` as seen (``last`` itself always is).
+    no_def: ``None``.
+    """
+
+    def __init__(self, mode: Mode, window_size: int):
+        self.mode = mode
+        self.window_size = window_size
+        self.mask_bits = ((1 << window_size) - 1) & ~1
+
+    def initial(self):
+        if self.mode is Mode.ROLLING_MAC:
+            return -1
+        if self.mode is Mode.WINDOW:
+            return (-1, 0)
+        return None
+
+    def canonical(self, counter: int) -> int:
+        # Every frame is accepted without a defense, so counters are irrelevant
+        return 0 if self.mode is Mode.NO_DEFENSE else counter
+
+    def dead(self, counter: int, state) -> bool:
+        """True if ``counter`` can never be accepted from ``state`` onwards."""
+        if self.mode is Mode.ROLLING_MAC:
+            return counter <= state
+        if self.mode is Mode.WINDOW:
+            last, mask = state
+            if last < 0 or counter > last:
+                return False
+            offset = last - counter
+            return offset >= self.window_size or offset == 0 or bool(mask >> offset & 1)
+        return False
+
+    def accept(self, counter: int, state):
+        """Return ``(accepted, new_state)`` for one arriving frame."""
+        if self.mode is Mode.ROLLING_MAC:
+            if counter > state:
+                return True, counter
+            return False, state
+        if self.mode is Mode.WINDOW:
+            last, mask = state
+            if last < 0:
+                return True, (counter, 0)
+            diff = counter - last
+            if diff > 0:
+                if diff > self.window_size:
+                    return False, state
+                return True, (counter, ((mask << diff) | (1 << diff)) & self.mask_bits)
+            if self.dead(counter, state):
+                return False, state
+            return True, (last, mask | (1 << -diff))
+        return True, state
+
+
+def _add_reward(moments: _Moments, legit: int, attack: int) -> None:
+    p, la1, la2, as1, as2 = moments
+    moments[2] = la2 + 2 * legit * la1 + legit * legit * p
+    moments[1] = la1 + legit * p
+    moments[4] = as2 + 2 * attack * as1 + attack * attack * p
+    moments[3] = as1 + attack * p
+
+
+def _merge(dist: Dict[tuple, _Moments], key: tuple, moments: _Moments, weight: float) -> None:
+    current = dist.get(key)
+    if current is None:
+        dist[key] = [value * weight for value in moments]
+    else:
+        for index, value in enumerate(moments):
+            current[index] += value * weight
+
+
+class _Solver:
+    def __init__(self, config: SimulationConfig, max_states: int, tolerance: float):
+        self.config = config
+        self.max_states = max_states
+        self.tolerance = tolerance
+        self.truncated_mass = 0.0
+        self.receiver = _ReceiverModel(config.mode, config.window_size or 1)
+        self.replayable = _replayable_counters(config)
+
+        p_loss = min(max(config.p_loss, 0.0), 1.0)
+        p_reorder = min(max(config.p_reorder, 0.0), 1.0)
+        # (probability, delay); delay None means lost
+        outcomes = [(p_loss, None), ((1 - p_loss) * (1 - p_reorder), 0)]
+        outcomes += [((1 - p_loss) * p_reorder / len(_DELAYS), delay) for delay in _DELAYS]
+        self.outcomes = [(prob, delay) for prob, delay in outcomes if prob > 0]
+        self.peak_states = 0
+
+        # Transitions depend only on the channel and receiver state, which
+        # recur from one transmission to the next, so each is computed once
+        self._kernels: Dict[tuple, tuple] = {}
+        self._choices: Dict[tuple, tuple] = {}
+
+    # Distribution keys are (pending, receiver_state, attack_attempts)
+
+    def _deliver(self, frames: list, recv, due: float):
+        """Deliver frames with remaining <= ``due`` in order; prune dead frames."""
+        legit = attack = 0
+        kept = []
+        accept = self.receiver.accept
+        for frame in frames:
+            if frame[0] <= due:
+                accepted, recv = accept(frame[1], recv)
+                if accepted:
+                    if frame[2]:
+                        attack += 1
+                    else:
+                        legit += 1
+            else:
+                kept.append(frame)
+        if kept:
+            dead = self.receiver.dead
+            kept = [frame for frame in kept if not dead(frame[1], recv)]
+        return tuple(kept), recv, legit, attack
+
+    def _kernel(self, pending: _Pending, recv, picks_key, picks) -> tuple:
+        """Outcomes of one channel tick carrying a frame drawn from ``picks``.
+
+        ``picks`` lists ``(frame, weight)`` with ``frame`` ``(counter, is_attack)``
+        or None for a frame that can never be accepted. Returns merged
+        ``(probability, pending, receiver_state, legit, attack)`` tuples, where
+        ``legit``/``attack`` count the frames accepted during the tick.
+        """
+        cache_key = (pending, recv, picks_key)
+        kernel = self._kernels.get(cache_key)
+        if kernel is None:
+            aged = [(remaining - 1, counter, is_attack) for remaining, counter, is_attack in pending]
+            merged: Dict[tuple, float] = {}
+            for frame, weight in picks:
+                for prob, delay in self.outcomes if frame is not None else [(1.0, None)]:
+                    frames = list(aged)
+                    if delay is not None:
+                        frames.append((delay, *frame))
+                        # Stable sort keeps send order among frames due on the same tick
+                        frames.sort(key=lambda item: item[0])
+                    outcome = self._deliver(frames, recv, 0)
+                    merged[outcome] = merged.get(outcome, 0.0) + weight * prob
+            kernel = self._kernels[cache_key] = tuple((prob, *outcome) for outcome, prob in merged.items())
+        return kernel
+
+    @staticmethod
+    def _apply(out, moments: _Moments, kernel: tuple, attempts: int) -> None:
+        p, la1, la2, as1, as2 = moments
+        for w, next_pending, next_recv, legit, attack in kernel:
+            # Scale the moments by the branch weight, then shift LA/AS by the rewards
+            wp, wla1, was1 = p * w, la1 * w, as1 * w
+            update = (
+                wp,
+                wla1 + legit * wp,
+                la2 * w + 2 * legit * wla1 + legit * legit * wp,
+                was1 + attack * wp,
+                as2 * w + 2 * attack * was1 + attack * attack * wp,
+            )
+            next_key = (next_pending, next_recv, attempts)
+            current = out.get(next_key)
+            if current is None:
+                out[next_key] = list(update)
+            else:
+                for index in range(5):
+                    current[index] += update[index]
+
+    def _replay_choices(self, recv, candidates: Tuple[int, ...]) -> tuple:
+        """Split a uniform pick over ``candidates`` into ``(frame, weight)`` picks.
+
+        Dead counters are pooled into a single ``None`` pick. Candidate lists are
+        always prefixes of the replayable counters, so their length identifies them.
+        """
+        cache_key = (recv, len(candidates))
+        choices = self._choices.get(cache_key)
+        if choices is None:
+            share = 1.0 / len(candidates)
+            live: Dict[int, float] = {}
+            dead = 0.0
+            for counter in candidates:
+                if self.receiver.dead(counter, recv):
+                    dead += share
+                else:
+                    canonical = self.receiver.canonical(counter)
+                    live[canonical] = live.get(canonical, 0.0) + share
+            picks = [((counter, True), weight) for counter, weight in live.items()]
+            if dead > 0:
+                picks.append((None, dead))
+            choices = self._choices[cache_key] = (bool(live), tuple(picks))
+        return choices
+
+    def send_legit(self, dist, counter: int):
+        out: Dict[tuple, _Moments] = {}
+        picks = (((self.receiver.canonical(counter), False), 1.0),)
+        for (pending, recv, attempts), moments in dist.items():
+            self._apply(out, moments, self._kernel(pending, recv, ("legit", counter), picks), attempts)
+        return out
+
+    def send_replay(self, dist, candidates: Tuple[int, ...]):
+        """Attacker replays a uniformly chosen candidate counter."""
+        out: Dict[tuple, _Moments] = {}
+        picks_key = ("replay", len(candidates))
+        for (pending, recv, attempts), moments in dist.items():
+            _, picks = self._replay_choices(recv, candidates)
+            self._apply(out, moments, self._kernel(pending, recv, picks_key, picks), attempts + 1)
+        return out
+
+    def _inline_burst(self, dist, candidates: Tuple[int, ...], attack_prob: float):
+        """Up to ``inline_attack_burst`` replays, each attempted with ``attack_prob``."""
+        finished: Dict[tuple, _Moments] = {}
+        active = dist
+        for _ in range(max(1, self.config.inline_attack_burst)):
+            if not candidates or attack_prob <= 0:
+                break
+            # Runs that stop here keep their state; the rest replay one frame
+            if attack_prob < 1:
+                for key, moments in active.items():
+                    _merge(finished, key, moments, 1 - attack_prob)
+                active = {key: [value * attack_prob for value in moments] for key, moments in active.items()}
+            active = self.send_replay(active, candidates)
+            self.check(active)
+        for key, moments in active.items():
+            _merge(finished, key, moments, 1.0)
+        return finished
+
+    def _post_run(self, dist, candidates: Tuple[int, ...]):
+        """All post-run replays, propagated as one time-homogeneous chain.
+
+        Every replay applies the same transition kernel, so each state's edges
+        are built once (when it first carries probability) and the moments are
+        pushed through the whole sparse graph with NumPy per replay.
+        """
+        picks_key = ("replay", len(candidates))
+        index: Dict[tuple, int] = {}
+        states: List[tuple] = []
+
+        def state_id(core: tuple) -> int:
+            sid = index.get(core)
+            if sid is None:
+                sid = index[core] = len(states)
+                states.append(core)
+            return sid
+
+        # Without inline attacks every run enters this phase with the same attempts
+        attempts = 0
+        for pending, recv, attempts in dist:
+            state_id((pending, recv))
+        moments = np.zeros((5, len(states)))
+        for (pending, recv, _), values in dist.items():
+            moments[:, index[(pending, recv)]] = values
+
+        # Edges are stored per expanded state: edge_start/edge_count index into
+        # the flat edge arrays, so each replay only touches states with mass
+        edge_start = np.zeros(0, dtype=np.int64)
+        edge_count = np.zeros(0, dtype=np.int64)
+        edge_dst = np.zeros(0, dtype=np.int64)
+        edge_values = np.zeros((3, 0))  # weight, legit, attack
+        for _ in range(self.config.num_replay):
+            grow = len(states) - edge_count.size
+            edge_start = np.concatenate([edge_start, np.zeros(grow, dtype=np.int64)])
+            edge_count = np.concatenate([edge_count, np.full(grow, -1, dtype=np.int64)])
+            active = np.flatnonzero(moments[0] > 0)
+            fresh = active[edge_count[active] < 0]
+            if fresh.size:
+                dst_rows: List[int] = []
+                value_rows: List[tuple] = []
+                offset = edge_dst.size
+                for sid in fresh.tolist():
+                    pending, recv = states[sid]
+                    _, picks = self._replay_choices(recv, candidates)
+                    kernel = self._kernel(pending, recv, picks_key, picks)
+                    edge_start[sid] = offset + len(dst_rows)
+                    edge_count[sid] = len(kernel)
+                    for w, next_pending, next_recv, legit, attack in kernel:
+                        dst_rows.append(state_id((next_pending, next_recv)))
+                        value_rows.append((w, legit, attack))
+                edge_dst = np.concatenate([edge_dst, np.array(dst_rows, dtype=np.int64)])
+                edge_values = np.concatenate([edge_values, np.array(value_rows, dtype=np.float64).T], axis=1)
+
+            counts = edge_count[active]
+            firsts = np.repeat(edge_start[active] - np.cumsum(counts) + counts, counts)
+            selected = firsts + np.arange(int(counts.sum()))
+            src = np.repeat(active, counts)
+            dst = edge_dst[selected]
+            w, legit, attack = edge_values[:, selected]
+            p, la1, la2, as1, as2 = moments[:, src]
+            size = len(states)
+            moments = np.stack([
+                np.bincount(dst, w * p, minlength=size),
+                np.bincount(dst, w * (la1 + legit * p), minlength=size),
+                np.bincount(dst, w * (la2 + 2 * legit * la1 + legit * legit * p), minlength=size),
+                np.bincount(dst, w * (as1 + attack * p), minlength=size),
+                np.bincount(dst, w * (as2 + 2 * attack * as1 + attack * attack * p), minlength=size),
+            ])
+
+            negligible = (moments[0] > 0) & (moments[0] < self.tolerance)
+            if negligible.any():
+                self.truncated_mass += float(moments[0, negligible].sum())
+                moments[:, negligible] = 0.0
+            self._track_size(int(np.count_nonzero(moments[0])))
+
+        final_attempts = attempts + self.config.num_replay
+        return {
+            (*states[sid], final_attempts): moments[:, sid].tolist()
+            for sid in np.flatnonzero(moments[0]).tolist()
+        }
+
+    def flush(self, dist):
+        out: Dict[tuple, _Moments] = {}
+        for (pending, recv, attempts), moments in dist.items():
+            _, new_recv, legit, attack = self._deliver(list(pending), recv, math.inf)
+            moments = list(moments)
+            _add_reward(moments, legit, attack)
+            _merge(out, ((), new_recv, attempts), moments, 1.0)
+        return out
+
+    def check(self, dist) -> None:
+        if self.tolerance > 0:
+            negligible = [key for key, moments in dist.items() if moments[0] < self.tolerance]
+            for key in negligible:
+                self.truncated_mass += dist.pop(key)[0]
+        self._track_size(len(dist))
+
+    def _track_size(self, count: int) -> None:
+        self.peak_states = max(self.peak_states, count)
+        if count > self.max_states:
+            raise ValueError(
+                f"Analytic state space exceeded {self.max_states} states; "
+                "use the Monte Carlo engine or raise max_states"
+            )
+
+    def run(self) -> Dict[tuple, _Moments]:
+        config = self.config
+        dist: Dict[tuple, _Moments] = {((), self.receiver.initial(), 0): [1.0, 0.0, 0.0, 0.0, 0.0]}
+        attack_prob = min(max(config.inline_attack_probability, 0.0), 1.0)
+
+        for i in range(config.num_legit):
+            dist = self.send_legit(dist, i + 1)
+            self.check(dist)
+
+            if config.attack_mode is AttackMode.INLINE:
+                candidates = tuple(c for c in self.replayable if c <= i + 1)
+                dist = self._inline_burst(dist, candidates, attack_prob)
+
+        if config.attack_mode is AttackMode.POST_RUN and self.replayable:
+            dist = self._post_run(dist, tuple(self.replayable))
+
+        return self.flush(dist)
+
+
+def _replayable_counters(config: SimulationConfig) -> List[int]:
+    counters = list(range(1, config.num_legit + 1))
+    if not config.target_commands:
+        return counters
+    targets = set(config.target_commands)
+    if config.command_sequence:
+        sequence = config.command_sequence
+        return [c for c in counters if sequence[(c - 1) % len(sequence)] in targets]
+    if targets.issuperset(config.effective_command_set()):
+        return counters
+    raise ValueError("Selective replay over random commands is not supported analytically; pass a command_sequence")
+
+
+def analyze(
+    config: SimulationConfig,
+    max_states: int = DEFAULT_MAX_STATES,
+    tolerance: float = DEFAULT_TOLERANCE,
+    max_truncated_mass: float = DEFAULT_MAX_TRUNCATED_MASS,
+) -> AnalyticResult:
+    """Compute rate means and variances for ``config`` without sampling.
+
+    States whose probability drops below ``tolerance`` are discarded (pass 0
+    to keep everything); their total probability is reported as
+    ``metadata["truncated_mass"]`` and bounds the error of both means. If it
+    exceeds ``max_truncated_mass`` the result is not trustworthy and
+    ``ValueError`` is raised.
+    """
+
+    if config.mode not in SUPPORTED_MODES:
+        valid = ", ".join(mode.value for mode in SUPPORTED_MODES)
+        raise ValueError(f"Analytic solver does not support mode '{config.mode.value}'. Supported: {valid}")
+    if config.attacker_record_loss > 0:
+        raise ValueError("Analytic solver requires attacker_record_loss == 0")
+    if not config.command_sequence and not config.effective_command_set():
+        raise ValueError("Command set is empty")
+
+    solver = _Solver(config, max_states, tolerance)
+    final = solver.run()
+    if solver.truncated_mass > max_truncated_mass:
+        raise ValueError(
+            f"Analytic solver discarded probability mass {solver.truncated_mass:.3g} "
+            f"(limit {max_truncated_mass:g}); lower the tolerance or use the Monte Carlo engine"
+        )
+
+    legit_sent = config.num_legit
+    legit_mean = legit_sq = attack_mean = attack_sq = 0.0
+    for (_, _, attempts), (_, la1, la2, as1, as2) in final.items():
+        if legit_sent:
+            legit_mean += la1 / legit_sent
+            legit_sq += la2 / (legit_sent * legit_sent)
+        if attempts:
+            attack_mean += as1 / attempts
+            attack_sq += as2 / (attempts * attempts)
+
+    return AnalyticResult(
+        mode=config.mode,
+        avg_legit_rate=legit_mean,
+        var_legit_rate=max(0.0, legit_sq - legit_mean * legit_mean),
+        avg_attack_rate=attack_mean,
+        var_attack_rate=max(0.0, attack_sq - attack_mean * attack_mean),
+        metadata={"peak_states": solver.peak_states, "truncated_mass": solver.truncated_mass},
+    )
@@ -2,16 +2,22 @@
 from __future__ import annotations
 
 import random
-from typing import List, Optional, Sequence
+from typing import TYPE_CHECKING, List, Optional, Sequence
 
 from .types import Frame
 
+if TYPE_CHECKING:
+    from .framebatch import FrameBatch
+
 
 class Attacker:
     def __init__(self, record_loss: float = 0.0, target_commands: Optional[Sequence[str]] = None):
         self.record_loss = record_loss
         self.target_commands = set(target_commands) if target_commands else None
         self._recorded: List[Frame] = []
+        # Batch recordings: rows of one observed FrameBatch
+        self._batch: Optional["FrameBatch"] = None
+        self._batch_rows: List[int] = []
 
     def observe(self, frame: Frame, rng: random.Random) -> None:
         if self.record_loss > 0 and rng.random() < self.record_loss:
@@ -35,5 +41,40 @@ class Attacker:
         template = rng.choice(candidates)
         return template.clone()
 
+    def observe_batch(self, batch: "FrameBatch", rng: random.Random) -> None:
+        """Record the rows of ``batch`` that ``observe`` would record, frame by frame.
+
+        Recorded rows are kept as indices into ``batch``; observing a
+        different batch starts a new recording.
+        """
+
+        if batch is not self._batch:
+            self._batch = batch
+            self._batch_rows = []
+        if self.record_loss > 0:
+            self._batch_rows.extend(row for row in range(len(batch)) if not rng.random() < self.record_loss)
+        else:
+            self._batch_rows.extend(range(len(batch)))
+
+    def pick_batch(self, rng: random.Random, count: int) -> Optional["FrameBatch"]:
+        """Replay ``count`` recorded batch rows, drawn like ``count`` calls to ``pick_frame``.
+
+        The result is a batch of attack-tagged rows of the observed batch, or
+        ``None`` when nothing suitable was recorded.
+        """
+
+        batch, candidates = self._batch, self._batch_rows
+        if batch is None or not candidates:
+            return None
+        if self.target_commands:
+            targets = {index for index, command in enumerate(batch.commands) if command in self.target_commands}
+            command_ids = batch.command.tolist()
+            candidates = [row for row in candidates if command_ids[row] in targets]
+            if not candidates:
+                return None
+        return batch.take([rng.choice(candidates) for _ in range(count)], is_attack=True)
+
     def clear(self) -> None:
         self._recorded.clear()
+        self._batch = None
+        self._batch_rows = []
@@ -0,0 +1,240 @@
+"""NumPy engine that simulates many Monte Carlo runs in lockstep.
+
+Every run is one row of a set of arrays, and the per-frame work (loss and
+reorder draws, receiver checks, attacker picks) is done for all rows at once.
+The engine mirrors the semantics of :func:`sim.experiment.simulate_one_run`
+for the counter-based modes, but draws from a NumPy generator, so individual
+runs are statistically equivalent rather than bit-identical to the scalar
+engine.
+
+Because replayed frames are always genuine recordings, their MACs verify;
+the receivers therefore only need the counters, and MACs are not computed.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from .types import AggregateStats, AttackMode, Mode, SimulationConfig
+
+SUPPORTED_MODES = (Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW)
+
+# Delays are at most 3 ticks, so a frame sent at tick t is delivered by t + 3
+# and a ring of four send slots per run holds everything still in flight.
+_MAX_DELAY = 3
+_RING = _MAX_DELAY + 1
+
+
+@dataclass
+class BatchRunResult:
+    """Per-run counters for a whole batch, one array element per run."""
+
+    mode: Mode
+    legit_sent: np.ndarray
+    legit_accepted: np.ndarray
+    attack_attempts: np.ndarray
+    attack_success: np.ndarray
+
+    @property
+    def runs(self) -> int:
+        return int(self.legit_sent.shape[0])
+
+    @property
+    def legit_accept_rate(self) -> np.ndarray:
+        return _safe_div(self.legit_accepted, self.legit_sent)
+
+    @property
+    def attack_success_rate(self) -> np.ndarray:
+        return _safe_div(self.attack_success, self.attack_attempts)
+
+    def aggregate(self, config: SimulationConfig) -> AggregateStats:
+        legit = self.legit_accept_rate
+        attack = self.attack_success_rate
+        return AggregateStats(
+            mode=self.mode,
+            runs=self.runs,
+            avg_legit_rate=float(legit.mean()) if self.runs else 0.0,
+            std_legit_rate=float(legit.std()) if self.runs > 1 else 0.0,
+            avg_attack_rate=float(attack.mean()) if self.runs else 0.0,
+            std_attack_rate=float(attack.std()) if self.runs > 1 else 0.0,
+            p_loss=config.p_loss,
+            p_reorder=config.p_reorder,
+            window_size=config.window_size if self.mode is Mode.WINDOW else 0,
+            num_legit=config.num_legit,
+            num_replay=config.num_replay,
+            attack_mode=config.attack_mode,
+        )
+
+
+def _safe_div(num: np.ndarray, denom: np.ndarray) -> np.ndarray:
+    out = np.zeros(num.shape, dtype=np.float64)
+    np.divide(num, denom, out=out, where=denom != 0)
+    return out
+
+
+class _BatchState:
+    """Channel, receiver and attacker state for R runs."""
+
+    def __init__(self, config: SimulationConfig, runs: int, rng: np.random.Generator):
+        self.config = config
+        self.mode = config.mode
+        self.rng = rng
+        self.window_size = config.window_size or 1
+
+        self.tick = np.zeros(runs, dtype=np.int64)
+        self.ring_deliver = np.full((runs, _RING), -1, dtype=np.int64)
+        self.ring_counter = np.zeros((runs, _RING), dtype=np.int64)
+        self.ring_attack = np.zeros((runs, _RING), dtype=bool)
+
+        self.last_counter = np.full(runs, -1, dtype=np.int64)
+        # Counters run from 1 to num_legit, so "already accepted" is a plain
+        # per-counter flag; it matches the receiver's sliding bitmap exactly.
+        self.seen = np.zeros((runs, config.num_legit + 1), dtype=bool)
+
+        self.recorded = np.zeros((runs, max(1, config.num_legit)), dtype=np.int64)
+        self.recorded_count = np.zeros(runs, dtype=np.int64)
+
+        self.legit_accepted = np.zeros(runs, dtype=np.int64)
+        self.attack_attempts = np.zeros(runs, dtype=np.int64)
+        self.attack_success = np.zeros(runs, dtype=np.int64)
+
+    def send(self, rows: np.ndarray, counters: np.ndarray, is_attack: bool) -> None:
+        if rows.size == 0:
+            return
+        config = self.config
+        tick = self.tick[rows] + 1
+        self.tick[rows] = tick
+
+        delivered = np.ones(rows.size, dtype=bool)
+        if config.p_loss > 0:
+            delivered = self.rng.random(rows.size) >= config.p_loss
+        delay = np.zeros(rows.size, dtype=np.int64)
+        if config.p_reorder > 0:
+            reordered = self.rng.random(rows.size) < config.p_reorder
+            delay = np.where(reordered, self.rng.integers(1, _MAX_DELAY + 1, rows.size), 0)
+
+        slot = tick % _RING
+        self.ring_deliver[rows, slot] = np.where(delivered, tick + delay, -1)
+        self.ring_counter[rows, slot] = counters
+        self.ring_attack[rows, slot] = is_attack
+
+        # Frames due now arrive in send order, oldest first
+        for back in range(_MAX_DELAY, -1, -1):
+            self._deliver_due(rows, (tick - back) % _RING, tick)
+
+    def flush(self) -> None:
+        rows = np.arange(self.tick.size)
+        for ahead in range(1, _MAX_DELAY + 1):
+            target = self.tick + ahead
+            for back in range(_MAX_DELAY, -1, -1):
+                self._deliver_due(rows, (self.tick - back) % _RING, target)
+
+    def _deliver_due(self, rows: np.ndarray, slot: np.ndarray, due_tick: np.ndarray) -> None:
+        due = self.ring_deliver[rows, slot] == due_tick
+        if not due.any():
+            return
+        due_rows = rows[due]
+        due_slot = slot[due]
+        counters = self.ring_counter[due_rows, due_slot]
+        attack = self.ring_attack[due_rows, due_slot]
+
+        accepted = self._verify(due_rows, counters)
+        self.legit_accepted[due_rows[accepted & ~attack]] += 1
+        self.attack_success[due_rows[accepted & attack]] += 1
+
+    def _verify(self, rows: np.ndarray, counters: np.ndarray) -> np.ndarray:
+        if self.mode is Mode.NO_DEFENSE:
+            return np.ones(rows.size, dtype=bool)
+
+        last = self.last_counter[rows]
+        if self.mode is Mode.ROLLING_MAC:
+            accepted = counters > last
+            self.last_counter[rows] = np.where(accepted, counters, last)
+            return accepted
+
+        window_size = self.window_size
+        initial = last < 0
+        diff = counters - last
+        advance = ~initial & (diff > 0) & (diff <= window_size)
+        in_window = ~initial & (diff <= 0) & (-diff < window_size)
+        fresh = in_window & ~self.seen[rows, counters]
+        accepted = initial | advance | fresh
+
+        self.seen[rows[accepted], counters[accepted]] = True
+        self.last_counter[rows] = np.where(initial | advance, counters, last)
+        return accepted
+
+    def observe(self, counter: int, targeted: np.ndarray) -> None:
+        recorded = targeted
+        if self.config.attacker_record_loss > 0:
+            recorded = recorded & (self.rng.random(recorded.size) >= self.config.attacker_record_loss)
+        rows = np.flatnonzero(recorded)
+        self.recorded[rows, self.recorded_count[rows]] = counter
+        self.recorded_count[rows] += 1
+
+    def pick(self, rows: np.ndarray) -> np.ndarray:
+        choice = (self.rng.random(rows.size) * self.recorded_count[rows]).astype(np.int64)
+        return self.recorded[rows, choice]
+
+
+def simulate_batch(
+    config: SimulationConfig,
+    runs: int,
+    rng: Optional[np.random.Generator] = None,
+) -> BatchRunResult:
+    """Simulate ``runs`` independent runs of ``config`` as one array batch."""
+
+    if config.mode not in SUPPORTED_MODES:
+        valid = ", ".join(mode.value for mode in SUPPORTED_MODES)
+        raise ValueError(f"Batched engine does not support mode '{config.mode.value}'. Supported: {valid}")
+    if runs < 0:
+        raise ValueError("runs must be >= 0")
+
+    generator = rng if rng is not None else np.random.default_rng(config.rng_seed)
+    state = _BatchState(config, runs, generator)
+    all_rows = np.arange(runs)
+
+    command_space = list(config.effective_command_set())
+    targets = set(config.target_commands) if config.target_commands else None
+    if not config.command_sequence and not command_space:
+        raise ValueError("Command set is empty")
+    target_mask = np.array([targets is None or cmd in targets for cmd in command_space], dtype=bool)
+
+    for i in range(config.num_legit):
+        if config.command_sequence:
+            command = config.command_sequence[i % len(config.command_sequence)]
+            targeted = np.full(runs, targets is None or command in targets, dtype=bool)
+        else:
+            targeted = target_mask[generator.integers(len(command_space), size=runs)]
+
+        counter = i + 1
+        state.observe(counter, targeted)
+        state.send(all_rows, np.full(runs, counter, dtype=np.int64), is_attack=False)
+
+        if config.attack_mode is AttackMode.INLINE:
+            active = all_rows
+            for _ in range(max(1, config.inline_attack_burst)):
+                active = active[generator.random(active.size) < config.inline_attack_probability]
+                active = active[state.recorded_count[active] > 0]
+                if active.size == 0:
+                    break
+                state.attack_attempts[active] += 1
+                state.send(active, state.pick(active), is_attack=True)
+
+    if config.attack_mode is AttackMode.POST_RUN:
+        attackers = np.flatnonzero(state.recorded_count > 0)
+        state.attack_attempts[attackers] += config.num_replay
+        for _ in range(config.num_replay):
+            state.send(attackers, state.pick(attackers), is_attack=True)
+
+    state.flush()
+
+    return BatchRunResult(
+        mode=config.mode,
+        legit_sent=np.full(runs, config.num_legit, dtype=np.int64),
+        legit_accepted=state.legit_accepted,
+        attack_attempts=state.attack_attempts,
+        attack_success=state.attack_success,
+    )
@@ -0,0 +1,139 @@
+"""On-disk cache of experiment aggregates.
+
+Every seeded experiment is deterministic, so its aggregates can be stored
+and returned instantly the next time the same experiment is requested.
+Entries are JSON files named by a SHA-256 over a canonical description of
+the experiment (config fields, modes, seed, run count, engine options) and
+a fingerprint of the simulator's source code, so editing any module under
+``sim/`` invalidates every entry. Unseeded experiments are never cached.
+"""
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import os
+import time
+from enum import Enum
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+
+from .stats import RunningStats
+from .types import AggregateStats
+
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / "results" / ".cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+@lru_cache(maxsize=None)
+def code_version() -> str:
+    """Fingerprint of the ``sim`` package sources."""
+
+    digest = hashlib.sha256()
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+def _canonical(value):
+    if isinstance(value, Enum):
+        return value.value
+    if dataclasses.is_dataclass(value) and not isinstance(value, type):
+        return {f.name: _canonical(getattr(value, f.name)) for f in dataclasses.fields(value)}
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    return value
+
+
+def experiment_fingerprint(**fields) -> str:
+    """Hash of the experiment description in ``fields``."""
+
+    blob = json.dumps(_canonical(fields), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+def cache_key(**fields) -> str:
+    """Hash the experiment description in ``fields`` plus the code version."""
+
+    return experiment_fingerprint(code_version=code_version(), **fields)
+
+
+def _dump_entry(entry: AggregateStats) -> dict:
+    moments = {name: summary.as_dict() for name, summary in entry.moments.items()}
+    return {"stats": entry.as_dict(), "moments": moments}
+
+
+def _load_entry(record: dict) -> AggregateStats:
+    entry = AggregateStats.from_dict(record["stats"])
+    entry.moments = {name: RunningStats.from_dict(summary) for name, summary in record["moments"].items()}
+    return entry
+
+
+def _touch(path: Path) -> None:
+    # Explicit nanosecond stamp: the kernel's own write times are too coarse
+    # to order entries touched in quick succession.
+    now = time.time_ns()
+    os.utime(path, ns=(now, now))
+
+
+class ResultCache:
+    """Directory of cached aggregate lists with size-based LRU eviction.
+
+    Reads refresh an entry's modification time; once the directory grows past
+    ``max_bytes`` the least recently used entries are deleted.
+    """
+
+    def __init__(self, root: Path | str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        if max_bytes <= 0:
+            raise ValueError("max_bytes must be > 0")
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def get(self, key: str) -> Optional[List[AggregateStats]]:
+        path = self._path(key)
+        try:
+            records = json.loads(path.read_text(encoding="utf-8"))
+            stats = [_load_entry(record) for record in records]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError, TypeError):
+            # Truncated or stale entry: drop it and recompute
+            path.unlink(missing_ok=True)
+            return None
+        _touch(path)
+        return stats
+
+    def put(self, key: str, stats: List[AggregateStats]) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_suffix(f".tmp{os.getpid()}")
+        tmp.write_text(json.dumps([_dump_entry(entry) for entry in stats]), encoding="utf-8")
+        os.replace(tmp, path)
+        _touch(path)
+        self.evict()
+
+    def evict(self) -> None:
+        entries = []
+        for path in self.root.glob("*.json"):
+            try:
+                info = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime_ns, info.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self) -> None:
+        for path in self.root.glob("*.json"):
+            path.unlink(missing_ok=True)
@@ -4,10 +4,23 @@ from __future__ import annotations
 import heapq
 import random
 from dataclasses import dataclass, field
-from typing import List, Tuple
+from typing import TYPE_CHECKING, List, Sequence, Tuple
 
 from .types import Frame
 
+if TYPE_CHECKING:
+    from .framebatch import FrameBatch
+
+# Reordered frames are delayed by 1 to MAX_REORDER_DELAY ticks
+MAX_REORDER_DELAY = 3
+
+
+@dataclass(slots=True)
+class _BatchRow(Frame):
+    """Queued stand-in for row ``row`` of the batch being sent by ``send_batch``."""
+
+    row: int = -1
+
 
 @dataclass(order=True)
 class ScheduledFrame:
@@ -31,19 +44,25 @@ class Channel:
         Process a frame transmission.
         Returns a list of frames that arrive at the receiver at this tick.
         """
-        self.current_tick += 1
-        
         # 1. Loss model
-        if self.p_loss > 0 and self.rng.random() < self.p_loss:
-            # Dropped
-            pass
-        else:
-            # 2. Delay/Reorder model
-            delay = 0
-            if self.p_reorder > 0 and self.rng.random() < self.p_reorder:
-                # Simple reordering: delay by 1 to 3 ticks
-                delay = self.rng.randint(1, 3)
-            
+        lost = self.p_loss > 0 and self.rng.random() < self.p_loss
+
+        # 2. Delay/Reorder model
+        delay = 0
+        if not lost and self.p_reorder > 0 and self.rng.random() < self.p_reorder:
+            # Simple reordering: delay by 1 to 3 ticks
+            delay = self.rng.randint(1, MAX_REORDER_DELAY)
+
+        return self.transmit(frame, lost=lost, delay=delay)
+
+    def transmit(self, frame: Frame, *, lost: bool, delay: int) -> List[Frame]:
+        """
+        Advance one tick with an already-decided fate for ``frame``.
+        Returns a list of frames that arrive at the receiver at this tick.
+        """
+        self.current_tick += 1
+
+        if not lost:
             delivery_tick = self.current_tick + delay
             heapq.heappush(
                 self.pq, 
@@ -59,6 +78,33 @@ class Channel:
         
         return arrived
 
+    def send_batch(self, batch: "FrameBatch") -> "FrameBatch":
+        """Send the rows of ``batch`` one per tick, as ``send`` would each frame.
+
+        Returns every arrival of those ticks, in order, as one batch. Rows
+        still in flight afterwards are queued as frames, so later sends and
+        ``flush`` deliver them as usual.
+        """
+        from .framebatch import FrameBatch
+
+        arrived: List[Frame] = []
+        for row in range(len(batch)):
+            # While queued, a bare row placeholder stands in for the frame
+            arrived.extend(self.send(_BatchRow(command="", row=row)))
+        self._materialize_rows(batch)
+
+        if all(type(item) is _BatchRow for item in arrived):
+            return batch.take([item.row for item in arrived])
+        frames = [batch[item.row] if type(item) is _BatchRow else item for item in arrived]
+        table = dict.fromkeys([*batch.commands, *(frame.command for frame in frames)])
+        return FrameBatch.from_frames(frames, command_table=list(table))
+
+    def _materialize_rows(self, batch: "FrameBatch") -> None:
+        """Replace the queued row placeholders of ``batch`` with their frames."""
+        for sf in self.pq:
+            if type(sf.frame) is _BatchRow:
+                sf.frame = batch[sf.frame.row]
+
     def flush(self) -> List[Frame]:
         """Force deliver all remaining frames (e.g., at end of run)."""
         arrived = []
@@ -67,6 +113,119 @@ class Channel:
             arrived.append(sf.frame)
         return arrived
 
+    def reset(self, rng: random.Random) -> None:
+        """Drop frames in flight and restart the clock, drawing from ``rng``."""
+        self.rng = rng
+        self.pq = []
+        self.current_tick = 0
+        self.seq_counter = 0
+
+
+class CalendarChannel(Channel):
+    """:class:`Channel` with a calendar queue instead of a heap.
+
+    Delays are bounded by ``max_delay``, so every frame in flight is due
+    within the next ``max_delay`` ticks. Frames are appended to a ring of
+    ``max_delay + 1`` FIFO buckets indexed by delivery tick, and each tick
+    hands over its whole bucket: scheduling and delivery are O(1) list
+    operations rather than heap pushes and pops that compare
+    :class:`ScheduledFrame` objects. Frames due on the same tick stay in send
+    order, so arrivals, their order and the random draws are exactly those of
+    :class:`Channel`. With ``p_reorder == 0`` and nothing in flight, ``send``
+    skips the queue altogether.
+    """
+
+    def __init__(self, p_loss: float, p_reorder: float, rng: random.Random, max_delay: int = MAX_REORDER_DELAY):
+        super().__init__(p_loss, p_reorder, rng)
+        if max_delay < MAX_REORDER_DELAY:
+            raise ValueError(f"max_delay must be >= {MAX_REORDER_DELAY}")
+        self.max_delay = max_delay
+        self.buckets: List[List[Frame]] = [[] for _ in range(max_delay + 1)]
+        self.in_flight = 0
+
+    def send(self, frame: Frame) -> List[Frame]:
+        if self.p_reorder == 0 and not self.in_flight:
+            # Fast path: without reordering a frame arrives on the tick it is sent
+            self.current_tick += 1
+            if self.p_loss > 0 and self.rng.random() < self.p_loss:
+                return []
+            return [frame]
+        return super().send(frame)
+
+    def transmit(self, frame: Frame, *, lost: bool, delay: int) -> List[Frame]:
+        self.current_tick += 1
+
+        if not lost:
+            if not delay and not self.in_flight:
+                return [frame]
+            if not 0 <= delay <= self.max_delay:
+                raise ValueError(f"delay must be between 0 and {self.max_delay} ticks")
+            self.buckets[(self.current_tick + delay) % len(self.buckets)].append(frame)
+            self.in_flight += 1
+
+        slot = self.current_tick % len(self.buckets)
+        arrived = self.buckets[slot]
+        if not arrived:
+            return []
+        self.buckets[slot] = []
+        self.in_flight -= len(arrived)
+        return arrived
+
+    def _materialize_rows(self, batch: "FrameBatch") -> None:
+        for bucket in self.buckets:
+            for index, item in enumerate(bucket):
+                if type(item) is _BatchRow:
+                    bucket[index] = batch[item.row]
+
+    def flush(self) -> List[Frame]:
+        arrived = []
+        size = len(self.buckets)
+        for ahead in range(1, size):
+            slot = (self.current_tick + ahead) % size
+            arrived.extend(self.buckets[slot])
+            self.buckets[slot] = []
+        self.in_flight = 0
+        return arrived
+
+    def reset(self, rng: random.Random) -> None:
+        super().reset(rng)
+        self.buckets = [[] for _ in self.buckets]
+        self.in_flight = 0
+
+
+class CommonRandomChannels:
+    """Several channels driven by common random numbers.
+
+    Each transmission draws one uniform for loss, one for reordering and one
+    delay, whatever the channel settings, and every channel thresholds the same
+    draws against its own ``p_loss``/``p_reorder``. Frames lost at one loss
+    level are therefore also lost at every higher level, so results for
+    neighbouring settings are monotonically coupled instead of independently
+    noisy. The draw count per transmission is fixed, so the stream consumed by
+    the rest of the simulation does not depend on the settings either.
+    """
+
+    def __init__(self, settings: Sequence[Tuple[float, float]], rng: random.Random):
+        self.rng = rng
+        self.channels = [CalendarChannel(p_loss, p_reorder, rng) for p_loss, p_reorder in settings]
+
+    def send(self, frame: Frame) -> List[List[Frame]]:
+        """Transmit ``frame`` on every channel; returns the arrivals per channel."""
+        u_loss = self.rng.random()
+        u_reorder = self.rng.random()
+        delay = self.rng.randint(1, MAX_REORDER_DELAY)
+        return [
+            channel.transmit(
+                frame,
+                lost=u_loss < channel.p_loss,
+                delay=delay if u_reorder < channel.p_reorder else 0,
+            )
+            for channel in self.channels
+        ]
+
+    def flush(self) -> List[List[Frame]]:
+        return [channel.flush() for channel in self.channels]
+
 
 def should_drop(probability: float, rng: random.Random) -> bool:
     """Legacy helper for backward compatibility or simple checks."""
@@ -1,16 +1,24 @@
 """Experiment runner that stitches together all simulation components."""
 from __future__ import annotations
 
+import contextlib
 import dataclasses
+import hashlib
+import itertools
 import random
-import statistics
 import sys
 import time
-from typing import Iterable, List, Optional, Sequence
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 from .attacker import Attacker
-from .channel import Channel
-from .receiver import Receiver
+from .cache import ResultCache, cache_key
+from .channel import CalendarChannel, Channel, CommonRandomChannels
+from .receiver import FIRST_REJECT, Receiver
+from .runlog import RunLogWriter
+from .security import MacTable, configure_mac_cache, mac_cache_info, scoped_mac_cache
+from .stats import RunningStats, attack_quantile_sketches
 from .sender import Sender
 from .types import (
     AggregateStats,
@@ -21,6 +29,9 @@ from .types import (
     Frame,
 )
 
+if TYPE_CHECKING:
+    from .runcolumns import RunColumnsWriter
+
 
 def _resolve_rng(rng: Optional[random.Random], seed: Optional[int]) -> random.Random:
     if rng is not None:
@@ -43,238 +54,1004 @@ def _choose_command(config: SimulationConfig, index: int, rng: random.Random) ->
 def simulate_one_run(
     config: SimulationConfig,
     rng: Optional[random.Random] = None,
-) -> SimulationRunResult:
-    """Simulate one round of legitimate traffic followed by replay attempts."""
+    mac_table: Optional[MacTable] = None,
+    window_sizes: Optional[Sequence[int]] = None,
+) -> SimulationRunResult | List[SimulationRunResult]:
+    """Simulate one round of legitimate traffic followed by replay attempts.
+
+    ``mac_table`` optionally supplies precomputed MACs shared by sender and
+    receiver; results are identical with or without it.
+
+    With ``window_sizes`` the run is simulated once and evaluated by one
+    receiver per window size (see :func:`simulate_variants`); a list with one
+    result per size is returned. Channel and attacker randomness does not
+    depend on the receiver, so each result equals a separate run with that
+    ``window_size`` and the same rng.
+    """
+
+    if window_sizes is not None:
+        variants = [dataclasses.replace(config, window_size=size) for size in window_sizes]
+        return simulate_variants(config, variants, rng=rng, mac_table=mac_table)
+
+    return RunPlan(config, mac_table).run(_resolve_rng(rng, config.rng_seed))
+
+
+class RunPlan:
+    """A single-mode run compiled once and executed many times.
+
+    Building the sender, receiver, attacker and channel, resolving the command
+    table and assembling the result metadata only depend on the config, so a
+    plan does it once; :meth:`run` resets the components and simulates one
+    run from ``rng``. ``plan.run(rng)`` returns exactly what
+    ``simulate_one_run(config, rng, mac_table)`` does. Every result shares
+    the plan's metadata dict, so treat it as read-only.
+    """
+
+    def __init__(self, config: SimulationConfig, mac_table: Optional[MacTable] = None):
+        self.config = config
+        self.mode = config.mode
+        self.sender = Sender(
+            mode=config.mode,
+            shared_key=config.shared_key,
+            mac_length=config.mac_length,
+            mac_table=mac_table,
+        )
+        self.receiver = Receiver(
+            mode=config.mode,
+            shared_key=config.shared_key,
+            mac_length=config.mac_length,
+            window_size=config.window_size or 1,
+            mac_table=mac_table,
+        )
+        self.attacker = Attacker(
+            record_loss=config.attacker_record_loss,
+            target_commands=config.target_commands
+        )
+        self.channel = CalendarChannel(p_loss=config.p_loss, p_reorder=config.p_reorder, rng=random.Random())
+
+        if config.command_sequence:
+            self.commands: Sequence[str] = tuple(config.command_sequence)
+            self.random_commands = False
+        else:
+            self.commands = list(config.effective_command_set())
+            self.random_commands = True
+            if not self.commands:
+                raise ValueError("Command set is empty")
+        self.metadata = {
+            "p_loss": config.p_loss,
+            "p_reorder": config.p_reorder,
+            "window_size": config.window_size,
+            "attack_mode": config.attack_mode.value,
+            "num_replay": config.num_replay,
+        }
+
+    def reset(self, rng: random.Random) -> None:
+        """Return every component to its initial state, drawing from ``rng``."""
+
+        self.sender.reset()
+        self.receiver.reset()
+        self.attacker.clear()
+        self.channel.reset(rng)
+
+    def run(self, rng: random.Random) -> SimulationRunResult:
+        """Simulate one round of legitimate traffic followed by replay attempts."""
+
+        self.reset(rng)
+        config = self.config
+        verify = self.receiver.check
+        next_frame = self.sender.next_frame
+        observe = self.attacker.observe
+        pick_frame = self.attacker.pick_frame
+        send = self.channel.send
+        commands = self.commands
+        challenge = self.mode is Mode.CHALLENGE
+
+        legit_sent = 0
+        legit_accepted = 0
+        attack_attempts = 0
+        attack_success = 0
+
+        def process_arrived(frames: List[Frame]):
+            nonlocal legit_accepted, attack_success
+            for f in frames:
+                if verify(f) < FIRST_REJECT:
+                    if f.is_attack:
+                        attack_success += 1
+                    else:
+                        legit_accepted += 1
+
+        for i in range(config.num_legit):
+            if self.random_commands:
+                command = rng.choice(commands)
+            else:
+                command = commands[i % len(commands)]
+            nonce = None
+            if challenge:
+                nonce = self.receiver.issue_nonce(rng, bits=config.challenge_nonce_bits)
+
+            # 1. Legitimate Transmission
+            frame = next_frame(command, nonce=nonce)
+            legit_sent += 1
+
+            # Attacker observes BEFORE channel effects (assuming close proximity to sender)
+            observe(frame, rng)
+
+            # Send through channel
+            process_arrived(send(frame))
+
+            # 2. Inline Attacks
+            if config.attack_mode is AttackMode.INLINE:
+                for _ in range(max(1, config.inline_attack_burst)):
+                    if rng.random() >= config.inline_attack_probability:
+                        break
+                    attack_frame = pick_frame(rng)
+                    if attack_frame is None:
+                        break
+
+                    attack_attempts += 1
+                    attack_frame.is_attack = True
+                    process_arrived(send(attack_frame))
+
+        # 3. Post-Run Attacks (legitimate frames still in flight may mix in)
+        if config.attack_mode is AttackMode.POST_RUN:
+            for _ in range(config.num_replay):
+                attack_frame = pick_frame(rng)
+                if attack_frame is None:
+                    break
+
+                attack_attempts += 1
+                attack_frame.is_attack = True
+                process_arrived(send(attack_frame))
+
+        # Flush any remaining frames in the channel
+        process_arrived(self.channel.flush())
+
+        return SimulationRunResult(
+            legit_sent=legit_sent,
+            legit_accepted=legit_accepted,
+            attack_attempts=attack_attempts,
+            attack_success=attack_success,
+            mode=self.mode,
+            metadata=self.metadata,
+        )
+
+
+# Fields every receiver variant in a lockstep pass must agree on: they shape
+# the traffic, the channel and the attacker, which are simulated only once.
+_SHARED_TRAFFIC_FIELDS = (
+    "attack_mode",
+    "num_legit",
+    "num_replay",
+    "p_loss",
+    "p_reorder",
+    "command_sequence",
+    "command_set",
+    "target_commands",
+    "attacker_record_loss",
+    "inline_attack_probability",
+    "inline_attack_burst",
+)
+
+# Coupled passes draw the channel from common random numbers instead
+_CHANNEL_FIELDS = ("p_loss", "p_reorder")
+
+# Mixed into the scenario seed to give challenge receivers their own nonce stream
+_NONCE_SEED_MASK = 0x5DEECE66D
+
+
+class _ReceiverLane:
+    """One receiver variant fed by a shared arrival stream."""
+
+    def __init__(self, config: SimulationConfig, mac_table: Optional[MacTable]):
+        self.config = config
+        self.sender = Sender(
+            mode=config.mode,
+            shared_key=config.shared_key,
+            mac_length=config.mac_length,
+            mac_table=mac_table,
+        )
+        self.receiver = Receiver(
+            mode=config.mode,
+            shared_key=config.shared_key,
+            mac_length=config.mac_length,
+            window_size=config.window_size or 1,
+            mac_table=mac_table,
+        )
+        self.frames: List[Frame] = []
+        self.legit_accepted = 0
+        self.attack_success = 0
+
+    def emit(self, command: str, nonce_rng: random.Random) -> None:
+        nonce = None
+        if self.config.mode is Mode.CHALLENGE:
+            nonce = self.receiver.issue_nonce(nonce_rng, bits=self.config.challenge_nonce_bits)
+        self.frames.append(self.sender.next_frame(command, nonce=nonce))
+
+    def process(self, token: Frame) -> None:
+        # token.counter indexes the legitimate frame this arrival carries
+        if self.receiver.check(self.frames[token.counter]) < FIRST_REJECT:
+            if token.is_attack:
+                self.attack_success += 1
+            else:
+                self.legit_accepted += 1
+
+
+class _SingleChannel:
+    """Adapts one :class:`Channel` to the per-group arrivals of a coupled pass."""
+
+    def __init__(self, channel: Channel):
+        self.channel = channel
+
+    def send(self, frame: Frame) -> List[List[Frame]]:
+        return [self.channel.send(frame)]
+
+    def flush(self) -> List[List[Frame]]:
+        return [self.channel.flush()]
+
+
+def _state_seed(rng: random.Random) -> int:
+    """Deterministic 64-bit digest of ``rng``'s state; the stream is not advanced.
+
+    Python's ``hash`` of the state tuple is salted per process, so it cannot
+    seed anything that must be reproducible.
+    """
+
+    words = ",".join(map(str, rng.getstate()[1])).encode("ascii")
+    return int.from_bytes(hashlib.blake2b(words, digest_size=8).digest(), "little")
+
+
+def simulate_variants(
+    config: SimulationConfig,
+    variants: Sequence[SimulationConfig],
+    rng: Optional[random.Random] = None,
+    nonce_rng: Optional[random.Random] = None,
+    mac_table: Optional[MacTable] = None,
+    coupled: bool = False,
+) -> List[SimulationRunResult]:
+    """Feed one simulated arrival stream to several receiver variants.
+
+    Commands, channel loss/reorder decisions and attacker picks are drawn once
+    from ``rng`` and do not depend on receiver behaviour, so every variant sees
+    the same realization. The channel and attacker carry lightweight tokens
+    that index the legitimate transmissions; each variant builds its own frame
+    for that index (counter, MAC or nonce). Variants may differ in ``mode``,
+    ``window_size`` and MAC parameters but must share the traffic fields.
+
+    Challenge receivers draw nonces from ``nonce_rng`` so that the shared
+    stream is consumed exactly as :func:`simulate_one_run` consumes it: the
+    no_def, rolling and window results equal single-mode runs with the same rng.
+    Without ``nonce_rng``, the nonce stream is seeded from the rng's current
+    state (read, not drawn from), so this holds either way.
+
+    With ``coupled=True`` variants may also differ in ``p_loss`` and
+    ``p_reorder``: every distinct setting gets its own channel, all driven by
+    :class:`~sim.channel.CommonRandomChannels`. Commands and attacker picks
+    stay shared, and a frame lost at one loss level is lost at every higher
+    level, so results across the settings are monotonically coupled. Coupled
+    runs consume the rng differently from :func:`simulate_one_run` and agree
+    with it statistically rather than run by run.
+    """
 
     local_rng = _resolve_rng(rng, config.rng_seed)
+    shared_fields = _SHARED_TRAFFIC_FIELDS
+    if coupled:
+        shared_fields = tuple(name for name in shared_fields if name not in _CHANNEL_FIELDS)
+    for variant in variants:
+        for name in shared_fields:
+            if getattr(variant, name) != getattr(config, name):
+                raise ValueError(f"Receiver variants must share '{name}' with the base config")
+    if nonce_rng is None and any(variant.mode is Mode.CHALLENGE for variant in variants):
+        nonce_rng = random.Random(_state_seed(local_rng) ^ _NONCE_SEED_MASK)
 
-    sender = Sender(mode=config.mode, shared_key=config.shared_key, mac_length=config.mac_length)
-    receiver = Receiver(
-        mode=config.mode,
-        shared_key=config.shared_key,
-        mac_length=config.mac_length,
-        window_size=config.window_size or 1,
-    )
+    lanes = [_ReceiverLane(variant, mac_table) for variant in variants]
     attacker = Attacker(
         record_loss=config.attacker_record_loss,
         target_commands=config.target_commands
     )
-    channel = Channel(p_loss=config.p_loss, p_reorder=config.p_reorder, rng=local_rng)
-
-    legit_sent = 0
-    legit_accepted = 0
+    if coupled:
+        # One channel (and lane group) per distinct loss/reorder setting
+        routes: Dict[Tuple[float, float], List[_ReceiverLane]] = {}
+        for lane in lanes:
+            routes.setdefault((lane.config.p_loss, lane.config.p_reorder), []).append(lane)
+        lane_groups = list(routes.values())
+        channel = CommonRandomChannels(list(routes), rng=local_rng)
+    else:
+        lane_groups = [lanes]
+        channel = _SingleChannel(CalendarChannel(p_loss=config.p_loss, p_reorder=config.p_reorder, rng=local_rng))
     attack_attempts = 0
-    attack_success = 0
-
-    def process_arrived(frames: List[Frame]):
-        nonlocal legit_accepted, attack_success
-        for f in frames:
-            result = receiver.process(f)
-            if result.accepted:
-                if f.is_attack:
-                    attack_success += 1
-                else:
-                    legit_accepted += 1
+
+    def process_arrived(arrivals: List[List[Frame]]):
+        for group, tokens in zip(lane_groups, arrivals):
+            for token in tokens:
+                for lane in group:
+                    lane.process(token)
 
     for i in range(config.num_legit):
         command = _choose_command(config, i, local_rng)
-        nonce = None
-        if config.mode is Mode.CHALLENGE:
-            nonce = receiver.issue_nonce(local_rng, bits=config.challenge_nonce_bits)
-        
-        # 1. Legitimate Transmission
-        frame = sender.next_frame(command, nonce=nonce)
-        legit_sent += 1
-        
-        # Attacker observes BEFORE channel effects (assuming close proximity to sender)
-        attacker.observe(frame, local_rng)
-
-        # Send through channel
-        arrived = channel.send(frame)
-        process_arrived(arrived)
-
-        # 2. Inline Attacks
+        for lane in lanes:
+            lane.emit(command, nonce_rng)
+
+        token = Frame(command=command, counter=i)
+        attacker.observe(token, local_rng)
+        process_arrived(channel.send(token))
+
         if config.attack_mode is AttackMode.INLINE:
             for _ in range(max(1, config.inline_attack_burst)):
                 if local_rng.random() >= config.inline_attack_probability:
                     break
-                attack_frame = attacker.pick_frame(local_rng)
-                if attack_frame is None:
+                attack_token = attacker.pick_frame(local_rng)
+                if attack_token is None:
                     break
-                
                 attack_attempts += 1
-                attack_frame.is_attack = True
-                arrived_attack = channel.send(attack_frame)
-                process_arrived(arrived_attack)
+                attack_token.is_attack = True
+                process_arrived(channel.send(attack_token))
 
-    # 3. Post-Run Attacks
     if config.attack_mode is AttackMode.POST_RUN:
-        # Flush channel first? No, keep it running.
-        # But usually post-run implies legitimate traffic has stopped.
-        # We should probably flush the channel of legitimate frames before starting post-run?
-        # Or just let them mix. Let's let them mix, but usually channel is empty by now if no delay.
-        
         for _ in range(config.num_replay):
-            attack_frame = attacker.pick_frame(local_rng)
-            if attack_frame is None:
+            attack_token = attacker.pick_frame(local_rng)
+            if attack_token is None:
                 break
-            
             attack_attempts += 1
-            attack_frame.is_attack = True
-            arrived_attack = channel.send(attack_frame)
-            process_arrived(arrived_attack)
-
-    # Flush any remaining frames in the channel
-    remaining = channel.flush()
-    process_arrived(remaining)
-
-    return SimulationRunResult(
-        legit_sent=legit_sent,
-        legit_accepted=legit_accepted,
-        attack_attempts=attack_attempts,
-        attack_success=attack_success,
-        mode=config.mode,
-        metadata={
-            "p_loss": config.p_loss,
-            "p_reorder": config.p_reorder,
-            "window_size": config.window_size,
-            "attack_mode": config.attack_mode.value,
-        },
+            attack_token.is_attack = True
+            process_arrived(channel.send(attack_token))
+
+    process_arrived(channel.flush())
+
+    return [
+        SimulationRunResult(
+            legit_sent=config.num_legit,
+            legit_accepted=lane.legit_accepted,
+            attack_attempts=attack_attempts,
+            attack_success=lane.attack_success,
+            mode=lane.config.mode,
+            metadata={
+                "p_loss": lane.config.p_loss,
+                "p_reorder": lane.config.p_reorder,
+                "window_size": lane.config.window_size,
+                "attack_mode": lane.config.attack_mode.value,
+                "num_replay": lane.config.num_replay,
+            },
+        )
+        for lane in lanes
+    ]
+
+
+def simulate_lockstep(
+    config: SimulationConfig,
+    modes: Sequence[Mode],
+    rng: Optional[random.Random] = None,
+    nonce_rng: Optional[random.Random] = None,
+    mac_table: Optional[MacTable] = None,
+) -> Dict[Mode, SimulationRunResult]:
+    """Simulate one run for several modes over a single channel realization.
+
+    Returns paired results: every mode saw the same commands, losses, delays
+    and replay picks.
+    """
+
+    variants = [dataclasses.replace(config, mode=mode) for mode in modes]
+    results = simulate_variants(config, variants, rng=rng, nonce_rng=nonce_rng, mac_table=mac_table)
+    return {result.mode: result for result in results}
+
+
+def _simulate_seed(
+    plan: Optional[RunPlan],
+    config: SimulationConfig,
+    scenario_seed: int,
+    mac_table: Optional[MacTable],
+    variants: Optional[Sequence[SimulationConfig]],
+    coupled: bool = False,
+) -> SimulationRunResult | List[SimulationRunResult]:
+    if variants is None:
+        return plan.run(random.Random(scenario_seed))
+    return simulate_variants(
+        config,
+        variants,
+        rng=random.Random(scenario_seed),
+        nonce_rng=random.Random(scenario_seed ^ _NONCE_SEED_MASK),
+        mac_table=mac_table,
+        coupled=coupled,
+    )
+
+
+def _run_seeded_chunk(
+    config: SimulationConfig,
+    seeds: Sequence[int],
+    mac_table: Optional[MacTable] = None,
+    variants: Optional[Sequence[SimulationConfig]] = None,
+    coupled: bool = False,
+) -> Tuple[list, Dict[str, int]]:
+    """Worker entry point: simulate one run per scenario seed, in order.
+
+    Single-mode chunks compile one :class:`RunPlan` and reuse it for every
+    run. Also returns how the worker's MAC cache counters moved during the chunk.
+    """
+
+    before = mac_cache_info()
+    plan = RunPlan(config, mac_table) if variants is None else None
+    results = [_simulate_seed(plan, config, scenario_seed, mac_table, variants, coupled) for scenario_seed in seeds]
+    return results, _mac_cache_delta(before, mac_cache_info())
+
+
+def _mac_cache_delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {"hits": after["hits"] - before["hits"], "misses": after["misses"] - before["misses"]}
+
+
+def _iter_seeded_results(
+    config: SimulationConfig,
+    seeds: Iterable[int],
+    executor: Optional[Executor],
+    chunk_size: int,
+    mac_table: Optional[MacTable] = None,
+    cache_counters: Optional[Dict[str, int]] = None,
+    variants: Optional[Sequence[SimulationConfig]] = None,
+    coupled: bool = False,
+    max_pending: int = 1,
+) -> Iterator[Tuple[int, object]]:
+    """Yield ``(scenario_seed, result)`` in seed order, serially or through a process pool.
+
+    Each result is a :class:`SimulationRunResult`, or a list with one result
+    per receiver variant when ``variants`` is given. ``seeds`` is consumed
+    lazily and at most ``max_pending`` chunks are in flight at once, so memory
+    does not grow with the number of runs. MAC cache hits and misses are
+    added to ``cache_counters`` as runs complete.
+    """
+
+    counters = cache_counters if cache_counters is not None else {"hits": 0, "misses": 0}
+    if executor is None:
+        plan = RunPlan(config, mac_table) if variants is None else None
+        for scenario_seed in seeds:
+            before = mac_cache_info()
+            yield scenario_seed, _simulate_seed(plan, config, scenario_seed, mac_table, variants, coupled)
+            for key, value in _mac_cache_delta(before, mac_cache_info()).items():
+                counters[key] += value
+        return
+
+    seeds = iter(seeds)
+    pending: deque = deque()
+
+    def submit_next() -> None:
+        chunk = list(itertools.islice(seeds, chunk_size))
+        if chunk:
+            pending.append((chunk, executor.submit(_run_seeded_chunk, config, chunk, mac_table, variants, coupled)))
+
+    for _ in range(max(1, max_pending)):
+        submit_next()
+    while pending:
+        chunk, future = pending.popleft()
+        results, delta = future.result()
+        submit_next()
+        for key, value in delta.items():
+            counters[key] += value
+        yield from zip(chunk, results)
+
+
+ENGINES = ("scalar", "batched", "lockstep", "analytic")
+
+
+def make_worker_pool(jobs: int) -> ProcessPoolExecutor:
+    """Process pool for the scalar and lockstep engines.
+
+    Workers start with the parent's MAC cache size. Pass the pool to several
+    :func:`run_many_experiments` calls (``executor=``) to reuse its workers.
+    """
+
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=configure_mac_cache,
+        initargs=(mac_cache_info()["maxsize"],),
     )
 
 
+# Upper bound on runs per worker chunk, so huge experiments stream through
+# the pool instead of materializing a few enormous result lists
+_MAX_CHUNK_SIZE = 2048
+
+
+def _chunk_size_for(runs: int, jobs: int) -> int:
+    # A few chunks per worker keeps the pool busy without paying IPC per run.
+    return min(_MAX_CHUNK_SIZE, max(1, runs // (jobs * 4)))
+
+
+def _scenario_seeds(seed: Optional[int]) -> Iterator[int]:
+    # Every mode restarts this stream, so run k uses the same seed in every mode
+    mode_rng = random.Random(seed)
+    while True:
+        yield mode_rng.randint(0, 2**31 - 1)
+
+
 def run_many_experiments(
     base_config: SimulationConfig,
     modes: Sequence[Mode],
     runs: int,
     seed: Optional[int] = None,
     show_progress: bool = True,
+    jobs: int = 1,
+    engine: str = "scalar",
+    mac_cache_size: Optional[int] = None,
+    window_sizes: Optional[Sequence[int]] = None,
+    channel_grid: Optional[Sequence[Tuple[float, float]]] = None,
+    target_ci: Optional[float] = None,
+    max_runs: Optional[int] = None,
+    cache: Optional[ResultCache] = None,
+    first_run: int = 0,
+    executor: Optional[Executor] = None,
+    run_log: Optional[RunLogWriter | RunColumnsWriter] = None,
 ) -> List[AggregateStats]:
-    """Run multiple Monte Carlo trials for each requested mode with visual progress."""
+    """Run multiple Monte Carlo trials for each requested mode with visual progress.
+
+    With ``jobs > 1`` the runs are spread over a process pool. Scenario seeds are
+    still drawn from the per-mode ``random.Random(seed)`` stream in the parent and
+    results are consumed in seed order, so the aggregates are identical to a
+    serial run with the same seed.
+
+    ``engine="batched"`` simulates all runs of a mode at once with the NumPy
+    engine in :mod:`sim.batched` (no_def, rolling and window only). It draws
+    from ``numpy.random.default_rng(seed)``, so its numbers agree with the
+    scalar engine statistically rather than run by run.
+
+    ``engine="lockstep"`` simulates each run once for all modes with
+    :func:`simulate_lockstep`, so the channel and attacker randomness is drawn
+    once instead of once per mode. no_def, rolling and window aggregates are
+    identical to the scalar engine; challenge draws nonces from its own stream.
+
+    ``engine="analytic"`` samples nothing: each mode's rate means and standard
+    deviations are computed by :func:`sim.analytic.analyze` (no_def, rolling
+    and window only, no attacker record loss), exact up to the probability
+    mass it discards. Its aggregates report ``runs == 0`` and carry the
+    solver's ``truncated_mass`` and ``peak_states`` in their metadata.
+
+    The scalar and lockstep engines look MACs up in a
+    :class:`~sim.security.MacTable` built once for the whole experiment;
+    process-pool workers read it from shared memory.
+
+    ``mac_cache_size`` runs the experiment with an empty LRU cache of that
+    size behind :func:`~sim.security.compute_mac`, in this process and in
+    every worker it starts; the caller's cache is restored afterwards. Its
+    hit/miss counters for the experiment are reported in the metadata. They
+    count :func:`~sim.security.compute_mac` calls only: MACs served straight
+    from the ``MacTable`` never reach the cache and are not counted, so with
+    the scalar and lockstep engines they mostly cover nonces and counters
+    outside the table.
+
+    ``window_sizes`` fans the window mode out into one aggregate per size,
+    evaluated from a single simulated arrival stream per run (see
+    :func:`simulate_one_run`); the results equal separate experiments with
+    each ``window_size``. Aggregates follow ``modes`` order, with the window
+    entry expanded in ``window_sizes`` order.
+
+    ``channel_grid`` lists ``(p_loss, p_reorder)`` settings that replace the
+    base config's channel and are evaluated together in one coupled pass per
+    run (see :func:`simulate_variants` with ``coupled=True``), so neighbouring
+    settings share their loss and reorder draws. Aggregates are ordered by
+    grid setting, then by mode. With the scalar engine each mode still gets
+    its own pass; lockstep runs everything in one.
+
+    ``target_ci`` switches to sequential sampling: ``runs`` becomes the batch
+    size, and batches are added until the 95% confidence-interval half-width
+    of every legit and attack rate in a pass is at most ``target_ci``, or
+    until ``max_runs`` (default ``100 * runs``) is reached. Each aggregate's
+    ``runs`` holds the count it achieved. Runs use the same scenario seeds as
+    a fixed-budget experiment, so stopping after N runs gives the numbers of
+    ``runs=N``.
+
+    ``cache`` (a :class:`~sim.cache.ResultCache`) returns the stored
+    aggregates of an identical earlier experiment instead of simulating, and
+    stores fresh ones. Only seeded (or analytic) experiments are cached.
+
+    ``first_run`` skips the first scenario seeds: only runs
+    ``first_run .. runs - 1`` are simulated and aggregated. Each aggregate
+    carries the count, sum and sum of squares of its per-run rates in
+    ``moments``, so the result can be merged into a stored ``first_run``-run
+    result with :func:`sim.stats.merge_aggregate` (scalar and lockstep
+    engines, seeded, fixed budget only).
+
+    ``executor`` runs the scalar and lockstep engines on an existing pool
+    (see :func:`make_worker_pool`) instead of starting one for this call; it
+    is left running, and ``jobs`` then only sets the chunking. The pool's
+    workers keep their own MAC cache size.
+
+    Per-run rates are folded into Welford accumulators and P² quantile
+    sketches (median, p5 and p95 of the attack success rate) as they arrive,
+    so memory stays flat however many runs are requested. ``run_log`` (a
+    :class:`~sim.runlog.RunLogWriter`, or a
+    :class:`~sim.runcolumns.RunColumnsWriter` for memory-mappable columns)
+    additionally streams every simulated run to disk with its counters,
+    scenario seed and settings (batched runs have no seed). It bypasses the
+    cache lookup, since a cached result has no runs to log.
+
+    Every aggregate's metadata holds the wall time of the pass that produced
+    it (``elapsed``) and that time per run (``time_per_run``); aggregates
+    computed in one shared pass (lockstep modes, window fan-out, channel
+    grid) report the time of that pass. The first aggregate also describes
+    the whole call: ``engine``, ``jobs`` and the MAC cache counters.
+    """
+
+    if jobs < 1:
+        raise ValueError("jobs must be >= 1")
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}'. Valid options: {', '.join(ENGINES)}")
+    if engine in ("batched", "analytic") and jobs > 1:
+        raise ValueError(f"The {engine} engine runs in a single process; use jobs=1")
+    if channel_grid is not None and engine == "batched":
+        raise ValueError("Coupled channel grids are not supported by the batched engine")
+    if target_ci is not None:
+        if target_ci <= 0:
+            raise ValueError("target_ci must be > 0")
+        if engine == "analytic":
+            raise ValueError("The analytic engine samples nothing; drop target_ci")
+        if runs < 2:
+            raise ValueError("Sequential sampling needs a batch size (runs) of at least 2")
+        max_runs = max_runs if max_runs is not None else 100 * runs
+        if max_runs < runs:
+            raise ValueError("max_runs must be >= runs")
+    if run_log is not None and engine == "analytic":
+        raise ValueError("The analytic engine simulates no runs to log")
+    if first_run:
+        if not 0 < first_run < runs:
+            raise ValueError("first_run must be between 0 and runs")
+        if engine not in ("scalar", "lockstep") or seed is None or target_ci is not None:
+            raise ValueError("Extending runs needs a seeded scalar or lockstep experiment with a fixed budget")
+    budget = runs if target_ci is None else max_runs
+    coupled = channel_grid is not None
+
+    key: Optional[str] = None
+    if cache is not None and (seed is not None or engine == "analytic"):
+        key = cache_key(
+            config=base_config,
+            modes=list(modes),
+            runs=runs,
+            seed=seed,
+            engine=engine,
+            window_sizes=window_sizes,
+            channel_grid=channel_grid,
+            target_ci=target_ci,
+            max_runs=max_runs,
+            first_run=first_run,
+        )
+        cached = cache.get(key) if run_log is None else None
+        if cached is not None:
+            if show_progress:
+                print(f"\n♻️  Loaded {len(cached)} aggregates from the result cache ({key[:12]})")
+            return cached
 
     # Performance tracking
     start_time = time.time()
-    
-    master_rng = random.Random(seed)
-    per_mode_stats = {
-        mode: {
-            "config": dataclasses.replace(base_config, mode=mode),
-            "legit": [],
-            "attack": [],
-        }
-        for mode in modes
-    }
 
-    if show_progress:
-        print("\n" + "="*80)
-        print("🚀 STARTING MONTE CARLO SIMULATION")
-        print("="*80 + "\n")
+    buckets_list = _make_buckets(base_config, modes, window_sizes, channel_grid)
+
+    cache_counters = {"hits": 0, "misses": 0}
+    mac_table: Optional[MacTable] = None
+    owns_executor = False
+    # mac_cache_size only applies to this call: the previous cache is restored after it
+    mac_cache_scope = contextlib.ExitStack()
+    if mac_cache_size is not None:
+        mac_cache_scope.enter_context(scoped_mac_cache(mac_cache_size))
+    mac_cache_maxsize = mac_cache_info()["maxsize"]
+
+    try:
+        if engine in ("scalar", "lockstep"):
+            mac_table = MacTable.for_config(base_config)
+
+        chunk_size = _chunk_size_for(runs, jobs)
+        if mac_table is None:
+            executor = None  # batched and analytic run in this process
+        if mac_table is not None and executor is None and jobs > 1 and runs > 1:
+            executor = make_worker_pool(jobs)
+            owns_executor = True
+        if executor is not None:
+            mac_table.share()
 
-    for mode in modes:
-        buckets = per_mode_stats[mode]
-        
-        if show_progress:
-            print(f"\n{'='*80}")
-            print(f"🛡️  TESTING DEFENSE MODE: {mode.value.upper()}")
-            print(f"{'='*80}\n")
-        
-        # Reset RNG for consistent run
-        mode_rng = random.Random(seed)
-        
-        for run_idx in range(runs):
-            scenario_seed = mode_rng.randint(0, 2**31 - 1)
-            scenario_rng = random.Random(scenario_seed)
-            result = simulate_one_run(buckets["config"], rng=scenario_rng)
-            buckets["legit"].append(result.legit_accept_rate)
-            buckets["attack"].append(result.attack_success_rate)
-            
-            # Show progress
-            if show_progress and ((run_idx + 1) % 10 == 0 or run_idx == runs - 1):
-                bar_length = 50
-                filled = int(bar_length * (run_idx + 1) / runs)
-                bar = "█" * filled + "░" * (bar_length - filled)
-                
-                sys.stdout.write(f"\r   Progress: [{bar}] {run_idx + 1}/{runs} runs")
-                sys.stdout.flush()
-                
-                # Show interim results
-                if (run_idx + 1) % 50 == 0 or run_idx == runs - 1:
-                    avg_legit = _mean(buckets["legit"])
-                    avg_attack = _mean(buckets["attack"])
-                    print(f"\n   ├─ Legit Accept: {avg_legit*100:.1f}% | Attack Success: {avg_attack*100:.1f}%")
-        
         if show_progress:
-            print()  # New line after progress bar
-            
-            # Show final stats for this mode
-            avg_legit = _mean(buckets["legit"])
-            avg_attack = _mean(buckets["attack"])
-            std_legit = _std(buckets["legit"])
-            std_attack = _std(buckets["attack"])
-            
-            print(f"\n   ✓ Mode '{mode.value}' completed:")
-            print(f"     ├─ Legitimate Acceptance: {avg_legit*100:.2f}% ± {std_legit*100:.2f}%")
-            print(f"     └─ Attack Success Rate: {avg_attack*100:.2f}% ± {std_attack*100:.2f}%")
-            time.sleep(0.2)
+            print("\n" + "="*80)
+            print("🚀 STARTING MONTE CARLO SIMULATION")
+            print("="*80 + "\n")
+
+        for group in _execution_groups(buckets_list, engine):
+            group_start = time.perf_counter()
+            if show_progress:
+                labels = ", ".join(_bucket_label(buckets).upper() for buckets in group)
+                kind = "MODES (LOCKSTEP)" if len(group) > 1 else "MODE"
+                print(f"\n{'='*80}")
+                print(f"🛡️  TESTING DEFENSE {kind}: {labels}")
+                print(f"{'='*80}\n")
+
+            if engine == "analytic":
+                _run_analytic_mode(group[0])
+                if show_progress:
+                    print(f"   Progress: [{'█' * 50}] exact (analytic)")
+            elif engine == "batched":
+                generator = _batched_rng(seed)
+                done = 0
+                while done < budget:
+                    batch = min(runs, budget - done)
+                    _run_batched_mode(group[0], batch, generator, run_log, done)
+                    done += batch
+                    if target_ci is not None and _converged(group, target_ci):
+                        break
+                if show_progress:
+                    print(f"   Progress: [{'█' * 50}] {done}/{budget} runs (batched)")
+            else:
+                variants = [buckets["config"] for buckets in group] if len(group) > 1 or coupled else None
+                seeds = itertools.islice(_scenario_seeds(seed), first_run, budget)
+                total = budget - first_run
+                done = 0
+                while done < total:
+                    results = _iter_seeded_results(
+                        group[0]["config"],
+                        itertools.islice(seeds, runs),
+                        executor,
+                        chunk_size,
+                        mac_table,
+                        cache_counters,
+                        variants=variants,
+                        coupled=coupled,
+                        max_pending=jobs * 4,
+                    )
+                    for scenario_seed, item in results:
+                        for buckets, result in zip(group, item if variants else [item]):
+                            _record_rates(buckets, result.legit_accept_rate, result.attack_success_rate)
+                            if run_log is not None:
+                                run_log.write_run(result, run=first_run + done, seed=scenario_seed)
+                        if show_progress:
+                            _show_run_progress(done, total, group)
+                        done += 1
+                    if target_ci is not None and _converged(group, target_ci):
+                        break
+                if show_progress and done < total:
+                    print(f"\n   ✓ Converged after {done} runs (target CI ±{target_ci})")
+
+            elapsed = time.perf_counter() - group_start
+            for buckets in group:
+                buckets["elapsed"] = elapsed
+            if show_progress:
+                print()  # New line after progress bar
+                for buckets in group:
+                    _show_mode_summary(buckets)
+    finally:
+        if owns_executor:
+            executor.shutdown()
+        if mac_table is not None:
+            mac_table.close()
+        mac_cache_scope.close()
 
     aggregates: List[AggregateStats] = []
-    for mode, buckets in per_mode_stats.items():
+    for buckets in buckets_list:
         config = buckets["config"]
-        window_value = config.window_size if mode is Mode.WINDOW else 0
+        runs_done = buckets["legit"].count
+        timing = {
+            "elapsed": buckets["elapsed"],
+            "time_per_run": buckets["elapsed"] / runs_done if runs_done > 0 else 0,
+        }
+        if "exact" in buckets:
+            exact = buckets["exact"].aggregate(config)
+            exact.metadata.update(timing)
+            aggregates.append(exact)
+            continue
+        window_value = config.window_size if config.mode is Mode.WINDOW else 0
         aggregates.append(
             AggregateStats(
-                mode=mode,
-                runs=len(buckets["legit"]),
-                avg_legit_rate=_mean(buckets["legit"]),
-                std_legit_rate=_std(buckets["legit"]),
-                avg_attack_rate=_mean(buckets["attack"]),
-                std_attack_rate=_std(buckets["attack"]),
+                mode=config.mode,
+                runs=buckets["legit"].count,
+                avg_legit_rate=buckets["legit"].mean,
+                std_legit_rate=buckets["legit"].pstdev,
+                avg_attack_rate=buckets["attack"].mean,
+                std_attack_rate=buckets["attack"].pstdev,
+                **{name: sketch.value for name, sketch in buckets["attack_quantiles"].items()},
                 p_loss=config.p_loss,
                 p_reorder=config.p_reorder,
                 window_size=window_value,
                 num_legit=config.num_legit,
                 num_replay=config.num_replay,
                 attack_mode=config.attack_mode,
+                moments={"legit": buckets["legit"], "attack": buckets["attack"]},
+                metadata=timing,
             )
         )
 
     # Performance summary
     end_time = time.time()
     total_time = end_time - start_time
-    time_per_run = total_time / (len(modes) * runs) if runs > 0 else 0
-    
+    total_runs = sum(buckets["legit"].count for buckets in buckets_list)
+    time_per_run = total_time / total_runs if total_runs > 0 else 0
+
     if show_progress:
         print("\n" + "="*80)
         print("SIMULATION COMPLETE - FINAL RESULTS")
         print("="*80)
         print(f"\n⏱️  Performance Metrics:")
         print(f"   ├─ Total Time: {total_time:.2f} seconds")
-        print(f"   ├─ Total Runs: {len(modes) * runs}")
-        print(f"   └─ Time per Run: {time_per_run*1000:.2f} ms\n")
+        print(f"   ├─ Total Runs: {total_runs}")
+        print(f"   ├─ Time per Run: {time_per_run*1000:.2f} ms")
+        print(f"   └─ MAC Cache: {cache_counters['hits']} hits / {cache_counters['misses']} misses "
+              f"(compute_mac calls only; MacTable lookups are not counted)\n")
 
-    # Store performance metrics in first aggregate (for later reference)
+    # Settings of the whole call go in the first aggregate; timings are per pass
     if aggregates:
         aggregates[0] = dataclasses.replace(
             aggregates[0],
             metadata={
-                "total_time": total_time,
-                "time_per_run": time_per_run,
-                "total_runs": len(modes) * runs
+                **aggregates[0].metadata,
+                "jobs": jobs,
+                "engine": engine,
+                "mac_cache_hits": cache_counters["hits"],
+                "mac_cache_misses": cache_counters["misses"],
+                "mac_cache_maxsize": mac_cache_maxsize,
             }
         )
+        if target_ci is not None:
+            aggregates[0].metadata.update({"target_ci": target_ci, "max_runs": max_runs})
+
+    if key is not None:
+        cache.put(key, aggregates)
 
     return aggregates
 
 
-def _mean(values: Iterable[float]) -> float:
-    values = list(values)
-    if not values:
-        return 0.0
-    return statistics.fmean(values)
+def _make_buckets(
+    base_config: SimulationConfig,
+    modes: Sequence[Mode],
+    window_sizes: Optional[Sequence[int]],
+    channel_grid: Optional[Sequence[Tuple[float, float]]] = None,
+) -> List[dict]:
+    """One result bucket per receiver variant, in output order.
+
+    ``legit`` and ``attack`` accumulate the per-run rates as :class:`RunningStats`;
+    ``attack_quantiles`` sketches the attack rate's quantiles.
+    """
+
+    buckets_list = []
+    for channel in channel_grid if channel_grid is not None else [None]:
+        channel_config = base_config
+        if channel is not None:
+            channel_config = dataclasses.replace(base_config, p_loss=channel[0], p_reorder=channel[1])
+        for mode in modes:
+            config = dataclasses.replace(channel_config, mode=mode)
+            sizes = window_sizes if (mode is Mode.WINDOW and window_sizes is not None) else [None]
+            for size in sizes:
+                variant = config if size is None else dataclasses.replace(config, window_size=size)
+                buckets_list.append(
+                    {
+                        "config": variant,
+                        "channel": channel,
+                        "legit": RunningStats(),
+                        "attack": RunningStats(),
+                        "attack_quantiles": attack_quantile_sketches(),
+                    }
+                )
+    return buckets_list
+
+
+def _execution_groups(buckets_list: List[dict], engine: str) -> List[List[dict]]:
+    """Group buckets that are simulated together from one arrival stream per run.
+
+    The lockstep engine runs every variant in one pass. Otherwise each mode runs
+    on its own, except that fanned-out window sizes and coupled channel
+    settings of that mode still share one pass.
+    """
+
+    if engine == "lockstep":
+        return [buckets_list]
+    if engine in ("batched", "analytic"):
+        return [[buckets] for buckets in buckets_list]
+    groups: Dict[Mode, List[dict]] = {}
+    for buckets in buckets_list:
+        groups.setdefault(buckets["config"].mode, []).append(buckets)
+    return list(groups.values())
+
+
+def _bucket_label(buckets: dict) -> str:
+    config = buckets["config"]
+    label = config.mode.value
+    if config.mode is Mode.WINDOW:
+        label = f"{label}(W={config.window_size})"
+    if buckets["channel"] is not None:
+        label = f"{label}@loss={config.p_loss:g},reorder={config.p_reorder:g}"
+    return label
+
+
+def _show_run_progress(run_idx: int, runs: int, bucket_list: List[dict]) -> None:
+    if not ((run_idx + 1) % 10 == 0 or run_idx == runs - 1):
+        return
+    bar_length = 50
+    filled = int(bar_length * (run_idx + 1) / runs)
+    bar = "█" * filled + "░" * (bar_length - filled)
+
+    sys.stdout.write(f"\r   Progress: [{bar}] {run_idx + 1}/{runs} runs")
+    sys.stdout.flush()
+
+    # Show interim results
+    if (run_idx + 1) % 50 == 0 or run_idx == runs - 1:
+        print()
+        for buckets in bucket_list:
+            avg_legit = buckets["legit"].mean
+            avg_attack = buckets["attack"].mean
+            label = f"{_bucket_label(buckets)}: " if len(bucket_list) > 1 else ""
+            print(f"   ├─ {label}Legit Accept: {avg_legit*100:.1f}% | Attack Success: {avg_attack*100:.1f}%")
+
+
+def _show_mode_summary(buckets: dict) -> None:
+    # Show final stats for this mode
+    exact = buckets.get("exact")
+    if exact is not None:
+        avg_legit, std_legit = exact.avg_legit_rate, exact.std_legit_rate
+        avg_attack, std_attack = exact.avg_attack_rate, exact.std_attack_rate
+    else:
+        avg_legit = buckets["legit"].mean
+        avg_attack = buckets["attack"].mean
+        std_legit = buckets["legit"].pstdev
+        std_attack = buckets["attack"].pstdev
 
+    print(f"\n   ✓ Mode '{_bucket_label(buckets)}' completed:")
+    print(f"     ├─ Legitimate Acceptance: {avg_legit*100:.2f}% ± {std_legit*100:.2f}%")
+    if exact is not None:
+        print(f"     ├─ Attack Success Rate: {avg_attack*100:.2f}% ± {std_attack*100:.2f}%")
+        print(f"     └─ Truncated Mass: {exact.metadata['truncated_mass']:.2e}")
+    else:
+        print(f"     └─ Attack Success Rate: {avg_attack*100:.2f}% ± {std_attack*100:.2f}%")
+    time.sleep(0.2)
+
+
+def _batched_rng(seed: Optional[int]):
+    import numpy as np  # lazy import: only the batched engine needs NumPy
+
+    return np.random.default_rng(seed)
+
+
+def _run_batched_mode(
+    buckets: dict, runs: int, rng, run_log: Optional[RunLogWriter | RunColumnsWriter] = None, first_run: int = 0
+) -> None:
+    from .batched import simulate_batch
+
+    config = buckets["config"]
+    batch = simulate_batch(config, runs, rng=rng)
+    for legit, attack in zip(batch.legit_accept_rate.tolist(), batch.attack_success_rate.tolist()):
+        _record_rates(buckets, legit, attack)
+    if run_log is not None:
+        metadata = {
+            "p_loss": config.p_loss,
+            "p_reorder": config.p_reorder,
+            "window_size": config.window_size,
+            "attack_mode": config.attack_mode.value,
+            "num_replay": config.num_replay,
+        }
+        counters = zip(
+            batch.legit_sent.tolist(),
+            batch.legit_accepted.tolist(),
+            batch.attack_attempts.tolist(),
+            batch.attack_success.tolist(),
+        )
+        for offset, (sent, accepted, attempts, success) in enumerate(counters):
+            result = SimulationRunResult(sent, accepted, attempts, success, config.mode, metadata)
+            run_log.write_run(result, run=first_run + offset, seed=None)
+
+
+def _record_rates(buckets: dict, legit: float, attack: float) -> None:
+    buckets["legit"].add(legit)
+    buckets["attack"].add(attack)
+    for sketch in buckets["attack_quantiles"].values():
+        sketch.add(attack)
+
+
+def _run_analytic_mode(buckets: dict) -> None:
+    from .analytic import analyze
+
+    buckets["exact"] = analyze(buckets["config"])
+
+
+# Two-sided 95% normal quantile for sequential-sampling confidence intervals
+_CI_Z = 1.96
+
+
+def _ci_half_width(stats: RunningStats) -> float:
+    if stats.count < 2:
+        return float("inf")
+    return _CI_Z * stats.stdev / stats.count ** 0.5
+
+
+def _converged(group: List[dict], target_ci: float) -> bool:
+    return all(
+        _ci_half_width(buckets["legit"]) <= target_ci and _ci_half_width(buckets["attack"]) <= target_ci
+        for buckets in group
+    )
 
-def _std(values: Iterable[float]) -> float:
-    values = list(values)
-    if len(values) < 2:
-        return 0.0
-    return statistics.pstdev(values)
@@ -0,0 +1,140 @@
+"""Struct-of-arrays container for many frames.
+
+A :class:`FrameBatch` stores one NumPy column per :class:`~sim.types.Frame`
+field instead of one Python object per frame::
+
+    counter    int64    -1 for frames without a counter
+    command    uint16   index into ``batch.commands``
+    mac        S<n>     ASCII MAC bytes, b"" for frames without a MAC
+    nonce      S<n>     ASCII nonce bytes, b"" for frames without a nonce
+    is_attack  bool
+
+Batches are produced by :meth:`Sender.next_batch`, carried by
+:meth:`Channel.send_batch`, recorded and replayed by
+:meth:`Attacker.observe_batch` / :meth:`Attacker.pick_batch` and verified by
+:meth:`Receiver.check_frames`. Replayed frames are rows of the recorded
+batch, selected by index, so replaying creates no per-frame objects.
+Indexing a batch with an integer materializes that row as a :class:`Frame`.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .types import Frame
+
+
+def _encode(values: Sequence[Optional[str]]) -> np.ndarray:
+    return np.array([b"" if value is None else value.encode("ascii") for value in values], dtype=np.bytes_)
+
+
+def _decode(values: np.ndarray) -> List[Optional[str]]:
+    return [value.decode("ascii") if value else None for value in values.tolist()]
+
+
+@dataclass
+class FrameBatch:
+    """Columns of a sequence of frames; row ``i`` of every column is frame ``i``."""
+
+    commands: Tuple[str, ...]
+    counter: np.ndarray
+    command: np.ndarray
+    mac: np.ndarray
+    nonce: np.ndarray
+    is_attack: np.ndarray
+
+    def __post_init__(self) -> None:
+        rows = {column.shape[0] for column in (self.counter, self.command, self.mac, self.nonce, self.is_attack)}
+        if len(rows) != 1:
+            raise ValueError("FrameBatch columns must all have the same length")
+
+    @classmethod
+    def from_columns(
+        cls,
+        commands: Sequence[str],
+        counters: Sequence[Optional[int]],
+        macs: Sequence[Optional[str]],
+        nonces: Optional[Sequence[Optional[str]]] = None,
+        is_attack: bool | Sequence[bool] = False,
+        command_table: Optional[Sequence[str]] = None,
+    ) -> "FrameBatch":
+        """Build a batch from per-frame values (``None`` for a missing field).
+
+        ``command_table`` fixes the command ids; by default commands are
+        numbered in order of first appearance.
+        """
+
+        table = list(command_table) if command_table is not None else list(dict.fromkeys(commands))
+        ids = {command: index for index, command in enumerate(table)}
+        try:
+            command_ids = [ids[command] for command in commands]
+        except KeyError as exc:
+            raise ValueError(f"Command {exc.args[0]!r} is not in the command table") from None
+        rows = len(command_ids)
+        if nonces is None:
+            nonces = [None] * rows
+        flags = np.empty(rows, dtype=bool)
+        flags[:] = is_attack
+        return cls(
+            commands=tuple(table),
+            counter=np.array([-1 if counter is None else counter for counter in counters], dtype=np.int64),
+            command=np.array(command_ids, dtype=np.uint16),
+            mac=_encode(macs),
+            nonce=_encode(nonces),
+            is_attack=flags,
+        )
+
+    @classmethod
+    def from_frames(cls, frames: Iterable[Frame], command_table: Optional[Sequence[str]] = None) -> "FrameBatch":
+        frames = list(frames)
+        return cls.from_columns(
+            [frame.command for frame in frames],
+            [frame.counter for frame in frames],
+            [frame.mac for frame in frames],
+            [frame.nonce for frame in frames],
+            [frame.is_attack for frame in frames],
+            command_table=command_table,
+        )
+
+    def __len__(self) -> int:
+        return int(self.counter.shape[0])
+
+    def __getitem__(self, row: int) -> Frame:
+        counter = int(self.counter[row])
+        return Frame(
+            command=self.commands[self.command[row]],
+            counter=None if counter < 0 else counter,
+            mac=self.mac[row].decode("ascii") or None,
+            nonce=self.nonce[row].decode("ascii") or None,
+            is_attack=bool(self.is_attack[row]),
+        )
+
+    def __iter__(self) -> Iterator[Frame]:
+        for counter, command, mac, nonce, is_attack in zip(*self.columns(), self.is_attack.tolist()):
+            yield Frame(command=command, counter=counter, mac=mac, nonce=nonce, is_attack=is_attack)
+
+    def to_frames(self) -> List[Frame]:
+        return list(self)
+
+    def columns(self) -> Tuple[List[Optional[int]], List[str], List[Optional[str]], List[Optional[str]]]:
+        """Counters, commands, MACs and nonces as Python lists (``None`` for missing fields)."""
+
+        counters = [None if counter < 0 else counter for counter in self.counter.tolist()]
+        commands = [self.commands[index] for index in self.command.tolist()]
+        return counters, commands, _decode(self.mac), _decode(self.nonce)
+
+    def take(self, rows: Sequence[int] | np.ndarray, is_attack: Optional[bool] = None) -> "FrameBatch":
+        """The batch of ``rows`` (in that order), optionally re-tagged as attack or legit."""
+
+        rows = np.asarray(rows, dtype=np.intp)
+        flags = self.is_attack[rows] if is_attack is None else np.full(rows.shape[0], is_attack, dtype=bool)
+        return FrameBatch(
+            commands=self.commands,
+            counter=self.counter[rows],
+            command=self.command[rows],
+            mac=self.mac[rows],
+            nonce=self.nonce[rows],
+            is_attack=flags,
+        )
@@ -0,0 +1,178 @@
+"""N-dimensional parameter grids stored as labeled NumPy tensors.
+
+:func:`run_grid` evaluates every mode at every point of the Cartesian
+product of a few :data:`GRID_AXES` and returns a :class:`GridResult`: one
+array per metric with dimensions ``("mode", *axes)`` plus a coordinate array
+per dimension. :func:`save_grid` writes it as a single ``.npz`` file, so
+downstream tools can slice it directly::
+
+    grid = np.load("results/grid.npz")
+    attack = grid["avg_attack_rate"]          # shape (modes, *axes)
+    modes = list(grid["coord_mode"])          # labels of axis 0
+
+Points are planned with :class:`~sim.planner.SweepPlanner`, so experiments
+that only differ in a parameter the mode ignores run once, and window sizes
+are fanned out from one arrival stream per run.
+"""
+from __future__ import annotations
+
+import dataclasses
+import itertools
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import ResultCache
+from .experiment import make_worker_pool
+from .planner import SweepPlanner
+from .types import Mode, SimulationConfig
+
+# Axis name -> value type; every axis is a SimulationConfig field
+GRID_AXES = {
+    "p_loss": float,
+    "p_reorder": float,
+    "window_size": int,
+    "mac_length": int,
+    "attacker_record_loss": float,
+    "inline_attack_probability": float,
+    "num_legit": int,
+}
+METRICS = ("avg_legit_rate", "std_legit_rate", "avg_attack_rate", "std_attack_rate", "runs")
+
+
+@dataclass
+class GridResult:
+    """Metric tensors with named dimensions and coordinate labels."""
+
+    dims: Tuple[str, ...]
+    coords: Dict[str, np.ndarray]
+    data: Dict[str, np.ndarray]
+
+    def index(self, dim: str, value) -> int:
+        matches = np.flatnonzero(self.coords[dim] == value)
+        if matches.size == 0:
+            raise KeyError(f"{value!r} is not a coordinate of '{dim}'")
+        return int(matches[0])
+
+    def sel(self, metric: str, **coords) -> np.ndarray:
+        """Slice ``metric`` at the given coordinate values, e.g. ``sel("avg_attack_rate", mode="window")``."""
+
+        key = tuple(
+            self.index(dim, coords[dim]) if dim in coords else slice(None)
+            for dim in self.dims
+        )
+        return self.data[metric][key]
+
+
+def parse_axis(spec: str) -> Tuple[str, List[float | int]]:
+    """Parse ``"name=v1,v2,..."`` into an axis name and typed values."""
+
+    name, sep, raw = spec.partition("=")
+    name = name.strip()
+    if not sep or name not in GRID_AXES:
+        valid = ", ".join(GRID_AXES)
+        raise ValueError(f"Grid axis must look like name=v1,v2,... with name one of: {valid}")
+    try:
+        values = [GRID_AXES[name](token) for token in raw.split(",") if token.strip()]
+    except ValueError as exc:
+        raise ValueError(f"Invalid value for grid axis '{name}': {exc}") from exc
+    if not values:
+        raise ValueError(f"Grid axis '{name}' has no values")
+    return name, values
+
+
+def run_grid(
+    base_config: SimulationConfig,
+    modes: Sequence[Mode],
+    axes: Mapping[str, Sequence[float | int]],
+    runs: int,
+    seed: Optional[int] = None,
+    jobs: int = 1,
+    cache: Optional[ResultCache] = None,
+    show_progress: bool = True,
+) -> GridResult:
+    """Evaluate every mode at every point of the ``axes`` grid."""
+
+    for name in axes:
+        if name not in GRID_AXES:
+            raise ValueError(f"Unsupported grid axis '{name}'. Supported: {', '.join(GRID_AXES)}")
+    names = list(axes)
+    values = [list(axes[name]) for name in names]
+    shape = (len(modes), *(len(axis) for axis in values))
+
+    # Window sizes of the window mode come from one fan-out experiment per point
+    fan_out = "window_size" in axes
+    window_axis = names.index("window_size") if fan_out else None
+
+    planner = SweepPlanner()
+    cells = []
+    for mode_index, mode in enumerate(modes):
+        for point in itertools.product(*(range(len(axis)) for axis in values)):
+            settings = {name: values[dim][i] for dim, (name, i) in enumerate(zip(names, point))}
+            config = dataclasses.replace(base_config, **settings)
+            if mode is Mode.WINDOW and fan_out:
+                # The fan-out covers every size, so all sizes share one experiment
+                config = dataclasses.replace(config, window_size=values[window_axis][0])
+                key = planner.add(mode, config, runs, seed, window_sizes=values[window_axis])
+                match = {"window_size": values[window_axis][point[window_axis]]}
+            else:
+                key = planner.add(mode, config, runs, seed)
+                match = {}
+            cells.append(((mode_index, *point), key, match))
+
+    if show_progress:
+        print(f"Grid {' x '.join(str(n) for n in shape)}: {len(planner.experiments)} distinct experiments")
+
+    executor = make_worker_pool(jobs) if jobs > 1 else None
+    done = [0]
+
+    def execute(planned):
+        records = planned.execute(cache=cache, jobs=jobs, executor=executor, show_progress=False)
+        done[0] += 1
+        if show_progress:
+            print(f"\r   Progress: {done[0]}/{len(planner.experiments)} experiments", end="", flush=True)
+        return records
+
+    try:
+        planner.run(execute)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if show_progress:
+        print()
+
+    data = {metric: np.zeros(shape, dtype=np.int64 if metric == "runs" else np.float64) for metric in METRICS}
+    for index, key, match in cells:
+        record = planner.select(key, **match)
+        for metric in METRICS:
+            data[metric][index] = record[metric]
+
+    coords = {"mode": np.array([mode.value for mode in modes])}
+    coords.update({name: np.array(axis, dtype=GRID_AXES[name]) for name, axis in zip(names, values)})
+    return GridResult(dims=("mode", *names), coords=coords, data=data)
+
+
+def save_grid(path: Path | str, grid: GridResult, **attrs) -> None:
+    """Write ``grid`` as a compressed ``.npz``.
+
+    Keys: ``dims``, ``coord_<dim>`` per dimension, one array per metric, and
+    ``attr_<name>`` for each extra scalar attribute (runs, seed, ...).
+    """
+
+    arrays = {"dims": np.array(grid.dims)}
+    arrays.update({f"coord_{dim}": grid.coords[dim] for dim in grid.dims})
+    arrays.update(grid.data)
+    arrays.update({f"attr_{name}": np.array(value) for name, value in attrs.items()})
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+def load_grid(path: Path | str) -> GridResult:
+    with np.load(path) as archive:
+        dims = tuple(str(dim) for dim in archive["dims"])
+        coords = {dim: archive[f"coord_{dim}"] for dim in dims}
+        data = {metric: archive[metric] for metric in METRICS if metric in archive.files}
+    return GridResult(dims=dims, coords=coords, data=data)
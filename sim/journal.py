@@ -0,0 +1,66 @@
+"""Append-only checkpoint journal for long-running sweeps.
+
+Each finished unit of work is appended as one JSON line holding a key and the
+records it produced, and flushed to disk before the sweep moves on. A sweep
+restarted with the same journal looks keys up and skips the work it already
+did. A line cut short by a kill is ignored on load.
+"""
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class SweepJournal:
+    """JSON-lines journal of ``key -> records`` checkpoints.
+
+    ``resume=True`` loads the entries already on disk. Otherwise a new,
+    empty journal is started; a non-empty journal left by an interrupted
+    sweep is only truncated with ``fresh=True`` and raises ``ValueError``
+    otherwise, so its checkpoints are never discarded by accident.
+    """
+
+    def __init__(self, path: Path | str, resume: bool = False, fresh: bool = False):
+        if resume and fresh:
+            raise ValueError("A journal cannot be both resumed and started fresh")
+        self.path = Path(path)
+        self.entries: Dict[str, List[dict]] = {}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and self.path.exists():
+            self._load()
+            return
+        if not fresh and self.path.exists() and self.path.stat().st_size > 0:
+            raise ValueError(
+                f"Journal {self.path} holds checkpoints of an interrupted sweep; "
+                "resume it or start fresh to discard them"
+            )
+        self.path.write_text("", encoding="utf-8")
+
+    def _load(self) -> None:
+        text = self.path.read_text(encoding="utf-8")
+        for line in text.splitlines():
+            try:
+                entry = json.loads(line)
+                self.entries[entry["key"]] = entry["records"]
+            except (ValueError, KeyError, TypeError):
+                continue
+        if text and not text.endswith("\n"):
+            # Terminate a torn last line so the next entry starts cleanly
+            with self.path.open("a", encoding="utf-8") as handle:
+                handle.write("\n")
+
+    def get(self, key: str) -> Optional[List[dict]]:
+        return self.entries.get(key)
+
+    def record(self, key: str, records: List[dict]) -> None:
+        line = json.dumps({"key": key, "records": records})
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.entries[key] = records
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
@@ -0,0 +1,97 @@
+"""Deduplicate the experiments behind a set of sweep records.
+
+Sweeps ask for one record per (sweep value, mode), but many of those records
+describe the same experiment: a mode that ignores ``window_size`` gives the
+same result at every window value, and the point where two sweeps cross
+(e.g. ``p_loss=0.10, p_reorder=0``) is asked for by both.
+:func:`normalize_config` maps a (mode, config) pair to the parameters that
+mode actually reads, and :class:`SweepPlanner` runs every distinct
+experiment once and hands its records to every request that needs them.
+"""
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+from .cache import experiment_fingerprint
+from .experiment import run_many_experiments
+from .types import AttackMode, Mode, SimulationConfig
+
+_DEFAULTS = SimulationConfig(mode=Mode.NO_DEFENSE)
+
+
+def normalize_config(mode: Mode, config: SimulationConfig) -> SimulationConfig:
+    """Return ``config`` for ``mode`` with every field the mode ignores reset.
+
+    Only fields that do not appear in the aggregate records are reset, so a
+    normalized experiment reports exactly the records of the original one.
+    ``rng_seed`` is dropped because experiments take their seed separately.
+    """
+
+    changes = {"mode": mode, "rng_seed": None}
+    if mode is not Mode.WINDOW:
+        changes["window_size"] = _DEFAULTS.window_size
+    if mode is not Mode.CHALLENGE:
+        changes["challenge_nonce_bits"] = _DEFAULTS.challenge_nonce_bits
+    if config.attack_mode is AttackMode.POST_RUN:
+        changes["inline_attack_probability"] = _DEFAULTS.inline_attack_probability
+        changes["inline_attack_burst"] = _DEFAULTS.inline_attack_burst
+    return dataclasses.replace(config, **changes)
+
+
+@dataclass
+class PlannedExperiment:
+    """One distinct single-mode experiment and the options it runs with."""
+
+    key: str
+    mode: Mode
+    config: SimulationConfig
+    runs: int
+    seed: Optional[int]
+    options: Dict[str, object] = field(default_factory=dict)
+
+    def execute(self, **kwargs) -> List[dict]:
+        """Run the experiment with :func:`run_many_experiments` and return its records."""
+
+        stats = run_many_experiments(
+            self.config, modes=[self.mode], runs=self.runs, seed=self.seed, **self.options, **kwargs
+        )
+        return [entry.as_dict() for entry in stats]
+
+
+class SweepPlanner:
+    """Collect record requests, run each distinct experiment once, fan out.
+
+    :meth:`add` registers an experiment and returns its key; requests that
+    normalize to the same experiment share the key. After :meth:`run`,
+    :meth:`select` returns a record of that experiment.
+    """
+
+    def __init__(self) -> None:
+        self.experiments: Dict[str, PlannedExperiment] = {}
+        self.results: Dict[str, List[dict]] = {}
+        self.requests = 0
+
+    def add(self, mode: Mode, config: SimulationConfig, runs: int, seed: Optional[int], **options) -> str:
+        config = normalize_config(mode, config)
+        key = experiment_fingerprint(mode=mode, config=config, runs=runs, seed=seed, **options)
+        self.requests += 1
+        if key not in self.experiments:
+            self.experiments[key] = PlannedExperiment(key, mode, config, runs, seed, options)
+        return key
+
+    def run(self, execute: Callable[[PlannedExperiment], List[dict]]) -> None:
+        """Run every experiment not yet done, in the order it was first added."""
+
+        for key, experiment in self.experiments.items():
+            if key not in self.results:
+                self.results[key] = execute(experiment)
+
+    def select(self, key: str, **match) -> dict:
+        """The first record of experiment ``key`` whose fields equal ``match``."""
+
+        for record in self.results[key]:
+            if all(record[name] == value for name, value in match.items()):
+                return record
+        raise KeyError(f"No record matching {match} in planned experiment {key[:12]}")
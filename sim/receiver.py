@@ -1,85 +1,174 @@
-"""Receiver-side verification logic for each defense mode."""
+"""Receiver-side verification logic for each defense mode.
+
+Verification outcomes are small integer codes indexing :data:`REASONS`;
+codes below :data:`FIRST_REJECT` mean the frame was accepted. Hot loops call
+:meth:`Receiver.check` for the bare code, while :meth:`Receiver.process` and
+the ``verify_*`` functions return the rich :class:`VerificationResult`.
+"""
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass
 import random
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Tuple
 
-from .security import compute_mac, constant_time_compare
+from .security import MacTable, compute_mac, constant_time_compare
 from .types import Frame, Mode, ReceiverState
 
+if TYPE_CHECKING:
+    from .framebatch import FrameBatch
+
 
-@dataclass
+@dataclass(frozen=True)
 class VerificationResult:
+    """Outcome of one verification.
+
+    Frozen, because :meth:`Receiver.process` hands out one shared instance per
+    reason code: a result kept by the caller never changes when later frames
+    are processed. ``state`` is the receiver's live state, not a snapshot.
+    """
+
     accepted: bool
     reason: str
     state: ReceiverState
 
 
-def verify_no_defense(frame: Frame, state: ReceiverState, **_: object) -> VerificationResult:
-    return VerificationResult(True, "no_defense_accept", state)
+# Verification outcomes; accepting reasons come first
+REASONS = (
+    "no_defense_accept",
+    "rolling_accept",
+    "window_accept_initial",
+    "window_accept_new",
+    "window_accept_old",
+    "challenge_accept",
+    "missing_security_fields",
+    "mac_mismatch",
+    "counter_replay",
+    "counter_out_of_window",
+    "counter_too_old",
+    "missing_challenge_fields",
+    "no_outstanding_challenge",
+    "challenge_mismatch",
+)
+(
+    NO_DEFENSE_ACCEPT,
+    ROLLING_ACCEPT,
+    WINDOW_ACCEPT_INITIAL,
+    WINDOW_ACCEPT_NEW,
+    WINDOW_ACCEPT_OLD,
+    CHALLENGE_ACCEPT,
+    MISSING_SECURITY_FIELDS,
+    MAC_MISMATCH,
+    COUNTER_REPLAY,
+    COUNTER_OUT_OF_WINDOW,
+    COUNTER_TOO_OLD,
+    MISSING_CHALLENGE_FIELDS,
+    NO_OUTSTANDING_CHALLENGE,
+    CHALLENGE_MISMATCH,
+) = range(len(REASONS))
+# Codes below this one accept the frame
+FIRST_REJECT = MISSING_SECURITY_FIELDS
 
 
-def verify_with_rolling_mac(
+def _result(code: int, state: ReceiverState) -> VerificationResult:
+    return VerificationResult(code < FIRST_REJECT, REASONS[code], state)
+
+
+def _expected_mac(
+    token: int | str,
+    command: str,
+    shared_key: str,
+    mac_length: int,
+    mac_table: Optional[MacTable],
+) -> str:
+    if mac_table is not None:
+        return mac_table.lookup(token, command, key=shared_key, mac_length=mac_length)
+    return compute_mac(token, command, key=shared_key, mac_length=mac_length)
+
+
+# Code functions share one positional signature so Receiver can dispatch
+# through a table: (frame, state, shared_key, mac_length, window_size, mac_table)
+
+
+def _no_defense_code(frame, state, shared_key, mac_length, window_size, mac_table) -> int:
+    return NO_DEFENSE_ACCEPT
+
+
+def _rolling_code(
     frame: Frame,
     state: ReceiverState,
-    *,
     shared_key: str,
     mac_length: int,
-) -> VerificationResult:
+    window_size: int,
+    mac_table: Optional[MacTable],
+) -> int:
     if frame.counter is None or frame.mac is None:
-        return VerificationResult(False, "missing_security_fields", state)
+        return MISSING_SECURITY_FIELDS
 
-    expected_mac = compute_mac(frame.counter, frame.command, key=shared_key, mac_length=mac_length)
+    expected_mac = _expected_mac(frame.counter, frame.command, shared_key, mac_length, mac_table)
     if not constant_time_compare(expected_mac, frame.mac):
-        return VerificationResult(False, "mac_mismatch", state)
+        return MAC_MISMATCH
 
-    if frame.counter <= state.last_counter:
-        return VerificationResult(False, "counter_replay", state)
+    return _rolling_counter(state, frame.counter, window_size)
 
-    state.last_counter = frame.counter
-    return VerificationResult(True, "rolling_accept", state)
 
+def _rolling_counter(state: ReceiverState, counter: int, window_size: int) -> int:
+    """Counter check of an authenticated rolling-mode frame."""
 
-def verify_with_window(
+    if counter <= state.last_counter:
+        return COUNTER_REPLAY
+
+    state.last_counter = counter
+    return ROLLING_ACCEPT
+
+
+def _window_code(
     frame: Frame,
     state: ReceiverState,
-    *,
     shared_key: str,
     mac_length: int,
     window_size: int,
-) -> VerificationResult:
+    mac_table: Optional[MacTable],
+) -> int:
     if window_size < 1:
         raise ValueError("window_size must be >= 1 for window mode")
 
     if frame.counter is None or frame.mac is None:
-        return VerificationResult(False, "missing_security_fields", state)
+        return MISSING_SECURITY_FIELDS
 
-    expected_mac = compute_mac(frame.counter, frame.command, key=shared_key, mac_length=mac_length)
+    expected_mac = _expected_mac(frame.counter, frame.command, shared_key, mac_length, mac_table)
     if not constant_time_compare(expected_mac, frame.mac):
-        return VerificationResult(False, "mac_mismatch", state)
+        return MAC_MISMATCH
+
+    return _window_counter(state, frame.counter, window_size)
+
+
+def _window_counter(state: ReceiverState, counter: int, window_size: int) -> int:
+    """Sliding-window check of an authenticated window-mode frame."""
+
+    blocks = _window_blocks(state, window_size)
 
     # Initial state
     if state.last_counter < 0:
-        state.last_counter = frame.counter
-        state.received_mask = 1  # Mark this counter as received (bit 0)
-        return VerificationResult(True, "window_accept_initial", state)
+        state.last_counter = counter
+        _mark_received(blocks, counter)
+        return WINDOW_ACCEPT_INITIAL
 
-    diff = frame.counter - state.last_counter
+    diff = counter - state.last_counter
 
     # Case 1: New highest counter (Advance window)
     if diff > 0:
         # Check lookahead limit (optional, but preserves original behavior of preventing huge jumps)
         # We use window_size as the lookahead limit as well.
         if diff > window_size:
-            return VerificationResult(False, "counter_out_of_window", state)
+            return COUNTER_OUT_OF_WINDOW
         
-        # Shift mask to the left by diff
-        state.received_mask <<= diff
-        # Set bit 0 (the new last_counter)
-        state.received_mask |= 1
+        # Clear the blocks the window slides into, then mark the new counter
+        _advance_window(blocks, state.last_counter, counter)
+        _mark_received(blocks, counter)
         # Update last_counter
-        state.last_counter = frame.counter
-        return VerificationResult(True, "window_accept_new", state)
+        state.last_counter = counter
+        return WINDOW_ACCEPT_NEW
 
     # Case 2: Old or current counter (Check replay window)
     else:
@@ -87,77 +176,265 @@ def verify_with_window(
         
         # Check if it fell off the left edge of the window
         if offset >= window_size:
-            return VerificationResult(False, "counter_too_old", state)
+            return COUNTER_TOO_OLD
         
         # Check if already received
-        if (state.received_mask >> offset) & 1:
-            return VerificationResult(False, "counter_replay", state)
+        if _is_received(blocks, counter):
+            return COUNTER_REPLAY
         
         # Mark as received
-        state.received_mask |= (1 << offset)
-        return VerificationResult(True, "window_accept_old", state)
+        _mark_received(blocks, counter)
+        return WINDOW_ACCEPT_OLD
 
 
-def verify_challenge_response(
+def verify_no_defense(frame: Frame, state: ReceiverState, **_: object) -> VerificationResult:
+    return _result(NO_DEFENSE_ACCEPT, state)
+
+
+def verify_with_rolling_mac(
+    frame: Frame,
+    state: ReceiverState,
+    *,
+    shared_key: str,
+    mac_length: int,
+    mac_table: Optional[MacTable] = None,
+) -> VerificationResult:
+    return _result(_rolling_code(frame, state, shared_key, mac_length, 0, mac_table), state)
+
+
+def verify_with_window(
     frame: Frame,
     state: ReceiverState,
     *,
     shared_key: str,
     mac_length: int,
+    window_size: int,
+    mac_table: Optional[MacTable] = None,
 ) -> VerificationResult:
+    return _result(_window_code(frame, state, shared_key, mac_length, window_size, mac_table), state)
+
+
+# Sliding-window bitmap helpers (RFC 6479). Counter c lives in bit c % 64 of
+# block (c // 64) % len(blocks). The block count is a power of two with one
+# spare block beyond the window, so the block being recycled as the window
+# advances never holds a counter that is still inside the window.
+_BLOCK_BITS = 64
+_BLOCK_SHIFT = 6
+
+
+def _window_block_count(window_size: int) -> int:
+    needed = (window_size + _BLOCK_BITS - 1) // _BLOCK_BITS + 1
+    count = 1
+    while count < needed:
+        count <<= 1
+    return count
+
+
+def _window_blocks(state: ReceiverState, window_size: int) -> array:
+    count = _window_block_count(window_size)
+    if len(state.window_blocks) != count:
+        state.window_blocks = array("Q", bytes(8 * count))
+    return state.window_blocks
+
+
+def _advance_window(blocks: array, last_counter: int, new_counter: int) -> None:
+    index_mask = len(blocks) - 1
+    last_block = last_counter >> _BLOCK_SHIFT
+    steps = min((new_counter >> _BLOCK_SHIFT) - last_block, len(blocks))
+    for step in range(1, steps + 1):
+        blocks[(last_block + step) & index_mask] = 0
+
+
+def _is_received(blocks: array, counter: int) -> bool:
+    block = blocks[(counter >> _BLOCK_SHIFT) & (len(blocks) - 1)]
+    return (block >> (counter & (_BLOCK_BITS - 1))) & 1 == 1
+
+
+def _mark_received(blocks: array, counter: int) -> None:
+    blocks[(counter >> _BLOCK_SHIFT) & (len(blocks) - 1)] |= 1 << (counter & (_BLOCK_BITS - 1))
+
+
+def _challenge_code(
+    frame: Frame,
+    state: ReceiverState,
+    shared_key: str,
+    mac_length: int,
+    window_size: int,
+    mac_table: Optional[MacTable],
+) -> int:
     if frame.nonce is None or frame.mac is None:
-        return VerificationResult(False, "missing_challenge_fields", state)
+        return MISSING_CHALLENGE_FIELDS
 
     if state.expected_nonce is None:
-        return VerificationResult(False, "no_outstanding_challenge", state)
+        return NO_OUTSTANDING_CHALLENGE
 
     if frame.nonce != state.expected_nonce:
-        return VerificationResult(False, "challenge_mismatch", state)
+        return CHALLENGE_MISMATCH
 
-    expected_mac = compute_mac(frame.nonce, frame.command, key=shared_key, mac_length=mac_length)
+    expected_mac = _expected_mac(frame.nonce, frame.command, shared_key, mac_length, mac_table)
     if not constant_time_compare(expected_mac, frame.mac):
-        return VerificationResult(False, "mac_mismatch", state)
+        return MAC_MISMATCH
 
     state.expected_nonce = None
-    return VerificationResult(True, "challenge_accept", state)
+    return CHALLENGE_ACCEPT
+
+
+def verify_challenge_response(
+    frame: Frame,
+    state: ReceiverState,
+    *,
+    shared_key: str,
+    mac_length: int,
+    mac_table: Optional[MacTable] = None,
+) -> VerificationResult:
+    return _result(_challenge_code(frame, state, shared_key, mac_length, 0, mac_table), state)
+
+
+_CODE_FUNCTIONS: Dict[Mode, Callable[..., int]] = {
+    Mode.NO_DEFENSE: _no_defense_code,
+    Mode.ROLLING_MAC: _rolling_code,
+    Mode.WINDOW: _window_code,
+    Mode.CHALLENGE: _challenge_code,
+}
+# Counter-state updates of the modes whose MAC check does not depend on state
+_COUNTER_UPDATES: Dict[Mode, Callable[[ReceiverState, int, int], int]] = {
+    Mode.ROLLING_MAC: _rolling_counter,
+    Mode.WINDOW: _window_counter,
+}
 
 
 class Receiver:
-    """Unified receiver that dispatches to the correct verification routine."""
+    """Unified receiver that dispatches to the correct verification routine.
+
+    The routine for ``mode`` is looked up once, at construction.
+    ``reason_counts[code]`` counts the outcomes of every frame checked since
+    construction (or :meth:`clear_counts`); :meth:`reset` leaves it alone so
+    a histogram can span many runs.
+    """
 
-    def __init__(self, mode: Mode, *, shared_key: str, mac_length: int, window_size: int = 0):
+    def __init__(
+        self,
+        mode: Mode,
+        *,
+        shared_key: str,
+        mac_length: int,
+        window_size: int = 0,
+        mac_table: Optional[MacTable] = None,
+    ):
         self.mode = mode
         self.shared_key = shared_key
         self.mac_length = mac_length
         self.window_size = window_size
-        self.state = ReceiverState()
+        self.mac_table = mac_table
+        try:
+            self._verify = _CODE_FUNCTIONS[mode]
+        except KeyError:
+            raise ValueError(f"Unsupported mode: {mode}") from None
+        self.reason_counts: List[int] = [0] * len(REASONS)
+        self.reset()
+
+    def check(self, frame: Frame) -> int:
+        """Verify ``frame`` and return its reason code (accepted iff ``< FIRST_REJECT``)."""
+
+        code = self._verify(frame, self.state, self.shared_key, self.mac_length, self.window_size, self.mac_table)
+        self.reason_counts[code] += 1
+        return code
 
     def process(self, frame: Frame) -> VerificationResult:
+        """Like :meth:`check`, but return the preallocated (frozen) result for the code."""
+
+        code = self.check(frame)
+        if self._results is None:
+            # One shared result per reason, bound to the current state
+            self._results = tuple(_result(reason, self.state) for reason in range(len(REASONS)))
+        return self._results[code]
+
+    def check_batch(
+        self,
+        counters: Sequence[Optional[int]],
+        commands: Sequence[str],
+        macs: Sequence[Optional[str]],
+        nonces: Optional[Sequence[Optional[str]]] = None,
+    ):
+        """Verify a whole arrival sequence; return its reason codes as an ``int8`` array.
+
+        Column ``i`` of the arguments describes the ``i``-th arriving frame
+        (``None`` for a missing field). The result equals calling
+        :meth:`check` on each frame in order. In rolling and window mode the
+        MACs are checked for all frames at once (each distinct counter and
+        command is looked up once, and the comparison is vectorized), then a
+        tight loop applies the counter checks of the authenticated frames.
+        """
+
+        import numpy as np  # lazy import: only batch verification needs NumPy
+
+        count = len(commands)
+        codes = np.empty(count, dtype=np.int8)
+        update = _COUNTER_UPDATES.get(self.mode)
         if self.mode is Mode.NO_DEFENSE:
-            return verify_no_defense(frame, self.state)
-        if self.mode is Mode.ROLLING_MAC:
-            return verify_with_rolling_mac(
-                frame,
-                self.state,
-                shared_key=self.shared_key,
-                mac_length=self.mac_length,
-            )
-        if self.mode is Mode.WINDOW:
-            return verify_with_window(
-                frame,
-                self.state,
-                shared_key=self.shared_key,
-                mac_length=self.mac_length,
-                window_size=self.window_size,
+            codes.fill(NO_DEFENSE_ACCEPT)
+        elif update is None:
+            nonces = nonces if nonces is not None else [None] * count
+            for i, (counter, command, mac, nonce) in enumerate(zip(counters, commands, macs, nonces)):
+                frame = Frame(command=command, counter=counter, mac=mac, nonce=nonce)
+                codes[i] = self._verify(frame, self.state, self.shared_key, self.mac_length, self.window_size, self.mac_table)
+        else:
+            if self.mode is Mode.WINDOW and self.window_size < 1:
+                raise ValueError("window_size must be >= 1 for window mode")
+            missing = np.fromiter(
+                (counter is None or mac is None for counter, mac in zip(counters, macs)), dtype=bool, count=count
             )
-        if self.mode is Mode.CHALLENGE:
-            return verify_challenge_response(
-                frame,
-                self.state,
-                shared_key=self.shared_key,
-                mac_length=self.mac_length,
-            )
-        raise ValueError(f"Unsupported mode: {self.mode}")
+            expected: Dict[Tuple[int, str], str] = {}
+            expected_macs = []
+            for counter, command, absent in zip(counters, commands, missing.tolist()):
+                if absent:
+                    expected_macs.append("")
+                    continue
+                key = (counter, command)
+                mac = expected.get(key)
+                if mac is None:
+                    mac = expected[key] = _expected_mac(counter, command, self.shared_key, self.mac_length, self.mac_table)
+                expected_macs.append(mac)
+            received = np.array([mac or "" for mac in macs], dtype=str)
+            authentic = (np.array(expected_macs, dtype=str) == received) & ~missing
+            codes[:] = MAC_MISMATCH
+            codes[missing] = MISSING_SECURITY_FIELDS
+            state, window_size = self.state, self.window_size
+            for i in np.flatnonzero(authentic).tolist():
+                codes[i] = update(state, counters[i], window_size)
+
+        histogram = np.bincount(codes, minlength=len(REASONS)).tolist()
+        self.reason_counts = [total + new for total, new in zip(self.reason_counts, histogram)]
+        return codes
+
+    def process_batch(
+        self,
+        counters: Sequence[Optional[int]],
+        commands: Sequence[str],
+        macs: Sequence[Optional[str]],
+        nonces: Optional[Sequence[Optional[str]]] = None,
+    ):
+        """Like :meth:`check_batch`, but return a boolean acceptance array."""
+
+        return self.check_batch(counters, commands, macs, nonces) < FIRST_REJECT
+
+    def check_frames(self, batch: "FrameBatch"):
+        """:meth:`check_batch` over the rows of a :class:`~sim.framebatch.FrameBatch`."""
+
+        return self.check_batch(*batch.columns())
+
+    def process_frames(self, batch: "FrameBatch"):
+        """:meth:`process_batch` over the rows of a :class:`~sim.framebatch.FrameBatch`."""
+
+        return self.check_frames(batch) < FIRST_REJECT
+
+    def reason_histogram(self) -> Dict[str, int]:
+        """Non-zero :attr:`reason_counts` keyed by reason name."""
+
+        return {REASONS[code]: count for code, count in enumerate(self.reason_counts) if count}
+
+    def clear_counts(self) -> None:
+        self.reason_counts = [0] * len(REASONS)
 
     def issue_nonce(self, rng: random.Random, bits: int = 32) -> str:
         if self.mode is not Mode.CHALLENGE:
@@ -169,3 +446,4 @@ class Receiver:
 
     def reset(self) -> None:
         self.state = ReceiverState()
+        self._results: Optional[Tuple[VerificationResult, ...]] = None
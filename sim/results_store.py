@@ -0,0 +1,173 @@
+"""SQLite index over the aggregate records in ``results/*.json``.
+
+Every record of an ingested JSON file becomes one row: the fields reports
+filter on (:data:`INDEXED_FIELDS`) are indexed columns and the full record is
+kept as JSON next to them. Reports then ask for exactly the rows they need::
+
+    with ResultsStore() as store:
+        store.ingest_dir("results")
+        rows = store.query(source="results/p_loss_sweep.json", mode="window", sweep_type="p_loss")
+
+instead of scanning every record of a file once per table cell. Ingesting is
+incremental: a file whose size and modification time are unchanged since it
+was last ingested is skipped, and a changed file replaces its old rows.
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_STORE_PATH = Path("results") / "results.sqlite"
+INDEXED_FIELDS = ("mode", "sweep_type", "sweep_value", "p_loss", "p_reorder", "window_size")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    source TEXT NOT NULL REFERENCES sources(path) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    mode TEXT,
+    sweep_type TEXT,
+    sweep_value REAL,
+    p_loss REAL,
+    p_reorder REAL,
+    window_size INTEGER,
+    record TEXT NOT NULL,
+    PRIMARY KEY (source, position)
+);
+CREATE INDEX IF NOT EXISTS records_sweep ON records (source, sweep_type, mode, sweep_value);
+"""
+
+
+def _source_name(path: Path | str) -> str:
+    return str(Path(path).resolve())
+
+
+def _check_field(name: str) -> None:
+    if name not in INDEXED_FIELDS:
+        raise ValueError(f"Unknown field '{name}'. Indexed fields: {', '.join(INDEXED_FIELDS)}")
+
+
+def _where(source: Path | str | None, filters: Dict[str, object]) -> Tuple[List[str], List[object]]:
+    clauses: List[str] = []
+    params: List[object] = []
+    if source is not None:
+        clauses.append("source = ?")
+        params.append(_source_name(source))
+    for name, value in filters.items():
+        _check_field(name)
+        if value is None:
+            clauses.append(f"{name} IS NULL")
+        else:
+            clauses.append(f"{name} = ?")
+            params.append(value)
+    return clauses, params
+
+
+class ResultsStore:
+    """Indexed, queryable copy of aggregate JSON records."""
+
+    def __init__(self, path: Path | str = DEFAULT_STORE_PATH):
+        self.path = Path(path)
+        if str(path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(path))
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.executescript(_SCHEMA)
+        for name in INDEXED_FIELDS:
+            self._db.execute(f"CREATE INDEX IF NOT EXISTS records_{name} ON records ({name})")
+        self._db.commit()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def ingest(self, path: Path | str) -> int:
+        """Load the records of JSON file ``path``; return how many were (re)loaded.
+
+        Unchanged files are skipped (0). A missing file drops its old rows.
+        """
+
+        source = _source_name(path)
+        try:
+            stat = Path(path).stat()
+        except FileNotFoundError:
+            with self._db:
+                self._db.execute("DELETE FROM sources WHERE path = ?", (source,))
+            return 0
+        row = self._db.execute("SELECT size, mtime_ns FROM sources WHERE path = ?", (source,)).fetchone()
+        if row == (stat.st_size, stat.st_mtime_ns):
+            return 0
+
+        with Path(path).open("r", encoding="utf-8") as fh:
+            data = json.load(fh)
+        if not isinstance(data, list):
+            raise ValueError(f"{path} does not hold a list of aggregate records")
+        with self._db:
+            self._db.execute("DELETE FROM sources WHERE path = ?", (source,))
+            self._db.execute(
+                "INSERT INTO sources (path, size, mtime_ns) VALUES (?, ?, ?)",
+                (source, stat.st_size, stat.st_mtime_ns),
+            )
+            self._db.executemany(
+                f"INSERT INTO records (source, position, {', '.join(INDEXED_FIELDS)}, record) "
+                f"VALUES (?, ?, {', '.join('?' for _ in INDEXED_FIELDS)}, ?)",
+                (
+                    (source, position, *(entry.get(name) for name in INDEXED_FIELDS), json.dumps(entry))
+                    for position, entry in enumerate(data)
+                ),
+            )
+        return len(data)
+
+    def ingest_dir(self, directory: Path | str, pattern: str = "*.json") -> int:
+        """Ingest every file in ``directory`` matching ``pattern``."""
+
+        total = 0
+        for path in sorted(Path(directory).glob(pattern)):
+            try:
+                total += self.ingest(path)
+            except ValueError:
+                # Not an aggregate list (e.g. a moments sidecar)
+                continue
+        return total
+
+    def query(self, source: Path | str | None = None, order_by: Optional[str] = None, **filters) -> List[Dict]:
+        """Records matching every ``field=value`` filter, in file order by default.
+
+        ``filters`` and ``order_by`` must name :data:`INDEXED_FIELDS`; a
+        ``None`` filter value matches records without that field.
+        """
+
+        clauses, params = _where(source, filters)
+        if order_by is not None:
+            _check_field(order_by)
+        sql = "SELECT record FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += f" ORDER BY {order_by + ', ' if order_by else ''}source, position"
+        return [json.loads(record) for (record,) in self._db.execute(sql, params)]
+
+    def get(self, source: Path | str | None = None, **filters) -> Optional[Dict]:
+        """The first record matching ``filters``, or ``None``."""
+
+        records = self.query(source, **filters)
+        return records[0] if records else None
+
+    def distinct(self, field: str, source: Path | str | None = None, **filters) -> List:
+        """Sorted distinct non-null values of ``field`` among the matching records."""
+
+        _check_field(field)
+        clauses, params = _where(source, filters)
+        clauses.append(f"{field} IS NOT NULL")
+        sql = f"SELECT DISTINCT {field} FROM records WHERE {' AND '.join(clauses)} ORDER BY {field}"
+        return [value for (value,) in self._db.execute(sql, params)]
@@ -0,0 +1,201 @@
+"""Per-run counters as fixed-width, memory-mappable ``.npy`` columns.
+
+A run-columns directory holds one ``.npy`` file per entry of
+:data:`RUN_COLUMNS` (row ``i`` of every file describes the same run) and a
+``variants.json`` listing the receiver variants the ``variant`` column
+indexes into (mode, channel and attack settings)::
+
+    results/runs/
+        variant.npy  run.npy  seed.npy
+        legit_sent.npy  legit_accepted.npy  attack_attempts.npy  attack_success.npy
+        variants.json
+
+:class:`RunColumnsWriter` is a sink for :func:`run_many_experiments`
+(``run_log=``) that fills fixed-size buffers and appends them to the files.
+:class:`RunColumns` opens the files as :class:`numpy.memmap` views, so
+bootstrap or percentile analysis over very many runs pages data in on demand,
+and :meth:`RunColumns.aggregates` recomputes the :class:`AggregateStats`
+without re-simulating (quantiles are left to :func:`numpy.percentile` on
+:meth:`RunColumns.rates`).
+"""
+from __future__ import annotations
+
+import io
+import json
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .stats import RunningStats
+from .types import AggregateStats, AttackMode, Mode, SimulationRunResult
+
+RUN_COLUMNS = {
+    "variant": np.uint16,
+    "run": np.int64,
+    "seed": np.int64,  # -1 for runs without a scenario seed (batched engine)
+    "legit_sent": np.int32,
+    "legit_accepted": np.int32,
+    "attack_attempts": np.int32,
+    "attack_success": np.int32,
+}
+VARIANTS_FILE = "variants.json"
+# Rows aggregated at a time by RunColumns.aggregates
+_AGGREGATE_CHUNK = 1 << 20
+
+
+def _header(dtype, rows: int) -> bytes:
+    buffer = io.BytesIO()
+    np.lib.format.write_array_header_1_0(
+        buffer,
+        {"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (rows,)},
+    )
+    return buffer.getvalue()
+
+
+class RunColumnsWriter:
+    """Append runs to the ``.npy`` columns of ``directory``.
+
+    The row count is only known at :meth:`close`, which rewrites each file's
+    header in place; until then the files read as empty arrays.
+    """
+
+    def __init__(self, directory: Path | str, buffer_runs: int = 1 << 16):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self.variants: List[Dict[str, object]] = []
+        self._variant_index: Dict[Tuple, int] = {}
+        self._buffers = {name: np.empty(buffer_runs, dtype=dtype) for name, dtype in RUN_COLUMNS.items()}
+        self._filled = 0
+        self._handles: Dict[str, BinaryIO] = {}
+        for name, dtype in RUN_COLUMNS.items():
+            handle = (self.directory / f"{name}.npy").open("wb")
+            handle.write(_header(dtype, 0))
+            self._handles[name] = handle
+
+    def __enter__(self) -> "RunColumnsWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write_run(self, result: SimulationRunResult, run: int, seed: Optional[int]) -> None:
+        """Append run number ``run`` (simulated from scenario ``seed``)."""
+
+        key = (result.mode.value, *sorted(result.metadata.items()))
+        variant = self._variant_index.get(key)
+        if variant is None:
+            variant = self._variant_index[key] = len(self.variants)
+            self.variants.append({"mode": result.mode.value, **result.metadata})
+
+        row, buffers = self._filled, self._buffers
+        buffers["variant"][row] = variant
+        buffers["run"][row] = run
+        buffers["seed"][row] = -1 if seed is None else seed
+        buffers["legit_sent"][row] = result.legit_sent
+        buffers["legit_accepted"][row] = result.legit_accepted
+        buffers["attack_attempts"][row] = result.attack_attempts
+        buffers["attack_success"][row] = result.attack_success
+        self._filled += 1
+        self.count += 1
+        if self._filled == buffers["run"].shape[0]:
+            self._flush()
+
+    def _flush(self) -> None:
+        for name, handle in self._handles.items():
+            self._buffers[name][: self._filled].tofile(handle)
+        self._filled = 0
+
+    def close(self) -> None:
+        if not self._handles:
+            return
+        self._flush()
+        for name, handle in self._handles.items():
+            header = _header(RUN_COLUMNS[name], self.count)
+            # NumPy pads headers so the row count can grow without moving the data
+            if len(header) != len(_header(RUN_COLUMNS[name], 0)):
+                raise ValueError(f"Cannot record {self.count} rows in the header of {name}.npy")
+            handle.seek(0)
+            handle.write(header)
+            handle.close()
+        self._handles = {}
+        payload = {"runs": self.count, "variants": self.variants}
+        (self.directory / VARIANTS_FILE).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+class RunColumns:
+    """Read-only, memory-mapped view of a run-columns directory."""
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory)
+        payload = json.loads((self.directory / VARIANTS_FILE).read_text(encoding="utf-8"))
+        self.variants: List[Dict[str, object]] = payload["variants"]
+        self.columns: Dict[str, np.memmap] = {
+            name: np.load(self.directory / f"{name}.npy", mmap_mode="r") for name in RUN_COLUMNS
+        }
+
+    def __len__(self) -> int:
+        return int(self.columns["run"].shape[0])
+
+    def __getitem__(self, name: str) -> np.memmap:
+        return self.columns[name]
+
+    def rates(self, kind: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Per-run ``"legit"`` or ``"attack"`` rates of rows ``start:stop``."""
+
+        if kind == "legit":
+            num, denom = self.columns["legit_accepted"], self.columns["legit_sent"]
+        elif kind == "attack":
+            num, denom = self.columns["attack_success"], self.columns["attack_attempts"]
+        else:
+            raise ValueError(f"Unknown rate '{kind}'. Valid options: legit, attack")
+        num, denom = num[start:stop], denom[start:stop]
+        return np.divide(num, denom, out=np.zeros(num.shape, dtype=np.float64), where=denom > 0)
+
+    def aggregates(self) -> List[AggregateStats]:
+        """One aggregate per variant, in the order variants first appeared.
+
+        Rows are summed in chunks, so memory does not grow with the run count.
+        """
+
+        moments = [{"legit": RunningStats(), "attack": RunningStats()} for _ in self.variants]
+        # Every run of a variant sends the configured number of legit frames
+        num_legit = [0] * len(self.variants)
+        variant_column = self.columns["variant"]
+        for start in range(0, len(self), _AGGREGATE_CHUNK):
+            stop = start + _AGGREGATE_CHUNK
+            variants = np.asarray(variant_column[start:stop])
+            rates = {kind: self.rates(kind, start, stop) for kind in ("legit", "attack")}
+            for index in np.unique(variants).tolist():
+                selected = variants == index
+                if not moments[index]["legit"].count:
+                    num_legit[index] = int(self.columns["legit_sent"][start + int(np.argmax(selected))])
+                for kind, values in rates.items():
+                    chunk = values[selected]
+                    mean = float(chunk.mean())
+                    summary = RunningStats(int(chunk.size), mean, float(np.sum((chunk - mean) ** 2)))
+                    moments[index][kind] = moments[index][kind].merge(summary)
+
+        aggregates = []
+        for variant, summaries, sent in zip(self.variants, moments, num_legit):
+            mode = Mode(variant["mode"])
+            legit, attack = summaries["legit"], summaries["attack"]
+            aggregates.append(
+                AggregateStats(
+                    mode=mode,
+                    runs=legit.count,
+                    avg_legit_rate=legit.mean,
+                    std_legit_rate=legit.pstdev,
+                    avg_attack_rate=attack.mean,
+                    std_attack_rate=attack.pstdev,
+                    p_loss=variant["p_loss"],
+                    p_reorder=variant["p_reorder"],
+                    window_size=variant["window_size"] if mode is Mode.WINDOW else 0,
+                    num_legit=sent,
+                    num_replay=variant["num_replay"],
+                    attack_mode=AttackMode(variant["attack_mode"]),
+                    moments=summaries,
+                )
+            )
+        return aggregates
@@ -0,0 +1,81 @@
+"""Per-run JSON-lines logs for post-hoc analysis.
+
+:func:`run_many_experiments` aggregates runs on the fly and keeps no per-run
+values. Pass it a :class:`RunLogWriter` (``run_log=``) to also stream every
+simulated run to disk as one compact JSON object per line::
+
+    {"run": 0, "seed": 1102362389, "mode": "window", "legit_sent": 20,
+     "legit_accepted": 17, "attack_attempts": 100, "attack_success": 1,
+     "p_loss": 0.2, "p_reorder": 0.1, "window_size": 5, "attack_mode": "post",
+     "num_replay": 100}
+
+A path ending in ``.gz`` is gzip-compressed. Writes go through a large
+buffer, so logging costs little next to the simulation itself. For very
+large studies, :class:`sim.runcolumns.RunColumnsWriter` stores the same runs
+as memory-mappable ``.npy`` columns instead.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+from .types import SimulationRunResult
+
+# Bytes buffered before a write reaches the file (or the compressor)
+DEFAULT_BUFFER_SIZE = 1 << 20
+
+
+def _open_text(path: Path, mode: str, buffer_size: int = DEFAULT_BUFFER_SIZE) -> IO[str]:
+    if path.suffix == ".gz":
+        raw = gzip.open(path, mode + "b")
+        if mode == "w":
+            raw = io.BufferedWriter(raw, buffer_size)
+        return io.TextIOWrapper(raw, encoding="utf-8")
+    return path.open(mode, encoding="utf-8", buffering=buffer_size)
+
+
+class RunLogWriter:
+    """Buffered writer of one JSON line per simulated run."""
+
+    def __init__(self, path: Path | str, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.count = 0
+        self._handle = _open_text(self.path, "w", buffer_size)
+
+    def __enter__(self) -> "RunLogWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write_run(self, result: SimulationRunResult, run: int, seed: Optional[int]) -> None:
+        """Append run number ``run`` (simulated from scenario ``seed``)."""
+
+        record = {
+            "run": run,
+            "seed": seed,
+            "mode": result.mode.value,
+            "legit_sent": result.legit_sent,
+            "legit_accepted": result.legit_accepted,
+            "attack_attempts": result.attack_attempts,
+            "attack_success": result.attack_success,
+            **result.metadata,
+        }
+        self._handle.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.count += 1
+
+    def close(self) -> None:
+        self._handle.close()
+
+
+def read_run_log(path: Path | str) -> Iterator[dict]:
+    """Yield the records of a run log one at a time."""
+
+    with _open_text(Path(path), "r") as handle:
+        for line in handle:
+            if line.strip():
+                yield json.loads(line)
@@ -1,17 +1,19 @@
 """Security primitives used by the defensive protocol variants."""
 from __future__ import annotations
 
+import contextlib
+import functools
 import hmac
 import hashlib
-from typing import Optional
+from collections import OrderedDict
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 
 
-def compute_mac(token: int | str, command: str, key: str, mac_length: int = 8) -> str:
-    """Return a truncated hexadecimal HMAC over a token and command."""
+DEFAULT_MAC_CACHE_SIZE = 4096
 
-    if token is None:
-        raise ValueError("Token is required to compute a MAC")
 
+def _hmac_hex(token: int | str, command: str, key: str, mac_length: int) -> str:
     message = f"{token}|{command}".encode("utf-8")
     mac = hmac.new(key.encode("utf-8"), message, hashlib.sha256).hexdigest()
     if mac_length <= 0:
@@ -19,9 +21,210 @@ def compute_mac(token: int | str, command: str, key: str, mac_length: int = 8) -
     return mac[:mac_length]
 
 
+# typed=True keeps e.g. token 1 and token True apart: they hash equal but
+# format differently into the MAC message.
+_cached_hmac_hex = functools.lru_cache(maxsize=DEFAULT_MAC_CACHE_SIZE, typed=True)(_hmac_hex)
+
+
+def compute_mac(token: int | str, command: str, key: str, mac_length: int = 8) -> str:
+    """Return a truncated hexadecimal HMAC over a token and command.
+
+    Results are memoized in a bounded LRU cache (see :func:`configure_mac_cache`),
+    so frames the receiver has already verified, such as replays, do not pay
+    for a second HMAC.
+    """
+
+    if token is None:
+        raise ValueError("Token is required to compute a MAC")
+    return _cached_hmac_hex(token, command, key, mac_length)
+
+
+def configure_mac_cache(maxsize: int = DEFAULT_MAC_CACHE_SIZE) -> None:
+    """Replace the MAC cache with an empty one holding at most ``maxsize`` entries.
+
+    ``maxsize=0`` disables memoization (every call is counted as a miss).
+    """
+
+    global _cached_hmac_hex
+    if maxsize < 0:
+        raise ValueError("maxsize must be >= 0")
+    _cached_hmac_hex = functools.lru_cache(maxsize=maxsize, typed=True)(_hmac_hex)
+
+
+@contextlib.contextmanager
+def scoped_mac_cache(maxsize: int) -> Iterator[None]:
+    """Use an empty MAC cache of ``maxsize`` entries inside the ``with`` block.
+
+    The previous cache, with its entries and counters, is restored on exit.
+    """
+
+    global _cached_hmac_hex
+    previous = _cached_hmac_hex
+    configure_mac_cache(maxsize)
+    try:
+        yield
+    finally:
+        _cached_hmac_hex = previous
+
+
+def mac_cache_info() -> Dict[str, int]:
+    """Return hit/miss counters and occupancy of the MAC cache.
+
+    Only :func:`compute_mac` goes through the cache; :meth:`MacTable.lookup`
+    answers from its table without touching these counters and only falls
+    back to :func:`compute_mac` (and so to the cache) for MACs it lacks.
+    """
+
+    info = _cached_hmac_hex.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "maxsize": info.maxsize or 0,
+        "currsize": info.currsize,
+    }
+
+
+def clear_mac_cache() -> None:
+    """Drop all cached MACs and reset the hit/miss counters."""
+
+    _cached_hmac_hex.cache_clear()
+
+
 def constant_time_compare(a: Optional[str], b: Optional[str]) -> bool:
     """Wrapper that safely compares two MAC strings, handling missing values."""
 
     if a is None or b is None:
         return False
     return hmac.compare_digest(a, b)
+
+
+# Tables attached by this process, keyed by shared-memory block name. Workers
+# receive the same table with every task, so it is decoded once per process.
+# Long-lived pools see a new table per experiment, so only the most recently
+# used ones are kept.
+MAX_ATTACHED_TABLES = 4
+_ATTACHED_TABLES: "OrderedDict[str, Dict[Tuple[int, str], str]]" = OrderedDict()
+
+
+class MacTable:
+    """Precomputed MACs for every (counter, command) pair of an experiment.
+
+    With a fixed shared key the same ``compute_mac(counter, command)`` values
+    recur in every run and every mode, so they are computed once up front.
+    :meth:`lookup` has the same signature as :func:`compute_mac` and falls back
+    to it for anything outside the table (other keys or MAC lengths, nonces,
+    counters beyond ``max_token``).
+
+    After :meth:`share`, the packed MACs live in a shared-memory block and a
+    pickled table only carries the block name; process-pool workers attach to
+    the block instead of receiving or recomputing the MACs.
+    """
+
+    def __init__(self, key: str, mac_length: int, commands: Iterable[str], max_token: int):
+        self.key = key
+        self.mac_length = mac_length
+        self.commands = list(dict.fromkeys(commands))
+        self.max_token = max_token
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._macs: Dict[Tuple[int, str], str] = {
+            (token, command): compute_mac(token, command, key=key, mac_length=mac_length)
+            for token in range(max_token + 1)
+            for command in self.commands
+        }
+
+    @classmethod
+    def for_config(cls, config) -> "MacTable":
+        """Build the table covering every counter and command ``config`` can produce."""
+
+        commands = list(config.effective_command_set())
+        if config.command_sequence:
+            commands.extend(config.command_sequence)
+        return cls(config.shared_key, config.mac_length, commands, max_token=config.num_legit)
+
+    @property
+    def width(self) -> int:
+        return self.mac_length if 0 < self.mac_length <= 64 else 64
+
+    def lookup(self, token: int | str, command: str, key: str, mac_length: int = 8) -> str:
+        if key == self.key and mac_length == self.mac_length:
+            mac = self._macs.get((token, command))  # type: ignore[arg-type]
+            if mac is not None:
+                return mac
+        return compute_mac(token, command, key=key, mac_length=mac_length)
+
+    def __len__(self) -> int:
+        return len(self._macs)
+
+    def share(self) -> str:
+        """Copy the packed MACs into shared memory and return the block name."""
+
+        if self._shm is None:
+            packed = self._pack()
+            self._shm = shared_memory.SharedMemory(create=True, size=max(1, len(packed)))
+            self._shm.buf[:len(packed)] = packed
+        return self._shm.name
+
+    def close(self) -> None:
+        """Release the shared-memory block created by :meth:`share`."""
+
+        if self._shm is not None:
+            _ATTACHED_TABLES.pop(self._shm.name, None)
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def _pack(self) -> bytes:
+        return b"".join(
+            self._macs[(token, command)].encode("ascii")
+            for token in range(self.max_token + 1)
+            for command in self.commands
+        )
+
+    def _unpack(self, buffer: memoryview) -> Dict[Tuple[int, str], str]:
+        width = self.width
+        macs: Dict[Tuple[int, str], str] = {}
+        offset = 0
+        for token in range(self.max_token + 1):
+            for command in self.commands:
+                macs[(token, command)] = bytes(buffer[offset:offset + width]).decode("ascii")
+                offset += width
+        return macs
+
+    def __getstate__(self) -> dict:
+        state = {
+            "key": self.key,
+            "mac_length": self.mac_length,
+            "commands": self.commands,
+            "max_token": self.max_token,
+        }
+        if self._shm is not None:
+            state["shm_name"] = self._shm.name
+        else:
+            state["macs"] = self._macs
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.key = state["key"]
+        self.mac_length = state["mac_length"]
+        self.commands = state["commands"]
+        self.max_token = state["max_token"]
+        self._shm = None
+        if "macs" in state:
+            self._macs = state["macs"]
+            return
+        name = state["shm_name"]
+        macs = _ATTACHED_TABLES.get(name)
+        if macs is None:
+            macs = _ATTACHED_TABLES[name] = self._attach(name)
+            while len(_ATTACHED_TABLES) > MAX_ATTACHED_TABLES:
+                _ATTACHED_TABLES.popitem(last=False)
+        else:
+            _ATTACHED_TABLES.move_to_end(name)
+        self._macs = macs
+
+    def _attach(self, name: str) -> Dict[Tuple[int, str], str]:
+        block = shared_memory.SharedMemory(name=name)
+        try:
+            return self._unpack(block.buf)
+        finally:
+            block.close()
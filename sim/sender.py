@@ -2,10 +2,14 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Sequence
 
-from .security import compute_mac
+from .security import MacTable, compute_mac
 from .types import Frame, Mode
 
+if TYPE_CHECKING:
+    from .framebatch import FrameBatch
+
 
 @dataclass
 class Sender:
@@ -13,6 +17,12 @@ class Sender:
     shared_key: str
     mac_length: int = 8
     tx_counter: int = 0
+    mac_table: Optional[MacTable] = None
+
+    def _mac(self, token: int | str, command: str) -> str:
+        if self.mac_table is not None:
+            return self.mac_table.lookup(token, command, key=self.shared_key, mac_length=self.mac_length)
+        return compute_mac(token, command, key=self.shared_key, mac_length=self.mac_length)
 
     def next_frame(self, command: str, *, nonce: str | None = None) -> Frame:
         if self.mode is Mode.NO_DEFENSE:
@@ -21,12 +31,38 @@ class Sender:
         if self.mode is Mode.CHALLENGE:
             if nonce is None:
                 raise ValueError("Challenge mode requires a nonce for each frame")
-            mac = compute_mac(nonce, command, key=self.shared_key, mac_length=self.mac_length)
+            mac = self._mac(nonce, command)
             return Frame(command=command, nonce=nonce, mac=mac)
 
         self.tx_counter += 1
-        mac = compute_mac(self.tx_counter, command, key=self.shared_key, mac_length=self.mac_length)
+        mac = self._mac(self.tx_counter, command)
         return Frame(command=command, counter=self.tx_counter, mac=mac)
 
+    def next_batch(
+        self,
+        commands: Sequence[str],
+        *,
+        nonces: Optional[Sequence[str]] = None,
+        command_table: Optional[Sequence[str]] = None,
+    ) -> "FrameBatch":
+        """The frames of ``next_frame`` for each command in turn, as one batch."""
+
+        from .framebatch import FrameBatch
+
+        count = len(commands)
+        counters = [None] * count
+        macs = [None] * count
+        if self.mode is Mode.CHALLENGE:
+            if nonces is None or len(nonces) != count:
+                raise ValueError("Challenge mode requires a nonce for each frame")
+            macs = [self._mac(nonce, command) for nonce, command in zip(nonces, commands)]
+        elif self.mode is not Mode.NO_DEFENSE:
+            counters = list(range(self.tx_counter + 1, self.tx_counter + count + 1))
+            self.tx_counter += count
+            macs = [self._mac(counter, command) for counter, command in zip(counters, commands)]
+        return FrameBatch.from_columns(
+            commands, counters, macs, nonces if self.mode is Mode.CHALLENGE else None, command_table=command_table
+        )
+
     def reset(self) -> None:
         self.tx_counter = 0
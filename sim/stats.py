@@ -0,0 +1,208 @@
+"""Mergeable, constant-memory summaries of per-run rates.
+
+:class:`RunningStats` keeps Welford's running count, mean and sum of squared
+deviations of a set of per-run rates. Two summaries of disjoint runs merge
+into the summary of their union (Chan et al.), which is what lets a stored
+result be extended with more runs without re-simulating the ones it already
+has. :class:`P2Quantile` estimates one quantile of a stream with five markers
+(Jain and Chlamtac's P² algorithm).
+"""
+from __future__ import annotations
+
+import dataclasses
+import json
+import math
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+from .types import AggregateStats
+
+
+@dataclass
+class RunningStats:
+    """Welford accumulator: count, mean and sum of squared deviations (``m2``)."""
+
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+
+    @classmethod
+    def from_values(cls, values: Iterable[float]) -> "RunningStats":
+        stats = cls()
+        for value in values:
+            stats.add(value)
+        return stats
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        count = self.count + other.count
+        if not count:
+            return RunningStats()
+        delta = other.mean - self.mean
+        mean = self.mean + delta * other.count / count
+        return RunningStats(count, mean, self.m2 + other.m2 + delta * delta * self.count * other.count / count)
+
+    @property
+    def pstdev(self) -> float:
+        """Population standard deviation, like :func:`statistics.pstdev`."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(max(0.0, self.m2 / self.count))
+
+    @property
+    def stdev(self) -> float:
+        """Sample standard deviation, like :func:`statistics.stdev`."""
+        if self.count < 2:
+            return 0.0
+        return math.sqrt(max(0.0, self.m2 / (self.count - 1)))
+
+    def as_dict(self) -> Dict[str, float | int]:
+        return {"count": self.count, "mean": self.mean, "m2": self.m2}
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, float | int]) -> "RunningStats":
+        count = int(record["count"])
+        if "m2" in record:
+            return cls(count, float(record["mean"]), float(record["m2"]))
+        # Older sidecars stored the sum and sum of squares
+        mean = float(record["sum"]) / count if count else 0.0
+        return cls(count, mean, max(0.0, float(record["sum_sq"]) - float(record["sum"]) * mean))
+
+
+class P2Quantile:
+    """Streaming estimate of the ``p`` quantile in constant memory.
+
+    The first five values are kept and the estimate is exact (linear
+    interpolation, like :func:`numpy.percentile`); after that five markers
+    track the minimum, the ``p/2``, ``p`` and ``(1+p)/2`` quantiles and the
+    maximum, and are moved with piecewise-parabolic interpolation.
+    """
+
+    __slots__ = ("p", "heights", "positions", "desired", "increments")
+
+    def __init__(self, p: float):
+        if not 0.0 < p < 1.0:
+            raise ValueError("p must be between 0 and 1")
+        self.p = p
+        self.heights: List[float] = []
+        self.positions = [0, 1, 2, 3, 4]
+        self.desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self.increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def add(self, value: float) -> None:
+        heights = self.heights
+        if len(heights) < 5:
+            heights.append(value)
+            if len(heights) == 5:
+                heights.sort()
+            return
+
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = 0
+            while value >= heights[cell + 1]:
+                cell += 1
+        positions, desired = self.positions, self.desired
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            desired[i] += self.increments[i]
+
+        for i in (1, 2, 3):
+            offset = desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or (
+                offset <= -1 and positions[i - 1] - positions[i] < -1
+            ):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = heights[i] + step * (heights[i + step] - heights[i]) / (positions[i + step] - positions[i])
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        """Current estimate (0.0 before any value was added)."""
+        if len(self.heights) == 5 and self.positions[4] > 4:
+            return self.heights[2]
+        values = sorted(self.heights)
+        if not values:
+            return 0.0
+        rank = self.p * (len(values) - 1)
+        low = int(rank)
+        high = min(low + 1, len(values) - 1)
+        return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+# AggregateStats field -> quantile of the per-run attack success rate
+ATTACK_QUANTILES = {"p5_attack_rate": 0.05, "median_attack_rate": 0.5, "p95_attack_rate": 0.95}
+
+
+def attack_quantile_sketches() -> Dict[str, P2Quantile]:
+    return {name: P2Quantile(p) for name, p in ATTACK_QUANTILES.items()}
+
+
+def merge_aggregate(previous: Dict[str, RunningStats], update: AggregateStats) -> AggregateStats:
+    """Combine the stored moments of earlier runs with a newly simulated ``update``.
+
+    ``previous`` maps ``"legit"`` and ``"attack"`` to the summaries of the
+    earlier runs; ``update`` must carry the moments of the new runs only.
+    Quantile sketches do not merge, so the result reports no quantiles.
+    """
+
+    legit = previous["legit"].merge(update.moments["legit"])
+    attack = previous["attack"].merge(update.moments["attack"])
+    return dataclasses.replace(
+        update,
+        runs=legit.count,
+        avg_legit_rate=legit.mean,
+        std_legit_rate=legit.pstdev,
+        avg_attack_rate=attack.mean,
+        std_attack_rate=attack.pstdev,
+        moments={"legit": legit, "attack": attack},
+        **{name: None for name in ATTACK_QUANTILES},
+    )
+
+
+def moments_path(output_json: Path | str) -> Path:
+    """Sidecar file that stores the moments of ``output_json``'s aggregates."""
+
+    path = Path(output_json)
+    return path.with_name(f"{path.stem}.moments.json")
+
+
+def save_moments(path: Path | str, experiment: str, stats: List[AggregateStats]) -> None:
+    """Write the moments of ``stats`` (in order) tagged with the experiment fingerprint."""
+
+    payload = {
+        "experiment": experiment,
+        "entries": [{name: summary.as_dict() for name, summary in entry.moments.items()} for entry in stats],
+    }
+    Path(path).write_text(json.dumps(payload, indent=2), encoding="utf-8")
+
+
+def load_moments(path: Path | str) -> Tuple[str, List[Dict[str, RunningStats]]]:
+    payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    entries = [
+        {name: RunningStats.from_dict(summary) for name, summary in entry.items()}
+        for entry in payload["entries"]
+    ]
+    return payload["experiment"], entries
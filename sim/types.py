@@ -1,9 +1,10 @@
 """Typed data structures shared across the simulation package."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
+from array import array
+from dataclasses import dataclass, field, fields
 from enum import Enum
-from typing import Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Sequence
 
 
 class Mode(str, Enum):
@@ -22,9 +23,13 @@ class AttackMode(str, Enum):
     INLINE = "inline"
 
 
-@dataclass
+@dataclass(slots=True)
 class Frame:
-    """Simplified abstraction of an RF control frame."""
+    """Simplified abstraction of an RF control frame.
+
+    Frames are slotted (no per-instance ``__dict__``); use
+    :class:`sim.framebatch.FrameBatch` to hold many frames as columns.
+    """
 
     command: str
     counter: Optional[int] = None
@@ -48,8 +53,9 @@ class ReceiverState:
 
     last_counter: int = -1
     expected_nonce: Optional[str] = None
-    # Bitmask for sliding window: bit 0 is last_counter, bit 1 is last_counter-1, etc.
-    received_mask: int = 0
+    # Sliding-window replay bitmap (RFC 6479 style): 64-bit blocks indexed by
+    # counter, so its size depends only on the window size, never on the counter.
+    window_blocks: array = field(default_factory=lambda: array("Q"))
 
 
 @dataclass
@@ -124,7 +130,14 @@ class AggregateStats:
     num_legit: int
     num_replay: int
     attack_mode: AttackMode
+    # Streaming (P²) quantiles of the per-run attack success rate; None when not sampled
+    p5_attack_rate: Optional[float] = None
+    median_attack_rate: Optional[float] = None
+    p95_attack_rate: Optional[float] = None
     metadata: Dict[str, float | int] = field(default_factory=dict)  # For performance metrics
+    # Sufficient statistics of the per-run rates ("legit"/"attack" -> sim.stats.RunningStats);
+    # kept out of as_dict() so JSON records are unchanged
+    moments: Dict[str, Any] = field(default_factory=dict, repr=False, compare=False)
 
     def as_dict(self) -> Dict[str, float | int | str]:
         result = {
@@ -141,6 +154,23 @@ class AggregateStats:
             "num_replay": self.num_replay,
             "attack_mode": self.attack_mode.value,
         }
+        if self.median_attack_rate is not None:
+            result.update(
+                p5_attack_rate=self.p5_attack_rate,
+                median_attack_rate=self.median_attack_rate,
+                p95_attack_rate=self.p95_attack_rate,
+            )
         if self.metadata:
             result.update(self.metadata)
         return result
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, float | int | str]) -> "AggregateStats":
+        """Inverse of :meth:`as_dict`; unknown keys are kept as metadata."""
+
+        names = {f.name for f in fields(cls)} - {"metadata", "moments"}
+        values = {name: record[name] for name in names if name in record}
+        values["mode"] = Mode(values["mode"])
+        values["attack_mode"] = AttackMode(values["attack_mode"])
+        metadata = {key: value for key, value in record.items() if key not in names}
+        return cls(metadata=metadata, **values)
@@ -0,0 +1,8 @@
+from sim.types import Mode, SimulationConfig
+
+
+def make_config(mode=Mode.NO_DEFENSE, **overrides):
+    """A small, quick configuration; ``overrides`` replace any of its fields."""
+    params = dict(mode=mode, num_legit=10, num_replay=10, p_loss=0.2, p_reorder=0.2, window_size=3)
+    params.update(overrides)
+    return SimulationConfig(**params)
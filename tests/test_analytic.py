@@ -0,0 +1,101 @@
+import functools
+
+import numpy as np
+import pytest
+from sim.analytic import analyze
+from sim.batched import simulate_batch
+from sim.experiment import run_many_experiments
+from sim.types import AttackMode, Mode
+from tests.conftest import make_config
+
+
+make_config = functools.partial(make_config, num_legit=8, num_replay=20, p_reorder=0.3)
+
+
+def test_no_defense_matches_binomial():
+    config = make_config(Mode.NO_DEFENSE)
+    result = analyze(config)
+    q = 1 - config.p_loss
+    assert result.avg_legit_rate == pytest.approx(q)
+    assert result.var_legit_rate == pytest.approx(q * (1 - q) / config.num_legit)
+    assert result.avg_attack_rate == pytest.approx(q)
+    assert result.var_attack_rate == pytest.approx(q * (1 - q) / config.num_replay)
+
+
+def test_rolling_without_reorder_accepts_every_delivered_frame():
+    config = make_config(Mode.ROLLING_MAC, p_reorder=0.0)
+    result = analyze(config, tolerance=0)
+    assert result.avg_legit_rate == pytest.approx(0.8)
+    assert result.var_legit_rate == pytest.approx(0.8 * 0.2 / config.num_legit)
+    assert result.metadata["truncated_mass"] == 0
+
+
+@pytest.mark.parametrize("mode", [Mode.ROLLING_MAC, Mode.WINDOW])
+@pytest.mark.parametrize("attack_mode", [AttackMode.POST_RUN, AttackMode.INLINE])
+def test_agrees_with_monte_carlo(mode, attack_mode):
+    config = make_config(mode, attack_mode=attack_mode, inline_attack_probability=0.5, inline_attack_burst=2)
+    exact = analyze(config)
+    batch = simulate_batch(config, runs=40000, rng=np.random.default_rng(2))
+
+    # Standard errors are below 0.0015 here; allow ~4 sigma
+    assert exact.avg_legit_rate == pytest.approx(batch.legit_accept_rate.mean(), abs=0.006)
+    assert exact.avg_attack_rate == pytest.approx(batch.attack_success_rate.mean(), abs=0.006)
+    assert exact.std_legit_rate == pytest.approx(batch.legit_accept_rate.std(), abs=0.006)
+    assert exact.std_attack_rate == pytest.approx(batch.attack_success_rate.std(), abs=0.006)
+
+
+def test_truncation_is_bounded_by_reported_mass():
+    config = make_config(Mode.WINDOW)
+    full = analyze(config, tolerance=0)
+    truncated = analyze(config, tolerance=1e-6, max_truncated_mass=1.0)
+    bound = truncated.metadata["truncated_mass"] + 1e-12
+    assert full.metadata["truncated_mass"] == 0
+    assert abs(full.avg_legit_rate - truncated.avg_legit_rate) <= bound
+    assert abs(full.avg_attack_rate - truncated.avg_attack_rate) <= bound
+
+
+def test_selective_replay_with_command_sequence():
+    config = make_config(
+        Mode.NO_DEFENSE, command_sequence=["FWD", "STOP"], target_commands=["STOP"], p_loss=0.0
+    )
+    result = analyze(config)
+    assert result.avg_attack_rate == pytest.approx(1.0)
+
+
+def test_unsupported_configurations():
+    with pytest.raises(ValueError):
+        analyze(make_config(Mode.CHALLENGE))
+    with pytest.raises(ValueError):
+        analyze(make_config(Mode.ROLLING_MAC, attacker_record_loss=0.1))
+    with pytest.raises(ValueError):
+        analyze(make_config(Mode.ROLLING_MAC, target_commands=["STOP"]))
+    with pytest.raises(ValueError):
+        analyze(make_config(Mode.WINDOW), max_states=10)
+
+
+def test_run_many_experiments_analytic_engine():
+    config = make_config(Mode.NO_DEFENSE)
+    stats = run_many_experiments(
+        config, [Mode.NO_DEFENSE, Mode.ROLLING_MAC], runs=100, show_progress=False, engine="analytic"
+    )
+    assert [s.runs for s in stats] == [0, 0]
+    assert stats[0].metadata["engine"] == "analytic"
+    assert all("truncated_mass" in s.metadata and "peak_states" in s.metadata for s in stats)
+    assert stats[1].avg_legit_rate == pytest.approx(analyze(make_config(Mode.ROLLING_MAC)).avg_legit_rate)
+
+
+def test_aggregate_keeps_solver_metadata():
+    config = make_config(Mode.WINDOW)
+    result = analyze(config, tolerance=1e-6, max_truncated_mass=1.0)
+    stats = result.aggregate(config)
+    assert stats.runs == 0
+    assert stats.metadata == result.metadata
+    assert stats.metadata["truncated_mass"] > 0
+    assert stats.as_dict()["truncated_mass"] == result.metadata["truncated_mass"]
+
+
+def test_excess_truncated_mass_is_rejected():
+    config = make_config(Mode.WINDOW)
+    mass = analyze(config, tolerance=1e-6, max_truncated_mass=1.0).metadata["truncated_mass"]
+    with pytest.raises(ValueError, match="discarded"):
+        analyze(config, tolerance=1e-6, max_truncated_mass=mass / 2)
@@ -0,0 +1,75 @@
+import functools
+
+import numpy as np
+import pytest
+from sim.batched import simulate_batch
+from sim.experiment import run_many_experiments
+from sim.types import AttackMode, Mode
+from tests.conftest import make_config
+
+
+make_config = functools.partial(make_config, num_legit=20, num_replay=20, p_loss=0.0, p_reorder=0.0)
+
+
+def test_ideal_channel_counters():
+    rolling = simulate_batch(make_config(Mode.ROLLING_MAC), runs=50, rng=np.random.default_rng(0))
+    assert (rolling.legit_accepted == 20).all()
+    assert (rolling.attack_attempts == 20).all()
+    assert (rolling.attack_success == 0).all()
+
+    no_def = simulate_batch(make_config(Mode.NO_DEFENSE), runs=50, rng=np.random.default_rng(0))
+    assert (no_def.attack_success == 20).all()
+
+
+def test_lost_tail_frame_can_be_replayed_once():
+    # With heavy loss the attacker (who records before the channel) often holds
+    # counters the receiver never saw; rolling accepts each at most once.
+    config = make_config(Mode.ROLLING_MAC, p_loss=0.5)
+    batch = simulate_batch(config, runs=2000, rng=np.random.default_rng(1))
+    assert batch.attack_success.max() <= config.num_legit
+    assert batch.attack_success.mean() > 0
+
+
+def test_seeded_generator_is_reproducible():
+    config = make_config(Mode.WINDOW, p_loss=0.2, p_reorder=0.3)
+    a = simulate_batch(config, runs=100, rng=np.random.default_rng(5))
+    b = simulate_batch(config, runs=100, rng=np.random.default_rng(5))
+    assert np.array_equal(a.legit_accepted, b.legit_accepted)
+    assert np.array_equal(a.attack_success, b.attack_success)
+
+
+@pytest.mark.parametrize("mode", [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW])
+@pytest.mark.parametrize("attack_mode", [AttackMode.POST_RUN, AttackMode.INLINE])
+def test_agrees_with_scalar_engine(mode, attack_mode):
+    config = make_config(
+        mode,
+        attack_mode=attack_mode,
+        p_loss=0.15,
+        p_reorder=0.3,
+        attacker_record_loss=0.1,
+        inline_attack_burst=2,
+    )
+    batched = simulate_batch(config, runs=20000, rng=np.random.default_rng(11)).aggregate(config)
+    scalar = run_many_experiments(config, [mode], runs=1500, seed=11, show_progress=False)[0]
+
+    # Scalar standard error is at most ~0.01 here; allow ~4 sigma
+    assert batched.avg_legit_rate == pytest.approx(scalar.avg_legit_rate, abs=0.02)
+    assert batched.avg_attack_rate == pytest.approx(scalar.avg_attack_rate, abs=0.03)
+
+
+def test_run_many_experiments_batched_engine():
+    stats = run_many_experiments(
+        make_config(Mode.NO_DEFENSE, p_loss=0.1),
+        [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW],
+        runs=500,
+        seed=3,
+        show_progress=False,
+        engine="batched",
+    )
+    assert [s.runs for s in stats] == [500, 500, 500]
+    assert stats[0].metadata["engine"] == "batched"
+
+
+def test_challenge_mode_not_supported():
+    with pytest.raises(ValueError):
+        simulate_batch(make_config(Mode.CHALLENGE), runs=10)
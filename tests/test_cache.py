@@ -0,0 +1,67 @@
+from sim import experiment
+from sim.cache import ResultCache, cache_key
+from sim.experiment import run_many_experiments
+from sim.types import AggregateStats, Mode
+from tests.conftest import make_config
+
+MODES = [Mode.ROLLING_MAC, Mode.WINDOW]
+
+
+def test_from_dict_round_trips():
+    stats = run_many_experiments(make_config(), MODES, runs=5, seed=1, show_progress=False)
+    assert [AggregateStats.from_dict(entry.as_dict()) for entry in stats] == stats
+
+
+def test_hit_returns_stored_aggregates(tmp_path, monkeypatch):
+    cache = ResultCache(tmp_path)
+    first = run_many_experiments(make_config(), MODES, runs=8, seed=2, show_progress=False, cache=cache)
+    assert len(list(tmp_path.glob("*.json"))) == 1
+
+    # A hit must not simulate at all
+    monkeypatch.setattr(experiment, "_make_buckets", None)
+    second = run_many_experiments(make_config(), MODES, runs=8, seed=2, show_progress=False, cache=cache)
+    assert second == first
+
+
+def test_key_covers_experiment_fields(tmp_path):
+    cache = ResultCache(tmp_path)
+    for kwargs in (dict(seed=3), dict(seed=4), dict(seed=3, runs=9), dict(seed=3, engine="lockstep")):
+        kwargs.setdefault("runs", 8)
+        run_many_experiments(make_config(), MODES, show_progress=False, cache=cache, **kwargs)
+    run_many_experiments(make_config(p_loss=0.3), MODES, runs=8, seed=3, show_progress=False, cache=cache)
+    assert len(list(tmp_path.glob("*.json"))) == 5
+
+    assert cache_key(config=make_config(), seed=1) == cache_key(config=make_config(), seed=1)
+    assert cache_key(config=make_config(), seed=1) != cache_key(config=make_config(window_size=4), seed=1)
+
+
+def test_unseeded_runs_are_not_cached(tmp_path):
+    cache = ResultCache(tmp_path)
+    run_many_experiments(make_config(), MODES, runs=4, seed=None, show_progress=False, cache=cache)
+    assert not list(tmp_path.glob("*.json"))
+
+
+def test_corrupt_entry_is_recomputed(tmp_path):
+    cache = ResultCache(tmp_path)
+    first = run_many_experiments(make_config(), MODES, runs=6, seed=5, show_progress=False, cache=cache)
+    (entry,) = tmp_path.glob("*.json")
+    entry.write_text("{not json", encoding="utf-8")
+
+    again = run_many_experiments(make_config(), MODES, runs=6, seed=5, show_progress=False, cache=cache)
+    assert [s.avg_attack_rate for s in again] == [s.avg_attack_rate for s in first]
+    assert cache.get(entry.stem) is not None
+
+
+def test_eviction_drops_least_recently_used(tmp_path):
+    stats = run_many_experiments(make_config(), MODES, runs=4, seed=6, show_progress=False)
+    probe = ResultCache(tmp_path / "probe")
+    probe.put("probe", stats)
+    entry_size = (tmp_path / "probe" / "probe.json").stat().st_size
+
+    cache = ResultCache(tmp_path / "lru", max_bytes=2 * entry_size)
+    cache.put("a", stats)
+    cache.put("b", stats)
+    assert cache.get("a") is not None  # refresh "a"
+    cache.put("c", stats)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from sim.channel import CalendarChannel, Channel, CommonRandomChannels
+from sim.types import Frame
+
+
+def deliveries(channel, frames):
+    arrived = [[frame.counter for frame in channel.send(frame)] for frame in frames]
+    return arrived, [frame.counter for frame in channel.flush()]
+
+
+@pytest.mark.parametrize("p_loss,p_reorder", [(0.0, 0.0), (0.3, 0.0), (0.0, 0.5), (0.2, 0.3), (0.1, 1.0)])
+def test_calendar_channel_matches_heap_channel(p_loss, p_reorder):
+    frames = [Frame(command="FWD", counter=i) for i in range(500)]
+    expected = deliveries(Channel(p_loss, p_reorder, random.Random(4)), frames)
+    assert deliveries(CalendarChannel(p_loss, p_reorder, random.Random(4)), frames) == expected
+
+
+def test_frames_due_on_the_same_tick_keep_send_order():
+    channel = CalendarChannel(p_loss=0.0, p_reorder=0.0, rng=random.Random(0))
+    frames = [Frame(command="FWD", counter=i) for i in range(4)]
+    assert channel.transmit(frames[0], lost=False, delay=3) == []
+    assert channel.transmit(frames[1], lost=False, delay=2) == []
+    assert channel.transmit(frames[2], lost=True, delay=0) == []
+    assert channel.transmit(frames[3], lost=False, delay=0) == frames[:2] + frames[3:]
+    assert channel.in_flight == 0
+
+    with pytest.raises(ValueError):
+        channel.transmit(frames[0], lost=False, delay=4)
+
+
+def test_reset_drops_frames_in_flight():
+    channel = CalendarChannel(p_loss=0.0, p_reorder=1.0, rng=random.Random(1))
+    channel.send(Frame(command="FWD", counter=1))
+    channel.reset(random.Random(1))
+    assert channel.in_flight == 0
+    assert channel.flush() == []
+
+
+def test_common_random_channels_use_calendar_queues():
+    channels = CommonRandomChannels([(0.1, 0.0), (0.1, 0.4)], rng=random.Random(2))
+    assert all(isinstance(channel, CalendarChannel) for channel in channels.channels)
@@ -0,0 +1,131 @@
+import random
+
+import pytest
+
+from sim.attacker import Attacker
+from sim.channel import CalendarChannel, Channel
+from sim.framebatch import FrameBatch
+from sim.receiver import Receiver
+from sim.sender import Sender
+from sim.types import Frame, Mode
+
+KEY = "batch_key"
+COMMANDS = ["FWD", "BACK", "STOP"]
+
+
+def make_commands(count, seed=0):
+    rng = random.Random(seed)
+    return [rng.choice(COMMANDS) for _ in range(count)]
+
+
+def test_frame_has_no_instance_dict():
+    frame = Frame(command="FWD", counter=1)
+    assert not hasattr(frame, "__dict__")
+    frame.is_attack = True
+    assert frame.clone() == frame
+
+
+def test_round_trip_keeps_missing_fields():
+    frames = [
+        Frame(command="FWD", counter=3, mac="abcd1234"),
+        Frame(command="STOP"),
+        Frame(command="FWD", nonce="00ff", mac="beef", is_attack=True),
+    ]
+    batch = FrameBatch.from_frames(frames)
+    assert batch.commands == ("FWD", "STOP")
+    assert batch.command.tolist() == [0, 1, 0]
+    assert batch.counter.tolist() == [3, -1, -1]
+    assert batch.to_frames() == frames
+    assert batch[2] == frames[2]
+    assert batch.take([2, 0], is_attack=False).to_frames() == [
+        Frame(command="FWD", nonce="00ff", mac="beef"),
+        frames[0],
+    ]
+
+
+def test_unknown_command_is_rejected():
+    with pytest.raises(ValueError):
+        FrameBatch.from_frames([Frame(command="JUMP")], command_table=COMMANDS)
+
+
+@pytest.mark.parametrize("mode", list(Mode))
+def test_sender_batch_matches_frames(mode):
+    commands = make_commands(12)
+    nonces = [f"{i:04x}" for i in range(12)] if mode is Mode.CHALLENGE else None
+    single = Sender(mode=mode, shared_key=KEY)
+    expected = [single.next_frame(c, nonce=n) for c, n in zip(commands, nonces or [None] * 12)]
+    batched = Sender(mode=mode, shared_key=KEY)
+    batch = batched.next_batch(commands, nonces=nonces, command_table=COMMANDS)
+    assert batch.to_frames() == expected
+    assert batched.tx_counter == single.tx_counter
+
+
+def test_channel_batch_matches_per_frame_sends():
+    batch = Sender(mode=Mode.WINDOW, shared_key=KEY).next_batch(make_commands(200))
+    frames = batch.to_frames()
+
+    single = Channel(p_loss=0.2, p_reorder=0.3, rng=random.Random(5))
+    expected = [arrived for frame in frames for arrived in single.send(frame)]
+    channel = Channel(p_loss=0.2, p_reorder=0.3, rng=random.Random(5))
+    assert channel.send_batch(batch).to_frames() == expected
+    # Frames still in flight are delivered like any other
+    assert channel.flush() == single.flush()
+
+
+@pytest.mark.parametrize("factory", [Channel, CalendarChannel])
+def test_channel_batch_queues_only_frames(factory):
+    batch = Sender(mode=Mode.ROLLING_MAC, shared_key=KEY).next_batch(make_commands(60))
+    earlier = Frame(command="JUMP", counter=0)
+
+    # With this seed the earlier frame is delayed and arrives among the batch rows
+    single = factory(p_loss=0.1, p_reorder=0.6, rng=random.Random(3))
+    expected = single.send(earlier) + [arrived for frame in batch for arrived in single.send(frame)]
+    channel = factory(p_loss=0.1, p_reorder=0.6, rng=random.Random(3))
+    assert channel.send(earlier) == []
+    arrivals = channel.send_batch(batch)
+    assert "JUMP" in arrivals.commands
+    assert arrivals.to_frames() == expected
+    # Whatever is still in flight is a real frame of the batch, not a placeholder
+    leftover = channel.flush()
+    assert leftover == single.flush()
+    assert all(type(frame) is Frame for frame in leftover)
+
+
+def test_attacker_replays_rows_of_the_recorded_batch():
+    batch = Sender(mode=Mode.ROLLING_MAC, shared_key=KEY).next_batch(make_commands(50), command_table=COMMANDS)
+
+    single = Attacker(record_loss=0.3, target_commands=["FWD", "STOP"])
+    rng = random.Random(11)
+    for frame in batch:
+        single.observe(frame, rng)
+    expected = [single.pick_frame(rng) for _ in range(30)]
+
+    attacker = Attacker(record_loss=0.3, target_commands=["FWD", "STOP"])
+    rng = random.Random(11)
+    attacker.observe_batch(batch, rng)
+    replay = attacker.pick_batch(rng, 30)
+    for frame in expected:
+        frame.is_attack = True
+    assert replay.to_frames() == expected
+    assert replay.commands is batch.commands
+
+    attacker.clear()
+    assert attacker.pick_batch(rng, 1) is None
+
+
+@pytest.mark.parametrize("mode", [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW])
+def test_receiver_checks_batches(mode):
+    sender = Sender(mode=mode, shared_key=KEY)
+    legit = sender.next_batch(make_commands(40), command_table=COMMANDS)
+    attacker = Attacker()
+    rng = random.Random(3)
+    attacker.observe_batch(legit, rng)
+    arrivals = Channel(p_loss=0.1, p_reorder=0.4, rng=rng).send_batch(legit)
+    replay = attacker.pick_batch(rng, 20)
+
+    single = Receiver(mode, shared_key=KEY, mac_length=8, window_size=4)
+    expected = [single.check(frame) for frame in [*arrivals, *replay]]
+    receiver = Receiver(mode, shared_key=KEY, mac_length=8, window_size=4)
+    codes = [*receiver.check_frames(arrivals).tolist(), *receiver.check_frames(replay).tolist()]
+    assert codes == expected
+    assert receiver.process_frames(replay).dtype == bool
@@ -0,0 +1,53 @@
+import functools
+
+import numpy as np
+import pytest
+from sim.experiment import run_many_experiments
+from sim.grid import load_grid, parse_axis, run_grid, save_grid
+from sim.types import Mode
+from tests.conftest import make_config
+
+MODES = [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW]
+
+
+make_config = functools.partial(make_config, p_loss=0.0)
+
+
+def test_grid_cells_match_single_experiments():
+    axes = {"p_loss": [0.0, 0.2], "window_size": [1, 4], "num_legit": [6, 10]}
+    grid = run_grid(make_config(), MODES, axes, runs=6, seed=3, show_progress=False)
+    assert grid.dims == ("mode", "p_loss", "window_size", "num_legit")
+    assert grid.data["avg_attack_rate"].shape == (3, 2, 2, 2)
+
+    for mode in MODES:
+        config = make_config(p_loss=0.2, window_size=4, num_legit=6)
+        expected = run_many_experiments(config, [mode], runs=6, seed=3, show_progress=False)[0]
+        cell = {"mode": mode.value, "p_loss": 0.2, "window_size": 4, "num_legit": 6}
+        assert grid.sel("avg_attack_rate", **cell) == expected.avg_attack_rate
+        assert grid.sel("std_legit_rate", **cell) == expected.std_legit_rate
+
+
+def test_window_independent_modes_are_flat_along_window_size():
+    grid = run_grid(make_config(p_loss=0.1), MODES, {"window_size": [1, 3, 5]}, runs=5, seed=1, show_progress=False)
+    rolling = grid.sel("avg_legit_rate", mode="rolling")
+    assert np.all(rolling == rolling[0])
+
+
+def test_npz_round_trip(tmp_path):
+    grid = run_grid(make_config(), MODES, {"p_loss": [0.0, 0.3]}, runs=4, seed=2, show_progress=False)
+    save_grid(tmp_path / "grid.npz", grid, runs=4, seed=2)
+
+    archive = np.load(tmp_path / "grid.npz")
+    assert list(archive["dims"]) == ["mode", "p_loss"]
+    assert int(archive["attr_seed"]) == 2
+
+    loaded = load_grid(tmp_path / "grid.npz")
+    assert loaded.dims == grid.dims
+    for metric, values in grid.data.items():
+        assert np.array_equal(loaded.data[metric], values)
+
+
+@pytest.mark.parametrize("spec", ["p_loss", "seed=1,2", "window_size=1.5", "p_loss="])
+def test_invalid_axis_spec(spec):
+    with pytest.raises(ValueError):
+        parse_axis(spec)
@@ -0,0 +1,44 @@
+import pytest
+
+from sim.journal import SweepJournal
+
+
+def test_resume_replays_recorded_points(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = SweepJournal(path)
+    journal.record("a", [{"mode": "rolling", "avg_attack_rate": 0.25}])
+    journal.record("b", [])
+
+    resumed = SweepJournal(path, resume=True)
+    assert resumed.get("a") == [{"mode": "rolling", "avg_attack_rate": 0.25}]
+    assert resumed.get("b") == []
+    assert resumed.get("c") is None
+
+
+def test_fresh_journal_truncates(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    SweepJournal(path).record("a", [{}])
+    assert SweepJournal(path, fresh=True).get("a") is None
+    assert path.read_text(encoding="utf-8") == ""
+
+
+def test_existing_checkpoints_are_not_overwritten(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    SweepJournal(path).record("a", [{}])
+    with pytest.raises(ValueError):
+        SweepJournal(path)
+    assert SweepJournal(path, resume=True).get("a") == [{}]
+    with pytest.raises(ValueError):
+        SweepJournal(path, resume=True, fresh=True)
+
+
+def test_torn_last_line_is_skipped(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    SweepJournal(path).record("a", [{"x": 1}])
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"key": "b", "reco')  # killed mid-write
+
+    resumed = SweepJournal(path, resume=True)
+    assert resumed.get("a") == [{"x": 1}] and resumed.get("b") is None
+    resumed.record("c", [{"x": 3}])
+    assert SweepJournal(path, resume=True).get("c") == [{"x": 3}]
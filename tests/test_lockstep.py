@@ -0,0 +1,175 @@
+import dataclasses
+import functools
+import os
+import random
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sim.experiment import run_many_experiments, simulate_lockstep, simulate_one_run, simulate_variants
+from sim.types import AttackMode, Mode, SimulationConfig
+from tests.conftest import make_config
+
+ALL_MODES = [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW, Mode.CHALLENGE]
+
+
+make_config = functools.partial(
+    make_config, num_legit=20, num_replay=30, p_loss=0.15, p_reorder=0.3, attacker_record_loss=0.1
+)
+
+
+def _counters(result):
+    return (result.legit_sent, result.legit_accepted, result.attack_attempts, result.attack_success)
+
+
+@pytest.mark.parametrize("attack_mode", [AttackMode.POST_RUN, AttackMode.INLINE])
+def test_lockstep_matches_single_mode_runs(attack_mode):
+    config = make_config(attack_mode=attack_mode, inline_attack_burst=2)
+    for seed in range(20):
+        paired = simulate_lockstep(config, ALL_MODES, rng=random.Random(seed), nonce_rng=random.Random(-seed))
+        for mode in (Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW):
+            single = simulate_one_run(dataclasses.replace(config, mode=mode), rng=random.Random(seed))
+            assert _counters(paired[mode]) == _counters(single)
+
+
+def test_lockstep_without_nonce_rng_matches_single_mode_runs():
+    config = make_config()
+    for seed in range(20):
+        paired = simulate_lockstep(config, ALL_MODES, rng=random.Random(seed))
+        for mode in (Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW):
+            single = simulate_one_run(dataclasses.replace(config, mode=mode), rng=random.Random(seed))
+            assert _counters(paired[mode]) == _counters(single)
+
+
+def test_default_nonce_stream_is_reproducible_across_processes():
+    # Each interpreter salts str/tuple hashes differently; the results must not depend on it
+    script = (
+        "import random\n"
+        "from sim.experiment import simulate_lockstep\n"
+        "from sim.types import AttackMode, Mode, SimulationConfig\n"
+        "config = SimulationConfig(mode=Mode.CHALLENGE, attack_mode=AttackMode.INLINE, inline_attack_probability=0.5,"
+        " num_legit=20, p_loss=0.1, challenge_nonce_bits=4)\n"
+        "print([simulate_lockstep(config, [Mode.CHALLENGE], rng=random.Random(seed))[Mode.CHALLENGE].attack_success"
+        " for seed in range(50)])\n"
+    )
+    root = Path(__file__).resolve().parent.parent
+    outputs = [
+        subprocess.run(
+            [sys.executable, "-c", script], cwd=root, capture_output=True, text=True, check=True,
+            env={**os.environ, "PYTHONHASHSEED": "random"},
+        ).stdout
+        for _ in range(2)
+    ]
+    assert outputs[0] == outputs[1]
+
+
+def test_lockstep_results_are_paired():
+    paired = simulate_lockstep(make_config(), ALL_MODES, rng=random.Random(3))
+    assert set(paired) == set(ALL_MODES)
+    # All modes faced the same replay attempts
+    assert len({result.attack_attempts for result in paired.values()}) == 1
+
+
+def test_challenge_lane_in_lockstep_is_sound():
+    paired = simulate_lockstep(make_config(p_loss=0.0, p_reorder=0.0), [Mode.CHALLENGE], rng=random.Random(1))
+    result = paired[Mode.CHALLENGE]
+    assert result.legit_accepted == result.legit_sent
+    assert result.attack_success == 0
+
+
+def test_variants_must_share_traffic():
+    config = make_config()
+    with pytest.raises(ValueError):
+        simulate_variants(config, [make_config(p_loss=0.3)], rng=random.Random(0))
+
+
+def test_lockstep_engine_aggregates():
+    config = make_config()
+    scalar = run_many_experiments(config, ALL_MODES, runs=20, seed=5, show_progress=False)
+    lockstep = run_many_experiments(config, ALL_MODES, runs=20, seed=5, show_progress=False, engine="lockstep")
+    parallel = run_many_experiments(config, ALL_MODES, runs=20, seed=5, show_progress=False, engine="lockstep", jobs=2)
+
+    for s, l, p in zip(scalar, lockstep, parallel):
+        assert s.mode == l.mode == p.mode
+        assert (l.avg_legit_rate, l.avg_attack_rate) == (p.avg_legit_rate, p.avg_attack_rate)
+        if s.mode is not Mode.CHALLENGE:
+            assert (s.avg_legit_rate, s.std_legit_rate, s.avg_attack_rate) == (
+                l.avg_legit_rate, l.std_legit_rate, l.avg_attack_rate
+            )
+
+
+def test_timings_are_recorded_per_pass():
+    config = make_config()
+    scalar = run_many_experiments(config, ALL_MODES, runs=10, seed=5, show_progress=False)
+    lockstep = run_many_experiments(config, ALL_MODES, runs=10, seed=5, show_progress=False, engine="lockstep")
+
+    for entry in scalar + lockstep:
+        assert entry.metadata["elapsed"] > 0
+        assert entry.metadata["time_per_run"] == pytest.approx(entry.metadata["elapsed"] / 10)
+        assert "total_time" not in entry.metadata
+    # Each scalar mode is its own pass; lockstep modes share one
+    assert len({entry.metadata["elapsed"] for entry in scalar}) == len(ALL_MODES)
+    assert len({entry.metadata["elapsed"] for entry in lockstep}) == 1
+    assert ["engine" in entry.metadata for entry in scalar] == [True, False, False, False]
+
+
+def test_window_fanout_matches_separate_runs():
+    config = make_config(mode=Mode.WINDOW, attack_mode=AttackMode.INLINE)
+    sizes = [1, 3, 5, 7, 9, 15, 20]
+    for seed in range(10):
+        fanned = simulate_one_run(config, rng=random.Random(seed), window_sizes=sizes)
+        assert [r.metadata["window_size"] for r in fanned] == sizes
+        for size, result in zip(sizes, fanned):
+            single = simulate_one_run(dataclasses.replace(config, window_size=size), rng=random.Random(seed))
+            assert _counters(result) == _counters(single)
+
+
+def test_run_many_experiments_window_fanout():
+    config = make_config()
+    sizes = [1, 4, 9]
+    stats = run_many_experiments(config, [Mode.ROLLING_MAC, Mode.WINDOW], runs=15, seed=8,
+                                 show_progress=False, window_sizes=sizes)
+    assert [(s.mode, s.window_size) for s in stats] == [
+        (Mode.ROLLING_MAC, 0), (Mode.WINDOW, 1), (Mode.WINDOW, 4), (Mode.WINDOW, 9)
+    ]
+    for size, entry in zip(sizes, stats[1:]):
+        single = run_many_experiments(dataclasses.replace(config, window_size=size), [Mode.WINDOW],
+                                      runs=15, seed=8, show_progress=False)[0]
+        assert (entry.avg_legit_rate, entry.avg_attack_rate) == (single.avg_legit_rate, single.avg_attack_rate)
+
+
+def test_coupled_channels_are_monotone_in_loss():
+    config = make_config(p_reorder=0.0)
+    grid = [0.0, 0.1, 0.2, 0.3]
+    variants = [dataclasses.replace(config, mode=Mode.ROLLING_MAC, p_loss=value) for value in grid]
+    for seed in range(30):
+        results = simulate_variants(config, variants, rng=random.Random(seed), coupled=True)
+        accepted = [result.legit_accepted for result in results]
+        # Frames lost at one loss level are lost at every higher level
+        assert accepted == sorted(accepted, reverse=True)
+        assert accepted[0] == config.num_legit
+
+
+def test_coupled_grid_agrees_with_independent_runs():
+    config = make_config()
+    grid = [(0.05, 0.3), (0.25, 0.3)]
+    coupled = run_many_experiments(
+        config, [Mode.ROLLING_MAC, Mode.WINDOW], runs=1500, seed=5, show_progress=False, channel_grid=grid
+    )
+    assert [(s.p_loss, s.mode) for s in coupled] == [
+        (0.05, Mode.ROLLING_MAC), (0.05, Mode.WINDOW), (0.25, Mode.ROLLING_MAC), (0.25, Mode.WINDOW)
+    ]
+    for entry in coupled:
+        single = run_many_experiments(
+            dataclasses.replace(config, p_loss=entry.p_loss), [entry.mode], runs=1500, seed=6, show_progress=False
+        )[0]
+        assert entry.avg_legit_rate == pytest.approx(single.avg_legit_rate, abs=0.03)
+        assert entry.avg_attack_rate == pytest.approx(single.avg_attack_rate, abs=0.03)
+
+
+def test_coupled_grid_not_supported_by_batched_engine():
+    with pytest.raises(ValueError):
+        run_many_experiments(
+            make_config(), [Mode.ROLLING_MAC], runs=4, show_progress=False, engine="batched", channel_grid=[(0.1, 0.0)]
+        )
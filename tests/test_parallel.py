@@ -0,0 +1,54 @@
+import functools
+
+import pytest
+from sim.experiment import make_worker_pool, run_many_experiments
+from sim.types import AttackMode, Mode
+from tests.conftest import make_config
+
+ALL_MODES = [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW, Mode.CHALLENGE]
+
+
+make_config = functools.partial(make_config, num_legit=15, num_replay=30, p_loss=0.1, window_size=5)
+
+
+def _core_fields(stats):
+    return [
+        (s.mode, s.runs, s.avg_legit_rate, s.std_legit_rate, s.avg_attack_rate, s.std_attack_rate)
+        for s in stats
+    ]
+
+
+@pytest.mark.parametrize("attack_mode", [AttackMode.POST_RUN, AttackMode.INLINE])
+def test_parallel_matches_serial(attack_mode):
+    config = make_config(attack_mode=attack_mode)
+    serial = run_many_experiments(config, ALL_MODES, runs=24, seed=7, show_progress=False)
+    parallel = run_many_experiments(config, ALL_MODES, runs=24, seed=7, show_progress=False, jobs=3)
+
+    # Bit-for-bit identical aggregates, not just close
+    assert _core_fields(parallel) == _core_fields(serial)
+
+
+def test_shared_pool_matches_serial():
+    config = make_config()
+    serial = [run_many_experiments(config, [mode], runs=12, seed=5, show_progress=False) for mode in ALL_MODES]
+    pool = make_worker_pool(2)
+    try:
+        # The same pool serves several experiments and stays usable
+        shared = [
+            run_many_experiments(config, [mode], runs=12, seed=5, show_progress=False, jobs=2, executor=pool)
+            for mode in ALL_MODES
+        ]
+    finally:
+        pool.shutdown()
+
+    assert [_core_fields(s) for s in shared] == [_core_fields(s) for s in serial]
+
+
+def test_parallel_records_jobs_in_metadata():
+    stats = run_many_experiments(make_config(), [Mode.ROLLING_MAC], runs=4, seed=1, show_progress=False, jobs=2)
+    assert stats[0].metadata["jobs"] == 2
+
+
+def test_invalid_jobs_rejected():
+    with pytest.raises(ValueError):
+        run_many_experiments(make_config(), [Mode.ROLLING_MAC], runs=4, seed=1, show_progress=False, jobs=0)
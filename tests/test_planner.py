@@ -0,0 +1,54 @@
+import dataclasses
+import functools
+
+from sim.experiment import run_many_experiments
+from sim.planner import SweepPlanner, normalize_config
+from sim.types import AttackMode, Mode
+from tests.conftest import make_config
+
+
+make_config = functools.partial(make_config, window_size=7)
+
+
+def test_normalize_resets_ignored_fields():
+    config = make_config(challenge_nonce_bits=16, inline_attack_burst=3, rng_seed=5)
+    rolling = normalize_config(Mode.ROLLING_MAC, config)
+    assert rolling.mode is Mode.ROLLING_MAC
+    assert rolling.window_size == 0 and rolling.challenge_nonce_bits == 32
+    assert rolling.inline_attack_burst == 1 and rolling.rng_seed is None
+
+    window = normalize_config(Mode.WINDOW, config)
+    assert window.window_size == 7
+
+    inline = normalize_config(Mode.CHALLENGE, make_config(attack_mode=AttackMode.INLINE, inline_attack_burst=3))
+    assert inline.inline_attack_burst == 3 and inline.window_size == 0
+
+
+def test_normalized_experiment_reports_same_records():
+    for mode in (Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.CHALLENGE):
+        config = make_config(window_size=9, challenge_nonce_bits=16 if mode is not Mode.CHALLENGE else 32)
+        original = run_many_experiments(config, [mode], runs=8, seed=4, show_progress=False)
+        normalized = run_many_experiments(normalize_config(mode, config), [mode], runs=8, seed=4, show_progress=False)
+        assert [dataclasses.replace(s, metadata={}) for s in original] == \
+            [dataclasses.replace(s, metadata={}) for s in normalized]
+
+
+def test_planner_runs_shared_experiments_once():
+    planner = SweepPlanner()
+    keys = [planner.add(Mode.ROLLING_MAC, make_config(window_size=size), 6, 1) for size in (1, 3, 5)]
+    window_keys = [planner.add(Mode.WINDOW, make_config(window_size=size), 6, 1) for size in (1, 3)]
+    assert len(set(keys)) == 1 and len(set(window_keys)) == 2
+    assert planner.requests == 5 and len(planner.experiments) == 3
+
+    executed = []
+
+    def execute(planned):
+        executed.append(planned.key)
+        stats = run_many_experiments(planned.config, [planned.mode], runs=planned.runs, seed=planned.seed,
+                                     show_progress=False, **planned.options)
+        return [entry.as_dict() for entry in stats]
+
+    planner.run(execute)
+    planner.run(execute)  # nothing left to do
+    assert len(executed) == 3
+    assert planner.select(window_keys[1], window_size=3)["mode"] == "window"
@@ -1,5 +1,8 @@
+import dataclasses
+import random
+
 import pytest
-from sim.receiver import Receiver, VerificationResult
+from sim.receiver import FIRST_REJECT, REASONS, Receiver, VerificationResult
 from sim.types import Mode, Frame
 
 # Helper constants
@@ -115,3 +118,114 @@ def test_window_too_old(receiver_window):
     f_valid = create_frame(16)
     res = receiver_window.process(f_valid)
     assert res.accepted
+
+def _reference_window(counters, window_size):
+    # The original unbounded-integer bitmap, kept as an oracle
+    last, mask, accepted = -1, 0, []
+    for counter in counters:
+        if last < 0:
+            last, mask = counter, 1
+            accepted.append(True)
+            continue
+        diff = counter - last
+        if diff > 0:
+            if diff > window_size:
+                accepted.append(False)
+                continue
+            mask = (mask << diff) | 1
+            last = counter
+            accepted.append(True)
+        elif -diff >= window_size or (mask >> -diff) & 1:
+            accepted.append(False)
+        else:
+            mask |= 1 << -diff
+            accepted.append(True)
+    return accepted
+
+@pytest.mark.parametrize("window_size", [1, 5, 63, 64, 65, 200, 1024])
+def test_window_bitmap_matches_reference(window_size):
+    rng = random.Random(window_size)
+    counters, top = [], 1
+    for _ in range(3000):
+        # Mostly advancing traffic with replays and stale frames mixed in
+        if rng.random() < 0.6:
+            top += rng.randint(1, max(1, window_size))
+            counters.append(top)
+        else:
+            counters.append(max(0, top - rng.randint(0, 2 * window_size)))
+
+    receiver = Receiver(Mode.WINDOW, shared_key=SHARED_KEY, mac_length=MAC_LENGTH, window_size=window_size)
+    got = [receiver.process(create_frame(c)).accepted for c in counters]
+    assert got == _reference_window(counters, window_size)
+
+def test_window_bitmap_size_is_bounded():
+    receiver = Receiver(Mode.WINDOW, shared_key=SHARED_KEY, mac_length=MAC_LENGTH, window_size=65536)
+    receiver.process(create_frame(1))
+    size = len(receiver.state.window_blocks)
+    for counter in range(2, 200000, 997):
+        receiver.process(create_frame(counter))
+    assert len(receiver.state.window_blocks) == size
+    # 65536 bits of window plus one spare block, rounded up to a power of two
+    assert size == 2048
+
+def test_check_returns_reason_codes(receiver_window):
+    codes = [receiver_window.check(create_frame(c)) for c in (10, 12, 11, 11, 2)]
+    assert [REASONS[code] for code in codes] == [
+        "window_accept_initial", "window_accept_new", "window_accept_old", "counter_replay", "counter_too_old",
+    ]
+    assert [code < FIRST_REJECT for code in codes] == [True, True, True, False, False]
+    assert receiver_window.reason_histogram() == {
+        "window_accept_initial": 1, "window_accept_new": 1, "window_accept_old": 1,
+        "counter_replay": 1, "counter_too_old": 1,
+    }
+
+def test_process_reuses_results_and_counts_survive_reset(receiver_rolling):
+    first = receiver_rolling.process(create_frame(1))
+    assert receiver_rolling.process(create_frame(2)) is first  # preallocated per reason
+    assert first.state is receiver_rolling.state
+
+    # Sharing is safe: a kept result is frozen and keeps its outcome
+    replay = receiver_rolling.process(create_frame(1))
+    assert receiver_rolling.process(create_frame(3)).accepted
+    assert (replay.accepted, replay.reason) == (False, "counter_replay")
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.accepted = False
+
+    receiver_rolling.reset()
+    assert receiver_rolling.process(create_frame(1)).accepted
+    assert receiver_rolling.reason_counts[REASONS.index("rolling_accept")] == 4
+    receiver_rolling.clear_counts()
+    assert receiver_rolling.reason_histogram() == {}
+
+@pytest.mark.parametrize("mode", [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW, Mode.CHALLENGE])
+def test_process_batch_matches_per_frame_checks(mode):
+    rng = random.Random(7)
+    frames = []
+    for _ in range(300):
+        frame = create_frame(rng.randint(0, 60), command=rng.choice(["LOCK", "UNLOCK"]))
+        if rng.random() < 0.1:
+            frame.mac = "0" * MAC_LENGTH
+        if rng.random() < 0.05:
+            frame.mac = None
+        frames.append(frame)
+
+    single = Receiver(mode, shared_key=SHARED_KEY, mac_length=MAC_LENGTH, window_size=5)
+    batch = Receiver(mode, shared_key=SHARED_KEY, mac_length=MAC_LENGTH, window_size=5)
+    if mode is Mode.CHALLENGE:
+        single.state.expected_nonce = batch.state.expected_nonce = "00"
+    expected = [single.check(frame) for frame in frames]
+    codes = batch.check_batch(
+        [f.counter for f in frames], [f.command for f in frames], [f.mac for f in frames], [f.nonce for f in frames]
+    )
+    assert codes.tolist() == expected
+    assert batch.reason_histogram() == single.reason_histogram()
+    assert single.state == batch.state
+
+    again = Receiver(mode, shared_key=SHARED_KEY, mac_length=MAC_LENGTH, window_size=5)
+    if mode is Mode.CHALLENGE:
+        again.state.expected_nonce = "00"
+    accepted = again.process_batch(
+        [f.counter for f in frames], [f.command for f in frames], [f.mac for f in frames], [f.nonce for f in frames]
+    )
+    assert accepted.dtype == bool
+    assert accepted.tolist() == [code < FIRST_REJECT for code in expected]
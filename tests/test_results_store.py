@@ -0,0 +1,52 @@
+import json
+import os
+
+import pytest
+
+from sim.results_store import ResultsStore
+
+
+def write_records(path, records):
+    path.write_text(json.dumps(records), encoding="utf-8")
+
+
+def sweep_records():
+    return [
+        {"mode": mode, "sweep_type": "p_loss", "sweep_value": p, "p_loss": p, "avg_legit_rate": 1 - p}
+        for p in (0.2, 0.0, 0.1)
+        for mode in ("rolling", "window")
+    ]
+
+
+def test_query_filters_and_orders(tmp_path):
+    source = tmp_path / "p_loss_sweep.json"
+    write_records(source, sweep_records())
+    with ResultsStore(tmp_path / "store.sqlite") as store:
+        assert store.ingest_dir(tmp_path) == 6
+        rows = store.query(source, order_by="sweep_value", mode="window", sweep_type="p_loss")
+        assert [row["sweep_value"] for row in rows] == [0.0, 0.1, 0.2]
+        assert store.get(source, mode="rolling", sweep_value=0.1)["avg_legit_rate"] == 0.9
+        assert store.get(source, mode="challenge") is None
+        assert store.distinct("sweep_value", source, sweep_type="p_loss") == [0.0, 0.1, 0.2]
+        # Records without a field match None
+        assert len(store.query(source, p_reorder=None)) == 6
+        with pytest.raises(ValueError):
+            store.query(source, avg_legit_rate=0.9)
+
+
+def test_ingest_is_incremental(tmp_path):
+    source = tmp_path / "baseline.json"
+    write_records(source, [{"mode": "rolling"}])
+    (tmp_path / "baseline.moments.json").write_text('{"experiment": "x", "entries": []}', encoding="utf-8")
+    with ResultsStore(tmp_path / "store.sqlite") as store:
+        assert store.ingest_dir(tmp_path) == 1
+        assert store.ingest(source) == 0  # unchanged
+
+        write_records(source, [{"mode": "window"}, {"mode": "challenge"}])
+        os.utime(source, ns=(1, 1))
+        assert store.ingest(source) == 2
+        assert [row["mode"] for row in store.query(source)] == ["window", "challenge"]
+
+        source.unlink()
+        store.ingest(source)
+        assert store.query(source) == []
@@ -0,0 +1,50 @@
+import functools
+
+import numpy as np
+import pytest
+
+from sim.experiment import run_many_experiments
+from sim.runcolumns import RunColumns, RunColumnsWriter
+from sim.runlog import RunLogWriter, read_run_log
+from sim.types import Mode
+from tests.conftest import make_config
+
+MODES = [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW]
+
+
+make_config = functools.partial(make_config, num_legit=12, num_replay=20, p_loss=0.1, window_size=0)
+
+
+def _core_fields(stats):
+    return [(s.mode, s.runs, s.window_size, s.num_legit, s.num_replay, s.attack_mode) for s in stats]
+
+
+@pytest.mark.parametrize("engine", ["scalar", "batched"])
+def test_aggregates_rebuilt_from_columns(tmp_path, engine):
+    # A tiny buffer exercises the flushes between chunks
+    with RunColumnsWriter(tmp_path / "runs", buffer_runs=7) as writer:
+        stats = run_many_experiments(make_config(), MODES, runs=25, seed=4, show_progress=False,
+                                     engine=engine, window_sizes=[1, 3], run_log=writer)
+
+    columns = RunColumns(tmp_path / "runs")
+    assert isinstance(columns["attack_success"], np.memmap)
+    assert len(columns) == 25 * 4
+    rebuilt = columns.aggregates()
+    assert _core_fields(rebuilt) == _core_fields(stats)
+    for fresh, stored in zip(stats, rebuilt):
+        assert stored.avg_legit_rate == pytest.approx(fresh.avg_legit_rate)
+        assert stored.std_attack_rate == pytest.approx(fresh.std_attack_rate)
+
+
+def test_columns_match_run_log(tmp_path):
+    config = make_config()
+    with RunLogWriter(tmp_path / "runs.jsonl") as run_log:
+        run_many_experiments(config, MODES, runs=10, seed=2, show_progress=False, run_log=run_log)
+    with RunColumnsWriter(tmp_path / "runs") as writer:
+        run_many_experiments(config, MODES, runs=10, seed=2, show_progress=False, run_log=writer)
+
+    records = list(read_run_log(tmp_path / "runs.jsonl"))
+    columns = RunColumns(tmp_path / "runs")
+    assert columns["seed"].tolist() == [r["seed"] for r in records]
+    assert columns["attack_success"].tolist() == [r["attack_success"] for r in records]
+    assert [columns.variants[v]["mode"] for v in columns["variant"].tolist()] == [r["mode"] for r in records]
@@ -0,0 +1,34 @@
+import functools
+import random
+
+import pytest
+from sim.experiment import RunPlan, simulate_one_run
+from sim.types import AttackMode, Mode
+from tests.conftest import make_config
+
+
+make_config = functools.partial(make_config, mode=Mode.WINDOW, num_legit=15, num_replay=30, p_reorder=0.3)
+
+
+def _counters(result):
+    return (result.legit_sent, result.legit_accepted, result.attack_attempts, result.attack_success)
+
+
+@pytest.mark.parametrize("mode", list(Mode))
+@pytest.mark.parametrize(
+    "overrides",
+    [
+        dict(),
+        dict(attack_mode=AttackMode.INLINE, inline_attack_burst=2, inline_attack_probability=0.5),
+        dict(command_sequence=["open", "close", "lock"], attacker_record_loss=0.2),
+    ],
+)
+def test_reused_plan_matches_fresh_runs(mode, overrides):
+    config = make_config(mode=mode, **overrides)
+    plan = RunPlan(config)
+    for seed in range(15):
+        # The plan is reset between runs, so no state leaks from the previous one
+        reused = plan.run(random.Random(seed))
+        fresh = simulate_one_run(config, rng=random.Random(seed))
+        assert _counters(reused) == _counters(fresh)
+        assert reused.metadata == fresh.metadata
@@ -0,0 +1,142 @@
+import pickle
+
+import pytest
+from sim.experiment import run_many_experiments
+from sim.security import (
+    DEFAULT_MAC_CACHE_SIZE,
+    MAX_ATTACHED_TABLES,
+    MacTable,
+    _ATTACHED_TABLES,
+    compute_mac,
+    configure_mac_cache,
+    mac_cache_info,
+)
+from sim.types import Mode, SimulationConfig
+
+SHARED_KEY = "test_key"
+COMMANDS = ["FWD", "BACK", "STOP"]
+
+
+@pytest.fixture
+def table():
+    table = MacTable(SHARED_KEY, 8, COMMANDS, max_token=10)
+    yield table
+    table.close()
+
+
+def test_table_matches_compute_mac(table):
+    for counter in range(11):
+        for command in COMMANDS:
+            assert table.lookup(counter, command, SHARED_KEY, 8) == compute_mac(counter, command, SHARED_KEY, 8)
+
+
+def test_table_falls_back_outside_its_range(table):
+    # Counter beyond the table, nonce tokens, and a different key all recompute
+    assert table.lookup(11, "FWD", SHARED_KEY, 8) == compute_mac(11, "FWD", SHARED_KEY, 8)
+    assert table.lookup("deadbeef", "FWD", SHARED_KEY, 8) == compute_mac("deadbeef", "FWD", SHARED_KEY, 8)
+    assert table.lookup(3, "FWD", "other_key", 8) == compute_mac(3, "FWD", "other_key", 8)
+    assert table.lookup(3, "FWD", SHARED_KEY, 16) == compute_mac(3, "FWD", SHARED_KEY, 16)
+
+
+def test_full_length_mac_table():
+    table = MacTable(SHARED_KEY, 0, COMMANDS, max_token=2)
+    assert table.width == 64
+    assert table.lookup(2, "STOP", SHARED_KEY, 0) == compute_mac(2, "STOP", SHARED_KEY, 0)
+
+
+def test_shared_table_pickles_by_name(table):
+    name = table.share()
+    payload = pickle.dumps(table)
+
+    # Only the block name travels, not the MACs themselves
+    assert name.encode() in payload
+    assert table.lookup(5, "BACK", SHARED_KEY, 8).encode() not in payload
+
+    attached = pickle.loads(payload)
+    assert attached.lookup(5, "BACK", SHARED_KEY, 8) == compute_mac(5, "BACK", SHARED_KEY, 8)
+    assert len(attached) == len(table)
+
+
+def test_attached_tables_stay_bounded():
+    tables = [MacTable(SHARED_KEY, 8, COMMANDS, max_token=2) for _ in range(MAX_ATTACHED_TABLES + 2)]
+    try:
+        for table in tables:
+            table.share()
+            pickle.loads(pickle.dumps(table))
+        assert len(_ATTACHED_TABLES) <= MAX_ATTACHED_TABLES
+        assert tables[0]._shm.name not in _ATTACHED_TABLES
+        # The owner closing its table drops the attached copy too
+        name = tables[-1]._shm.name
+        assert name in _ATTACHED_TABLES
+        tables[-1].close()
+        assert name not in _ATTACHED_TABLES
+    finally:
+        for table in tables:
+            table.close()
+
+
+def test_for_config_covers_trace_commands():
+    config = SimulationConfig(mode=Mode.ROLLING_MAC, num_legit=4, command_sequence=["UNLOCK", "FWD"])
+    table = MacTable.for_config(config)
+    assert "UNLOCK" in table.commands
+    assert table.max_token == 4
+
+
+def test_table_does_not_change_results():
+    config = SimulationConfig(mode=Mode.WINDOW, num_legit=10, num_replay=10, p_loss=0.2, p_reorder=0.2, window_size=3)
+    modes = [Mode.ROLLING_MAC, Mode.WINDOW, Mode.CHALLENGE]
+    serial = run_many_experiments(config, modes, runs=12, seed=2, show_progress=False)
+    parallel = run_many_experiments(config, modes, runs=12, seed=2, show_progress=False, jobs=2)
+    assert [s.avg_legit_rate for s in serial] == [s.avg_legit_rate for s in parallel]
+    assert [s.avg_attack_rate for s in serial] == [s.avg_attack_rate for s in parallel]
+
+
+@pytest.fixture
+def fresh_mac_cache():
+    configure_mac_cache(4)
+    yield
+    configure_mac_cache(DEFAULT_MAC_CACHE_SIZE)
+
+
+def test_mac_cache_counts_hits_and_misses(fresh_mac_cache):
+    compute_mac(1, "FWD", SHARED_KEY)
+    compute_mac(1, "FWD", SHARED_KEY)
+    compute_mac(2, "FWD", SHARED_KEY)
+    info = mac_cache_info()
+    assert (info["hits"], info["misses"], info["currsize"]) == (1, 2, 2)
+
+
+def test_mac_cache_is_bounded(fresh_mac_cache):
+    for counter in range(10):
+        compute_mac(counter, "FWD", SHARED_KEY)
+    assert mac_cache_info()["currsize"] == 4
+
+    # Oldest entry was evicted, newest is still cached
+    compute_mac(9, "FWD", SHARED_KEY)
+    compute_mac(0, "FWD", SHARED_KEY)
+    info = mac_cache_info()
+    assert (info["hits"], info["misses"]) == (1, 11)
+
+
+def test_mac_cache_keeps_token_types_apart(fresh_mac_cache):
+    assert compute_mac(1, "FWD", SHARED_KEY) != compute_mac(True, "FWD", SHARED_KEY)
+
+
+def test_mac_cache_stats_in_metadata(fresh_mac_cache):
+    config = SimulationConfig(mode=Mode.CHALLENGE, num_legit=5, num_replay=5)
+    stats = run_many_experiments(config, [Mode.CHALLENGE], runs=3, seed=1, show_progress=False, mac_cache_size=64)
+    meta = stats[0].metadata
+    # The per-call size does not outlive the call
+    assert mac_cache_info()["maxsize"] == 4
+    # Sender computes each nonce MAC, the receiver then hits the cache
+    assert meta["mac_cache_misses"] == 15
+    assert meta["mac_cache_hits"] == 15
+    assert meta["mac_cache_maxsize"] == 64
+
+
+def test_scoped_mac_cache_restores_previous_cache(fresh_mac_cache):
+    compute_mac(1, "FWD", SHARED_KEY)
+    config = SimulationConfig(mode=Mode.ROLLING_MAC, num_legit=5, num_replay=5)
+    run_many_experiments(config, [Mode.ROLLING_MAC], runs=2, seed=1, show_progress=False, mac_cache_size=0)
+    info = mac_cache_info()
+    assert (info["maxsize"], info["currsize"], info["misses"]) == (4, 1, 1)
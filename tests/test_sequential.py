@@ -0,0 +1,92 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from sim.experiment import run_many_experiments
+from sim.types import Mode
+from tests.conftest import make_config
+
+
+def _core_fields(stats):
+    return [
+        (s.mode, s.runs, s.avg_legit_rate, s.std_legit_rate, s.avg_attack_rate, s.std_attack_rate)
+        for s in stats
+    ]
+
+
+def test_zero_variance_stops_after_first_batch():
+    # Ideal channel: no_def accepts everything in every run
+    stats = run_many_experiments(
+        make_config(p_loss=0.0, p_reorder=0.0), [Mode.NO_DEFENSE], runs=5, seed=1,
+        show_progress=False, target_ci=0.01,
+    )
+    assert stats[0].runs == 5
+    assert stats[0].metadata["target_ci"] == 0.01
+
+
+@pytest.mark.parametrize("engine", ["scalar", "lockstep", "batched"])
+def test_budget_caps_runs(engine):
+    stats = run_many_experiments(
+        make_config(), [Mode.NO_DEFENSE, Mode.ROLLING_MAC], runs=10, seed=2,
+        show_progress=False, engine=engine, target_ci=1e-6, max_runs=25,
+    )
+    assert [s.runs for s in stats] == [25, 25]
+
+
+def test_stopped_runs_match_fixed_budget():
+    config = make_config()
+    modes = [Mode.ROLLING_MAC, Mode.WINDOW]
+    sequential = run_many_experiments(config, modes, runs=20, seed=3, show_progress=False, target_ci=0.05)
+    for stats in sequential:
+        assert 20 <= stats.runs <= 2000
+        fixed = run_many_experiments(config, [stats.mode], runs=stats.runs, seed=3, show_progress=False)
+        assert _core_fields([stats]) == _core_fields(fixed)
+
+
+def test_default_output_has_no_target_ci():
+    stats = run_many_experiments(make_config(), [Mode.NO_DEFENSE], runs=5, seed=4, show_progress=False)
+    assert "target_ci" not in stats[0].metadata
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(target_ci=0.0),
+        dict(target_ci=0.05, max_runs=5),
+        dict(target_ci=0.05, engine="analytic"),
+    ],
+)
+def test_invalid_arguments(kwargs):
+    with pytest.raises(ValueError):
+        run_many_experiments(make_config(), [Mode.NO_DEFENSE], runs=10, seed=5, show_progress=False, **kwargs)
+
+
+def test_extend_after_sequential_run_continues_each_mode(tmp_path):
+    root = Path(__file__).resolve().parent.parent
+
+    def main(output, *extra):
+        args = [
+            sys.executable, "main.py", "--runs", "10", "--num-legit", "8", "--num-replay", "10",
+            "--p-loss", "0.2", "--p-reorder", "0.2", "--seed", "3", "--modes", "no_def", "rolling", "window",
+            "--output-json", str(output), "--quiet", "--no-cache", *extra,
+        ]
+        subprocess.run(args, cwd=root, capture_output=True, text=True, check=True)
+        return json.loads(output.read_text(encoding="utf-8"))
+
+    sequential = ["--target-ci", "0.04", "--max-runs", "200"]
+    stored = main(tmp_path / "seq.json", *sequential)
+    assert len({record["runs"] for record in stored}) > 1  # modes stopped at different counts
+
+    extended = main(tmp_path / "seq.json", *sequential, "--extend-to", "120")
+    fixed = main(tmp_path / "fixed.json", "--runs", "120")
+    assert [record["extended_from"] for record in extended] == [record["runs"] for record in stored]
+    for grown, direct in zip(extended, fixed):
+        assert grown["runs"] == direct["runs"] == 120
+        assert grown["avg_legit_rate"] == pytest.approx(direct["avg_legit_rate"])
+        assert grown["avg_attack_rate"] == pytest.approx(direct["avg_attack_rate"])
+
+    # The sequential settings are part of the stored experiment's identity
+    with pytest.raises(subprocess.CalledProcessError):
+        main(tmp_path / "seq.json", "--extend-to", "150")
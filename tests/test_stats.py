@@ -0,0 +1,98 @@
+import random
+
+import numpy as np
+import pytest
+from sim.experiment import run_many_experiments
+from sim.stats import P2Quantile, RunningStats, load_moments, merge_aggregate, save_moments
+from sim.types import Mode
+from tests.conftest import make_config
+
+MODES = [Mode.NO_DEFENSE, Mode.ROLLING_MAC, Mode.WINDOW]
+
+
+def test_merge_equals_union():
+    a, b = [0.1, 0.5, 0.9], [0.2, 0.3]
+    merged = RunningStats.from_values(a).merge(RunningStats.from_values(b))
+    union = RunningStats.from_values(a + b)
+    assert merged.count == union.count == 5
+    assert merged.mean == pytest.approx(union.mean)
+    assert merged.pstdev == pytest.approx(union.pstdev)
+
+
+def test_welford_is_stable_for_large_offsets():
+    # Sum-of-squares formulas lose all precision here
+    values = [1e9 + x for x in (0.1, 0.2, 0.3, 0.4)]
+    assert RunningStats.from_values(values).pstdev == pytest.approx(np.std(values), rel=1e-6)
+
+
+def test_legacy_moments_are_converted():
+    stats = RunningStats.from_dict({"count": 4, "sum": 2.0, "sum_sq": 1.5})
+    expected = RunningStats.from_values([0.0, 0.5, 0.5, 1.0])
+    assert stats.mean == pytest.approx(expected.mean)
+    assert stats.pstdev == pytest.approx(expected.pstdev)
+
+
+@pytest.mark.parametrize("p", [0.05, 0.5, 0.95])
+def test_p2_quantile_tracks_percentile(p):
+    rng = random.Random(3)
+    values = [rng.betavariate(0.5, 8) for _ in range(5000)]
+    sketch = P2Quantile(p)
+    for value in values:
+        sketch.add(value)
+    assert sketch.value == pytest.approx(np.percentile(values, p * 100), abs=0.01)
+
+
+def test_p2_quantile_is_exact_for_few_values():
+    sketch = P2Quantile(0.5)
+    for value in (3.0, 1.0, 2.0, 10.0):
+        sketch.add(value)
+    assert sketch.value == np.percentile([3.0, 1.0, 2.0, 10.0], 50)
+
+
+def test_aggregates_report_attack_quantiles():
+    stats = run_many_experiments(make_config(), MODES, runs=20, seed=3, show_progress=False)
+    parallel = run_many_experiments(make_config(), MODES, runs=20, seed=3, show_progress=False, jobs=2)
+    for entry, other in zip(stats, parallel):
+        assert entry.p5_attack_rate <= entry.median_attack_rate <= entry.p95_attack_rate
+        assert entry.as_dict()["median_attack_rate"] == entry.median_attack_rate
+        assert other.median_attack_rate == entry.median_attack_rate
+
+
+@pytest.mark.parametrize("engine", ["scalar", "lockstep"])
+def test_extension_matches_full_experiment(engine):
+    config = make_config()
+    first = run_many_experiments(config, MODES, runs=12, seed=7, show_progress=False, engine=engine)
+    rest = run_many_experiments(config, MODES, runs=30, seed=7, show_progress=False, engine=engine, first_run=12)
+    assert [s.runs for s in rest] == [18, 18, 18]
+
+    full = run_many_experiments(config, MODES, runs=30, seed=7, show_progress=False, engine=engine)
+    for old, new, expected in zip(first, rest, full):
+        merged = merge_aggregate(old.moments, new)
+        assert merged.runs == 30
+        assert merged.avg_legit_rate == pytest.approx(expected.avg_legit_rate, abs=1e-12)
+        assert merged.std_legit_rate == pytest.approx(expected.std_legit_rate, abs=1e-9)
+        assert merged.avg_attack_rate == pytest.approx(expected.avg_attack_rate, abs=1e-12)
+        assert merged.std_attack_rate == pytest.approx(expected.std_attack_rate, abs=1e-9)
+
+
+def test_moments_sidecar_round_trip(tmp_path):
+    stats = run_many_experiments(make_config(), MODES, runs=5, seed=8, show_progress=False)
+    save_moments(tmp_path / "m.json", "abc", stats)
+    experiment, entries = load_moments(tmp_path / "m.json")
+    assert experiment == "abc"
+    assert entries == [entry.moments for entry in stats]
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        dict(first_run=10),
+        dict(first_run=3, seed=None),
+        dict(first_run=3, engine="batched"),
+        dict(first_run=3, target_ci=0.1),
+    ],
+)
+def test_invalid_first_run(kwargs):
+    kwargs.setdefault("seed", 1)
+    with pytest.raises(ValueError):
+        run_many_experiments(make_config(), [Mode.NO_DEFENSE], runs=10, show_progress=False, **kwargs)